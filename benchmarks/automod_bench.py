@@ -0,0 +1,249 @@
+"""Benchmark hors-ligne de l'automod (aucune connexion Discord).
+
+Deux mesures:
+  - `check`: débit brut de Automod.check (liste de mots compilée + fenêtres
+    glissantes) sur un flux de messages synthétiques;
+  - `on_message`: le listener du cog Moderation alimenté en faux messages
+    par vagues, pendant qu'une sonde mesure le retard de la boucle
+    d'événements (écart entre un sleep demandé et le réveil réel).
+
+Usage:
+    python benchmarks/automod_bench.py --messages 200000 --words 500
+    python benchmarks/automod_bench.py --rate 5000 --output bench_automod.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+VOCABULARY = (
+    "salut tout le monde qui joue ce soir je lance une partie venez sur le vocal "
+    "merci pour l'aide le bot marche bien quelqu'un a vu le dernier épisode"
+).split()
+# intervalle de la sonde de latence de la boucle (secondes)
+PROBE_INTERVAL = 0.005
+
+
+# --- faux objets Discord ---
+
+class FakePermissions:
+    manage_messages = False
+
+
+class FakeMember:
+    bot = False
+    guild_permissions = FakePermissions()
+
+    def __init__(self, user_id):
+        self.id = user_id
+        self.mention = f"<@{user_id}>"
+
+
+class FakeGuild:
+    def __init__(self, guild_id):
+        self.id = guild_id
+
+
+class FakeChannel:
+    async def send(self, content=None, **kwargs):
+        pass
+
+
+class FakeMessage:
+    def __init__(self, guild, author, content, mentions):
+        self.guild = guild
+        self.author = author
+        self.content = content
+        self.mentions = mentions
+        self.role_mentions = ()
+        self.channel = FakeChannel()
+
+    async def delete(self):
+        pass
+
+
+class FakeBot:
+    user = FakeMember(0)
+
+    async def wait_until_ready(self):
+        pass
+
+
+# --- mesures ---
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, round(pct / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def make_stream(count, guilds, users, words, seed=1):
+    """Messages (guild_id, user_id, contenu, mentions): surtout du trafic
+    normal, avec quelques mots interdits, mentions et répétitions."""
+    rng = random.Random(seed)
+    stream = []
+    for _ in range(count):
+        content = " ".join(rng.choices(VOCABULARY, k=rng.randint(3, 25)))
+        roll = rng.random()
+        if roll < 0.01 and words:
+            content += " " + rng.choice(words)
+        elif roll < 0.02:
+            content = "copie copie copie"
+        mentions = rng.randint(3, 6) if rng.random() < 0.01 else 0
+        stream.append((rng.randint(1, guilds), rng.randint(1, users), content, mentions))
+    return stream
+
+
+def banned_words(count, seed=2):
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choices(letters, k=rng.randint(5, 12))) for _ in range(count)]
+
+
+def bench_check(stream, guilds, words):
+    from utils.automod import Automod
+
+    automod = Automod()
+    for guild_id in range(1, guilds + 1):
+        automod.configure(guild_id, True, 'warn', words)
+    hits = 0
+    t = time.perf_counter()
+    for guild_id, user_id, content, mentions in stream:
+        if automod.check(guild_id, user_id, content, mentions) is not None:
+            hits += 1
+    elapsed = time.perf_counter() - t
+    return {
+        'messages': len(stream),
+        'elapsed_s': round(elapsed, 3),
+        'throughput_msg_s': round(len(stream) / elapsed, 1),
+        'per_message_us': round(elapsed / len(stream) * 1e6, 2),
+        'violations': hits,
+    }
+
+
+async def bench_on_message(stream, guilds, words, rate):
+    from cogs.moderation import Moderation
+
+    data_dir = tempfile.mkdtemp(prefix="automod-bench-")
+    os.environ['DATA_DIR'] = data_dir
+    try:
+        cog = Moderation(FakeBot())
+        await cog.store.open()
+        for guild_id in range(1, guilds + 1):
+            # suppression seule: mesure le pipeline, pas l'écriture des avertissements
+            cog.automod.configure(guild_id, True, 'delete', words)
+        guild_objs = {g: FakeGuild(g) for g in range(1, guilds + 1)}
+        messages = [
+            FakeMessage(guild_objs[g], FakeMember(u), content, [None] * mentions)
+            for g, u, content, mentions in stream
+        ]
+
+        lags = []
+        running = True
+
+        async def probe():
+            loop = asyncio.get_running_loop()
+            while running:
+                start = loop.time()
+                await asyncio.sleep(PROBE_INTERVAL)
+                lags.append(loop.time() - start - PROBE_INTERVAL)
+
+        probe_task = asyncio.create_task(probe())
+        await asyncio.sleep(PROBE_INTERVAL * 2)
+        latencies = []
+        # vagues de messages toutes les 10 ms (ou le plus vite possible si rate=0)
+        wave = max(1, rate // 100) if rate else 500
+        t = time.perf_counter()
+        for i in range(0, len(messages), wave):
+            wave_start = time.perf_counter()
+            for message in messages[i:i + wave]:
+                start = time.perf_counter()
+                # discord.py crée une tâche par événement; ici le coût seul du listener
+                await cog.on_message(message)
+                latencies.append(time.perf_counter() - start)
+            if rate:
+                await asyncio.sleep(max(0, 0.01 - (time.perf_counter() - wave_start)))
+            else:
+                await asyncio.sleep(0)
+        elapsed = time.perf_counter() - t
+        running = False
+        await probe_task
+        await cog.store.close()
+        return {
+            'messages': len(messages),
+            'target_rate_msg_s': rate or None,
+            'elapsed_s': round(elapsed, 3),
+            'throughput_msg_s': round(len(messages) / elapsed, 1),
+            'listener_us': {
+                'p50': round(percentile(latencies, 50) * 1e6, 2),
+                'p99': round(percentile(latencies, 99) * 1e6, 2),
+                'max': round(max(latencies) * 1e6, 2),
+            },
+            'loop_lag_ms': {
+                'samples': len(lags),
+                'p50': round(percentile(lags, 50) * 1000, 3),
+                'p99': round(percentile(lags, 99) * 1000, 3),
+                'max': round(max(lags) * 1000, 3),
+            },
+        }
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=200_000)
+    parser.add_argument('--guilds', type=int, default=50)
+    parser.add_argument('--users', type=int, default=20_000)
+    parser.add_argument('--words', type=int, default=500, help="mots interdits par serveur")
+    parser.add_argument('--rate', type=int, default=5000, help="messages/s injectés dans on_message (0 = maximum)")
+    parser.add_argument('--output', default='bench_automod.json')
+    args = parser.parse_args()
+
+    try:
+        with open(os.path.join(ROOT, 'version.json'), encoding='utf-8') as f:
+            version = json.load(f).get('version', 'unknown')
+    except Exception:
+        version = 'unknown'
+
+    words = banned_words(args.words)
+    stream = make_stream(args.messages, args.guilds, args.users, words)
+
+    check = bench_check(stream, args.guilds, words)
+    print(f"check      | {check['throughput_msg_s']:>10} msg/s | {check['per_message_us']} µs/message | "
+          f"{check['violations']} infractions")
+    listener = asyncio.run(bench_on_message(stream, args.guilds, words, args.rate))
+    lag = listener['loop_lag_ms']
+    print(f"on_message | {listener['throughput_msg_s']:>10} msg/s | p99 {listener['listener_us']['p99']} µs | "
+          f"retard boucle p50 {lag['p50']} ms p99 {lag['p99']} ms max {lag['max']} ms")
+
+    report = {
+        'benchmark': 'automod',
+        'version': version,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': int(time.time()),
+        'config': vars(args),
+        'check': check,
+        'on_message': listener,
+        'peak_rss_bytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Résultats écrits dans {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,272 @@
+"""Benchmark hors-ligne du cog Economy (aucune connexion Discord).
+
+Instancie le cog avec un faux bot et de fausses Interaction/Member, peuple
+N comptes synthétiques puis exécute un mélange de commandes
+balance/daily/work/pay/gamble/leaderboard/statement.
+
+Usage:
+    python benchmarks/economy_bench.py --users 10000 100000 1000000 --ops 20000
+    python benchmarks/economy_bench.py --users 10000 --output bench_economy.json
+
+Chaque taille tourne dans un processus séparé (RSS pic propre). Le résultat
+JSON contient, par taille: latences p50/p99 par commande, débit global,
+temps de démarrage du cog, temps de construction du classement, RSS pic et
+octets écrits sur disque pendant la charge.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+WORKLOAD = {
+    'balance': 30,
+    'daily': 10,
+    'work': 15,
+    'pay': 15,
+    'gamble': 15,
+    'leaderboard': 10,
+    'statement': 5,
+}
+
+
+# --- faux objets Discord ---
+
+class FakeResponse:
+    def __init__(self):
+        self.done = False
+
+    async def send_message(self, content=None, **kwargs):
+        self.done = True
+
+    async def defer(self, **kwargs):
+        self.done = True
+
+
+class FakeFollowup:
+    async def send(self, content=None, **kwargs):
+        pass
+
+
+class FakeMember:
+    bot = False
+
+    def __init__(self, user_id):
+        self.id = user_id
+        self.name = f"user{user_id}"
+        self.display_name = self.name
+        self.mention = f"<@{user_id}>"
+
+    def __str__(self):
+        return self.name
+
+    def __eq__(self, other):
+        return getattr(other, 'id', None) == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+
+class FakeGuild:
+    def __init__(self, members):
+        self.id = 1
+        self.name = "bench"
+        self.members = members
+
+    def get_member(self, user_id):
+        return None
+
+
+class FakeInteraction:
+    def __init__(self, user, guild):
+        self.user = user
+        self.guild = guild
+        self.response = FakeResponse()
+        self.followup = FakeFollowup()
+
+
+class FakeBot:
+    def __init__(self):
+        from utils.persistence import PersistenceScheduler
+        self.persistence = PersistenceScheduler()
+
+    def get_user(self, user_id):
+        return None
+
+
+# --- mesures ---
+
+def io_counters():
+    """(octets écrits sur le stockage, octets passés à write()) depuis /proc."""
+    try:
+        with open('/proc/self/io') as f:
+            values = dict(line.split(': ') for line in f.read().splitlines())
+        return int(values['write_bytes']), int(values['wchar'])
+    except (OSError, KeyError):
+        return 0, 0
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, round(pct / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def seed(path, users):
+    """Insère `users` comptes (soldes aléatoires) directement dans SQLite."""
+    from utils.economy_store import START_BALANCE, USER_SHARDS
+    conn = sqlite3.connect(path)
+    rng = random.Random(42)
+    rows = ((uid, rng.randint(0, 10 * START_BALANCE), uid % USER_SHARDS) for uid in range(1, users + 1))
+    with conn:
+        conn.executemany("INSERT INTO users (user_id, balance, shard) VALUES (?, ?, ?)", rows)
+    conn.close()
+
+
+async def run_size(users, ops, concurrency):
+    from cogs.economy import Economy
+    from utils.economy_store import EconomyStore
+
+    data_dir = tempfile.mkdtemp(prefix="economy-bench-")
+    os.environ['DATA_DIR'] = data_dir
+    try:
+        # schéma créé par le store lui-même, puis remplissage en masse
+        store = EconomyStore(os.path.join(data_dir, 'economy.db'))
+        await store.open()
+        await store.close()
+        t = time.perf_counter()
+        seed(os.path.join(data_dir, 'economy.db'), users)
+        seed_time = time.perf_counter() - t
+
+        bot = FakeBot()
+        bot.persistence.start()
+        cog = Economy(bot)
+        t = time.perf_counter()
+        await cog.cog_load()
+        load_time = time.perf_counter() - t
+        t = time.perf_counter()
+        await cog._ranking_task
+        ranking_time = time.perf_counter() - t
+
+        rng = random.Random(1)
+        guild = FakeGuild([FakeMember(uid) for uid in rng.sample(range(1, users + 1), min(users, 1000))])
+        names, weights = zip(*WORKLOAD.items())
+        plan = rng.choices(names, weights, k=ops)
+        latencies = {name: [] for name in names}
+
+        async def one(name):
+            member = FakeMember(rng.randint(1, users))
+            interaction = FakeInteraction(member, guild)
+            command = getattr(cog, name)
+            if name == 'pay':
+                args = (FakeMember(rng.randint(1, users)), rng.randint(1, 50))
+            elif name == 'gamble':
+                args = (rng.randint(1, 50),)
+            elif name in ('balance', 'statement'):
+                args = (member,)
+            else:
+                args = ()
+            start = time.perf_counter()
+            await command.callback(cog, interaction, *args)
+            latencies[name].append(time.perf_counter() - start)
+
+        queue = iter(plan)
+
+        async def worker():
+            for name in queue:
+                await one(name)
+
+        write_bytes, wchar = io_counters()
+        t = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        await cog.cog_unload()
+        await bot.persistence.close()
+        elapsed = time.perf_counter() - t
+        write_bytes2, wchar2 = io_counters()
+
+        return {
+            'users': users,
+            'ops': ops,
+            'concurrency': concurrency,
+            'seed_s': round(seed_time, 3),
+            'cog_load_s': round(load_time, 4),
+            'ranking_build_s': round(ranking_time, 3),
+            'elapsed_s': round(elapsed, 3),
+            'throughput_ops_s': round(ops / elapsed, 1),
+            'latency_ms': {
+                name: {
+                    'count': len(values),
+                    'p50': round(percentile(values, 50) * 1000, 3) if values else None,
+                    'p99': round(percentile(values, 99) * 1000, 3) if values else None,
+                }
+                for name, values in latencies.items()
+            },
+            'peak_rss_bytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+            'disk_write_bytes': write_bytes2 - write_bytes,
+            'write_syscall_bytes': wchar2 - wchar,
+            'flushes': bot.persistence.flush_count,
+        }
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def run_size_sync(users, ops, concurrency):
+    return asyncio.run(run_size(users, ops, concurrency))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--ops', type=int, default=20_000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--output', default='bench_economy.json')
+    args = parser.parse_args()
+
+    try:
+        with open(os.path.join(ROOT, 'version.json'), encoding='utf-8') as f:
+            version = json.load(f).get('version', 'unknown')
+    except Exception:
+        version = 'unknown'
+
+    results = []
+    for users in args.users:
+        # un processus neuf par taille pour que le RSS pic soit significatif
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as ex:
+            result = ex.submit(run_size_sync, users, args.ops, args.concurrency).result()
+        results.append(result)
+        lat = result['latency_ms']
+        print(f"{users:>9} comptes | {result['throughput_ops_s']:>8} ops/s | "
+              f"démarrage {result['cog_load_s']}s | classement {result['ranking_build_s']}s | "
+              f"RSS {result['peak_rss_bytes'] / 2**20:.0f} Mo | écrit {result['disk_write_bytes'] / 2**10:.0f} Ko")
+        for name, stats in lat.items():
+            print(f"    {name:<12} p50 {stats['p50']} ms  p99 {stats['p99']} ms  (n={stats['count']})")
+
+    report = {
+        'benchmark': 'economy',
+        'version': version,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': int(time.time()),
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Résultats écrits dans {args.output}")
+
+
+if __name__ == '__main__':
+    main()
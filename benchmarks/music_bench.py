@@ -0,0 +1,179 @@
+"""Benchmark CPU de la lecture musicale: PCM (décodage + volume Python +
+encodage Opus dans le bot) contre Opus direct (copie des paquets par ffmpeg).
+
+Nécessite ffmpeg (avec libopus) dans le PATH et libopus chargeable par
+discord.py. Aucune connexion Discord: chaque flux est lu par un thread qui
+reproduit la boucle de discord.py (lecture d'une trame, encodage si PCM,
+cadence de 20 ms); l'envoi réseau, identique dans les deux modes, n'est pas
+mesuré.
+
+Usage:
+    python benchmarks/music_bench.py --streams 1 5 10 20 --seconds 20
+    python benchmarks/music_bench.py --modes pcm opus opus-volume --output bench_music.json
+    python benchmarks/music_bench.py --modes opus --metrics   # coût de l'instrumentation (/musicstats)
+
+Le résultat JSON contient, par mode et nombre de flux: CPU du processus du
+bot et des processus ffmpeg (% d'un cœur par flux), trames en retard et
+estimation du nombre de flux par cœur.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+import discord  # noqa: E402
+
+from utils.audio_metrics import GuildAudioStats, ffmpeg_pid, process_cpu  # noqa: E402
+
+# mode du benchmark -> (mode de lecture du cog, volume)
+MODES = {
+    'pcm': ('pcm', 0.5),
+    'opus': ('auto', 1.0),
+    'opus-volume': ('auto', 0.5),
+}
+FRAME = 0.02
+
+
+def make_sample(path, seconds):
+    """Fichier WebM/Opus de test (comme les flux audio YouTube)."""
+    subprocess.run(
+        ['ffmpeg', '-loglevel', 'error', '-y', '-f', 'lavfi', '-i', f'sine=frequency=440:duration={seconds}',
+         '-ac', '2', '-ar', '48000', '-c:a', 'libopus', '-b:a', '128k', path],
+        check=True
+    )
+
+
+def play(source, seconds, stats, lock):
+    """Boucle de discord.py AudioPlayer, sans envoi réseau."""
+    encoder = None if source.is_opus() else discord.opus.Encoder()
+    start = time.perf_counter()
+    loops = late = 0
+    while time.perf_counter() - start < seconds:
+        data = source.read()
+        if not data:
+            break
+        if encoder is not None:
+            encoder.encode(data, encoder.SAMPLES_PER_FRAME)
+        loops += 1
+        delay = start + FRAME * loops - time.perf_counter()
+        if delay < 0:
+            late += 1
+        else:
+            time.sleep(delay)
+    with lock:
+        stats['frames'] += loops
+        stats['late'] += late
+
+
+def run(sample, bench_mode, streams, seconds, metrics=False):
+    from cogs.music import make_source
+    from utils.music_queue import Track
+
+    playback, volume = MODES[bench_mode]
+    track = Track("bench", sample, duration=seconds, stream_url=sample, codec='opus', bitrate=128)
+    audio_stats = [GuildAudioStats() if metrics else None for _ in range(streams)]
+    sources = [make_source(track, volume, mode=playback, stats=s) for s in audio_stats]
+    pids = [ffmpeg_pid(s) for s in sources]
+    stats = {'frames': 0, 'late': 0}
+    lock = threading.Lock()
+    threads = [threading.Thread(target=play, args=(s, seconds, stats, lock)) for s in sources]
+
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    children = sum(process_cpu(pid) or 0.0 for pid in pids if pid)
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    cpu = time.process_time() - cpu
+    children = sum(process_cpu(pid) or 0.0 for pid in pids if pid) - children
+    wall = time.perf_counter() - wall
+    for s in sources:
+        s.cleanup()
+
+    bot_pct = cpu / wall / streams * 100
+    ffmpeg_pct = children / wall / streams * 100
+    total = bot_pct + ffmpeg_pct
+    result = {
+        'mode': bench_mode,
+        'metrics': metrics,
+        'streams': streams,
+        'wall_s': round(wall, 2),
+        'bot_cpu_pct_per_stream': round(bot_pct, 2),
+        'ffmpeg_cpu_pct_per_stream': round(ffmpeg_pct, 2),
+        'total_cpu_pct_per_stream': round(total, 2),
+        'streams_per_core': round(100 / total, 1) if total else None,
+        'frames': stats['frames'],
+        'late_frames': stats['late'],
+    }
+    if metrics:
+        result['underruns'] = sum(s.underruns for s in audio_stats)
+        result['jitter_p99_ms'] = max(s.summary()['jitter_p99_ms'] or 0 for s in audio_stats)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--streams', type=int, nargs='+', default=[1, 5, 10, 20])
+    parser.add_argument('--seconds', type=int, default=20)
+    parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+    parser.add_argument('--output', default='bench_music.json')
+    parser.add_argument('--metrics', action='store_true', help="mesures par trame activées (comme dans le cog)")
+    args = parser.parse_args()
+
+    if shutil.which('ffmpeg') is None:
+        sys.exit("ffmpeg introuvable dans le PATH")
+    if not discord.opus.is_loaded():
+        try:
+            discord.opus._load_default()
+        except Exception:
+            pass
+    if 'pcm' in args.modes and not discord.opus.is_loaded():
+        sys.exit("libopus introuvable: le mode pcm a besoin de l'encodeur Opus de discord.py")
+
+    try:
+        with open(os.path.join(ROOT, 'version.json'), encoding='utf-8') as f:
+            version = json.load(f).get('version', 'unknown')
+    except Exception:
+        version = 'unknown'
+
+    results = []
+    workdir = tempfile.mkdtemp(prefix="music-bench-")
+    try:
+        sample = os.path.join(workdir, 'sample.webm')
+        make_sample(sample, args.seconds + 5)
+        for mode in args.modes:
+            for streams in args.streams:
+                result = run(sample, mode, streams, args.seconds, args.metrics)
+                results.append(result)
+                print(f"{mode:<12} {streams:>3} flux | bot {result['bot_cpu_pct_per_stream']:>6}% "
+                      f"ffmpeg {result['ffmpeg_cpu_pct_per_stream']:>6}% par flux | "
+                      f"~{result['streams_per_core']} flux/cœur | {result['late_frames']} trames en retard")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'benchmark': 'music',
+        'version': version,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'timestamp': int(time.time()),
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Résultats écrits dans {args.output}")
+
+
+if __name__ == '__main__':
+    main()
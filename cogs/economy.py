@@ -1,63 +1,177 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import json
 import random
 import asyncio
 import os
-from datetime import datetime, timedelta
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from utils.cooldowns import CooldownEngine
+from utils.economy_store import COOLDOWNS, EconomyStore, TxType, START_BALANCE
+from utils.history_export import export_history
+from utils.ranking import RankIndex
+from utils.transfers import TransferEngine
+
+LEADERBOARD_PAGE_SIZE = 10
+STATEMENT_PAGE_SIZE = 10
+# exports simultanés (CPU de compression + disque temporaire)
+EXPORT_CONCURRENCY = 2
+
+REMINDER_MESSAGES = {
+    TxType.DAILY: "🎁 Votre récompense quotidienne est disponible! Utilisez `/daily`.",
+    TxType.WORK: "💼 Vous pouvez retravailler! Utilisez `/work`.",
+}
+
+
+class StatementView(discord.ui.View):
+    """Pages de /statement lues à la demande; curseur = numéro de transaction."""
+
+    def __init__(self, store, member, total):
+        super().__init__(timeout=300)
+        self.store = store
+        self.member = member
+        self.total = total
+        self.cursors = [None]  # curseur `before` de chaque page déjà visitée
+        self.page = 0
+        self.rows = []
+
+    async def load(self):
+        # une ligne de plus pour savoir s'il existe une page suivante
+        rows = await self.store.transactions(self.member.id, STATEMENT_PAGE_SIZE + 1, self.cursors[self.page])
+        self.rows = rows[:STATEMENT_PAGE_SIZE]
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = len(rows) <= STATEMENT_PAGE_SIZE
+
+    def embed(self):
+        desc_lines = []
+        for t in self.rows:
+            ts = datetime.fromtimestamp(t['time'], timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+            amt = t['amount']
+            desc_lines.append(f"[{ts}] {t['type']} {amt:+} — {t.get('note','')}")
+        embed = discord.Embed(title=f"📄 Historique de {self.member}", description="\n".join(desc_lines), color=0x00ff00)
+        pages = max(1, -(-self.total // STATEMENT_PAGE_SIZE))
+        embed.set_footer(text=f"Page {self.page + 1}/{pages} • {self.total} transactions")
+        return embed
+
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page -= 1
+        await self.load()
+        await interaction.response.edit_message(embed=self.embed(), view=self)
+
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if self.page + 1 == len(self.cursors):
+            self.cursors.append(self.rows[-1]['seq'])
+        self.page += 1
+        await self.load()
+        await interaction.response.edit_message(embed=self.embed(), view=self)
+
 
 class Economy(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         # place data files in a dedicated data/ folder inside the project
-        data_dir = os.path.join(os.path.dirname(__file__), '..', 'data')
+        # DATA_DIR permet de pointer ailleurs (benchmarks, plusieurs instances)
+        data_dir = os.getenv('DATA_DIR') or os.path.join(os.path.dirname(__file__), '..', 'data')
         os.makedirs(data_dir, exist_ok=True)
-        self.data_file = os.path.join(data_dir, 'economy_data.json')
-        self.data = self.load_data()
-
-    def load_data(self):
-        if os.path.exists(self.data_file):
-            try:
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, Exception):
-                # If file is corrupted or unreadable, start fresh but keep file path
-                return {}
-        return {}
-
-    def save_data(self):
-        # ensure directory exists
-        os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
-        with open(self.data_file, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, indent=4, ensure_ascii=False)
-
-    def get_user_data(self, user_id):
-        if str(user_id) not in self.data:
-            self.data[str(user_id)] = {
-                'balance': 100,
-                'last_daily': None,
-                'last_work': None,
-                'transactions': []  # historique simple
-            }
-        # ensure transactions key exists for older files
-        if 'transactions' not in self.data[str(user_id)]:
-            self.data[str(user_id)]['transactions'] = []
-        return self.data[str(user_id)]
-
-    def _add_transaction(self, user_id, ttype, amount, note=None):
-        uid = str(user_id)
-        user = self.get_user_data(user_id)
-        user['transactions'].append({
-            'time': datetime.utcnow().isoformat(),
-            'type': ttype,
-            'amount': amount,
-            'note': note or ""
-        })
-        # keep history reasonable length
-        if len(user['transactions']) > 200:
-            user['transactions'] = user['transactions'][-200:]
-        self.save_data()
+        self.data_file = os.path.join(data_dir, 'economy.db')
+        # les anciens fichiers JSON sont importés à la création de la base
+        self.store = EconomyStore(
+            self.data_file,
+            legacy_json=os.path.join(data_dir, 'economy_data.json'),
+            legacy_journal=os.path.join(data_dir, 'economy_journal.jsonl'),
+            on_write=lambda: self.bot.persistence.mark_dirty("economy"),
+            # plafond mémoire du cache de comptes (shards LRU)
+            cache_users=int(os.getenv("ECONOMY_CACHE_USERS", "50000"))
+        )
+        # classement en mémoire, tenu à jour par chaque changement de solde;
+        # construit en arrière-plan pour que le démarrage ne dépende pas du
+        # nombre de comptes (None tant qu'il n'est pas prêt)
+        self.ranking = None
+        self._pending_ranks = {}
+        self._ranking_task = None
+        # verrous par compte + transferts atomiques / en lot
+        self.transfers = TransferEngine(self.store, on_balance=self._on_balance)
+        # cooldowns actifs en mémoire (epoch) + rappels via une seule roue temporelle
+        self.cooldowns = CooldownEngine(COOLDOWNS, on_ready=self._on_cooldown_ready)
+        self._export_slots = asyncio.Semaphore(EXPORT_CONCURRENCY)
+        # DM de rappel en cours: la boucle ne garde qu'une référence faible aux tâches
+        self._reminder_tasks = set()
+
+    async def cog_load(self):
+        await self.store.open()
+        # COMMIT SQLite regroupés par le scheduler du bot
+        self.bot.persistence.register("economy", self.store.commit)
+        self.cooldowns.load(await self.store.active_cooldowns(), await self.store.reminders())
+        self.cooldowns.start()
+        self._ranking_task = asyncio.create_task(self._build_ranking())
+
+    async def cog_unload(self):
+        self.cooldowns.stop()
+        if self._ranking_task:
+            self._ranking_task.cancel()
+        for task in self._reminder_tasks:
+            task.cancel()
+        await self.bot.persistence.unregister("economy")
+        await self.store.close()
+
+    async def _build_ranking(self):
+        items = []
+        try:
+            async for rows in self.store.iter_balances():
+                items.extend(rows)
+            ranking = RankIndex()
+            # le tri initial se fait hors de la boucle
+            await asyncio.to_thread(ranking.build, items)
+        except Exception as e:
+            print(f"Economy ranking build failed: {e}")
+            return
+        # soldes modifiés pendant la construction (valeurs absolues, la dernière gagne)
+        for user_id, balance in self._pending_ranks.items():
+            ranking.update(user_id, balance)
+        self._pending_ranks.clear()
+        self.ranking = ranking
+
+    def _on_balance(self, user_id, balance):
+        if self.ranking is None:
+            self._pending_ranks[user_id] = balance
+        else:
+            self.ranking.update(user_id, balance)
+
+    async def get_user_data(self, user_id):
+        return await self.store.get_user(user_id)
+
+    async def _apply(self, user_id, delta, ttype, note=None, **kwargs):
+        """store.apply + mise à jour du classement (appelant: sous self.transfers.locks)."""
+        balance = await self.store.apply(user_id, delta, ttype, note, **kwargs)
+        if balance is not None:
+            self._on_balance(user_id, balance)
+        return balance
+
+    async def _set_balance(self, user_id, amount, ttype, note=None):
+        old = await self.store.set_balance(user_id, amount, ttype, note)
+        self._on_balance(user_id, amount)
+        return old
+
+    def _on_cooldown_ready(self, kind, user_id):
+        task = asyncio.create_task(self._send_reminder(kind, user_id))
+        self._reminder_tasks.add(task)
+        task.add_done_callback(self._reminder_tasks.discard)
+
+    async def _send_reminder(self, kind, user_id):
+        try:
+            user = self.bot.get_user(user_id) or await self.bot.fetch_user(user_id)
+            await user.send(REMINDER_MESSAGES[kind])
+        except discord.HTTPException:
+            # DM fermés ou utilisateur introuvable: pas de rappel
+            pass
+
+    def _display_name(self, user_id):
+        user = self.bot.get_user(int(user_id))
+        return user.name if user else f"Utilisateur {user_id}"
 
     @app_commands.command(name="balance", description="Afficher le solde d'un utilisateur")
     @app_commands.describe(member="L'utilisateur dont vous voulez voir le solde")
@@ -66,7 +180,7 @@ class Economy(commands.Cog):
         if not member:
             member = interaction.user
         
-        user_data = self.get_user_data(member.id)
+        user_data = await self.get_user_data(member.id)
         embed = discord.Embed(title=f"💰 Solde de {member}", color=0xffd700)
         embed.add_field(name="Balance", value=f"{user_data['balance']} 💰")
         await interaction.response.send_message(embed=embed)
@@ -74,40 +188,30 @@ class Economy(commands.Cog):
     @app_commands.command(name="daily", description="Récupérer sa récompense quotidienne")
     async def daily(self, interaction: discord.Interaction):
         """Récupérer sa récompense quotidienne"""
-        user_data = self.get_user_data(interaction.user.id)
-        now = datetime.now()
-        
-        if user_data['last_daily']:
-            last_daily = datetime.fromisoformat(user_data['last_daily'])
-            if now - last_daily < timedelta(hours=24):
-                next_daily = last_daily + timedelta(hours=24)
-                await interaction.response.send_message(f"❌ Vous avez déjà récupéré votre récompense quotidienne! Prochaine récompense: {next_daily.strftime('%H:%M')}", ephemeral=True)
+        # lecture du cooldown + crédit sous le verrou du compte
+        async with self.transfers.locks.hold(interaction.user.id):
+            next_daily = self.cooldowns.expires(TxType.DAILY, interaction.user.id)
+            if next_daily is not None:
+                # <t:...> est affiché dans le fuseau de chaque utilisateur
+                await interaction.response.send_message(f"❌ Vous avez déjà récupéré votre récompense quotidienne! Prochaine récompense: <t:{next_daily}:t> (<t:{next_daily}:R>)", ephemeral=True)
                 return
-        
-        reward = random.randint(50, 150)
-        user_data['balance'] += reward
-        user_data['last_daily'] = now.isoformat()
-        self._add_transaction(interaction.user.id, "daily", reward, "Récompense quotidienne")
-        self.save_data()
+
+            reward = random.randint(50, 150)
+            now = int(time.time())
+            balance = await self._apply(
+                interaction.user.id, reward, TxType.DAILY, "Récompense quotidienne",
+                cooldown=(TxType.DAILY, now + COOLDOWNS[TxType.DAILY])
+            )
+            self.cooldowns.trigger(TxType.DAILY, interaction.user.id, now)
         
         embed = discord.Embed(title="🎁 Récompense quotidienne!", color=0xffd700)
         embed.add_field(name="Montant reçu", value=f"{reward} 💰")
-        embed.add_field(name="Nouveau solde", value=f"{user_data['balance']} 💰")
+        embed.add_field(name="Nouveau solde", value=f"{balance} 💰")
         await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name="work", description="Travailler pour gagner de l'argent")
     async def work(self, interaction: discord.Interaction):
         """Travailler pour gagner de l'argent"""
-        user_data = self.get_user_data(interaction.user.id)
-        now = datetime.now()
-        
-        if user_data['last_work']:
-            last_work = datetime.fromisoformat(user_data['last_work'])
-            if now - last_work < timedelta(hours=1):
-                next_work = last_work + timedelta(hours=1)
-                await interaction.response.send_message(f"❌ Vous devez attendre avant de retravailler! Prochain travail: {next_work.strftime('%H:%M')}", ephemeral=True)
-                return
-        
         jobs = [
             "développeur",
             "cuisinier",
@@ -121,17 +225,42 @@ class Economy(commands.Cog):
         
         job = random.choice(jobs)
         salary = random.randint(20, 80)
-        user_data['balance'] += salary
-        user_data['last_work'] = now.isoformat()
-        self._add_transaction(interaction.user.id, "work", salary, f"Travail en tant que {job}")
-        self.save_data()
+        # lecture du cooldown + crédit sous le verrou du compte
+        async with self.transfers.locks.hold(interaction.user.id):
+            next_work = self.cooldowns.expires(TxType.WORK, interaction.user.id)
+            if next_work is not None:
+                await interaction.response.send_message(f"❌ Vous devez attendre avant de retravailler! Prochain travail: <t:{next_work}:t> (<t:{next_work}:R>)", ephemeral=True)
+                return
+
+            now = int(time.time())
+            balance = await self._apply(
+                interaction.user.id, salary, TxType.WORK, f"Travail en tant que {job}",
+                cooldown=(TxType.WORK, now + COOLDOWNS[TxType.WORK])
+            )
+            self.cooldowns.trigger(TxType.WORK, interaction.user.id, now)
         
         embed = discord.Embed(title="💼 Travail", color=0x00ff00)
         embed.add_field(name="Métier", value=job.title(), inline=True)
         embed.add_field(name="Salaire", value=f"{salary} 💰", inline=True)
-        embed.add_field(name="Nouveau solde", value=f"{user_data['balance']} 💰", inline=True)
+        embed.add_field(name="Nouveau solde", value=f"{balance} 💰", inline=True)
         await interaction.response.send_message(embed=embed)
 
+    @app_commands.command(name="remind", description="Recevoir un message privé quand une commande est de nouveau disponible")
+    @app_commands.describe(command="La commande concernée", enabled="Activer ou désactiver le rappel")
+    @app_commands.choices(command=[
+        app_commands.Choice(name="daily", value=int(TxType.DAILY)),
+        app_commands.Choice(name="work", value=int(TxType.WORK)),
+    ])
+    async def remind(self, interaction: discord.Interaction, command: app_commands.Choice[int], enabled: bool = True):
+        """Activer/désactiver le rappel en message privé pour /daily ou /work"""
+        kind = TxType(command.value)
+        await self.store.set_reminder(kind, interaction.user.id, enabled)
+        self.cooldowns.set_reminder(kind, interaction.user.id, enabled)
+        if enabled:
+            await interaction.response.send_message(f"🔔 Vous recevrez un message privé quand `/{command.name}` sera disponible.", ephemeral=True)
+        else:
+            await interaction.response.send_message(f"🔕 Rappel `/{command.name}` désactivé.", ephemeral=True)
+
     @app_commands.command(name="pay", description="Envoyer de l'argent à un autre utilisateur")
     @app_commands.describe(member="L'utilisateur à qui envoyer de l'argent", amount="Le montant à envoyer")
     async def pay(self, interaction: discord.Interaction, member: discord.Member, amount: app_commands.Range[int, 1, 10000]):
@@ -140,22 +269,15 @@ class Economy(commands.Cog):
             await interaction.response.send_message("❌ Le montant doit être positif!", ephemeral=True)
             return
         
-        sender_data = self.get_user_data(interaction.user.id)
-        receiver_data = self.get_user_data(member.id)
-        
-        if sender_data['balance'] < amount:
-            await interaction.response.send_message("❌ Solde insuffisant!", ephemeral=True)
-            return
-        
         if member == interaction.user:
             await interaction.response.send_message("❌ Vous ne pouvez pas vous envoyer de l'argent à vous-même!", ephemeral=True)
             return
         
-        sender_data['balance'] -= amount
-        receiver_data['balance'] += amount
-        self._add_transaction(interaction.user.id, "pay_sent", -amount, f"À {member.id}")
-        self._add_transaction(member.id, "pay_received", amount, f"De {interaction.user.id}")
-        self.save_data()
+        # débit conditionnel + crédit dans une seule transaction SQL
+        balances = await self.transfers.transfer(interaction.user.id, member.id, amount, f"À {member.id}", f"De {interaction.user.id}")
+        if balances is None:
+            await interaction.response.send_message("❌ Solde insuffisant!", ephemeral=True)
+            return
         
         embed = discord.Embed(title="💸 Transfert d'argent", color=0x00ff00)
         embed.add_field(name="De", value=interaction.user.mention, inline=True)
@@ -164,71 +286,106 @@ class Economy(commands.Cog):
         await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name="leaderboard", description="Afficher le classement des richesses")
-    async def leaderboard(self, interaction: discord.Interaction):
+    @app_commands.describe(page="Numéro de page", server_only="Limiter le classement aux membres de ce serveur")
+    async def leaderboard(self, interaction: discord.Interaction, page: app_commands.Range[int, 1, 10000] = 1, server_only: bool = False):
         """Afficher le classement des richesses"""
-        sorted_users = sorted(
-            self.data.items(),
-            key=lambda x: x[1]['balance'],
-            reverse=True
-        )[:10]
-        
-        embed = discord.Embed(title="🏆 Classement des richesses", color=0xffd700)
+        offset = (page - 1) * LEADERBOARD_PAGE_SIZE
+        if self.ranking is None:
+            if server_only:
+                await interaction.response.send_message("⏳ Classement en cours de construction, réessayez dans un instant.", ephemeral=True)
+                return
+            # index pas encore prêt: ORDER BY balance DESC sur l'index SQLite
+            total = None
+            sorted_users = await self.store.top(LEADERBOARD_PAGE_SIZE, offset)
+            title = "🏆 Classement des richesses"
+        elif server_only and interaction.guild:
+            member_ids = {m.id for m in interaction.guild.members}
+            total = self.ranking.subset_count(member_ids)
+            sorted_users = self.ranking.subset_page(member_ids, offset, LEADERBOARD_PAGE_SIZE)
+            title = f"🏆 Classement des richesses — {interaction.guild.name}"
+        else:
+            total = len(self.ranking)
+            sorted_users = self.ranking.page(offset, LEADERBOARD_PAGE_SIZE)
+            title = "🏆 Classement des richesses"
+
+        if not sorted_users:
+            await interaction.response.send_message("❌ Page vide.", ephemeral=True)
+            return
+
+        embed = discord.Embed(title=title, color=0xffd700)
         
-        for i, (user_id, data) in enumerate(sorted_users, 1):
-            user = self.bot.get_user(int(user_id))
-            username = user.name if user else f"Utilisateur {user_id}"
+        for i, (user_id, balance) in enumerate(sorted_users, offset + 1):
             embed.add_field(
-                name=f"{i}. {username}",
-                value=f"{data['balance']} 💰",
+                name=f"{i}. {self._display_name(user_id)}",
+                value=f"{balance} 💰",
                 inline=False
             )
+        if total is not None:
+            pages = max(1, -(-total // LEADERBOARD_PAGE_SIZE))
+            embed.set_footer(text=f"Page {page}/{pages} • {total} comptes")
+        else:
+            embed.set_footer(text=f"Page {page}")
         
         await interaction.response.send_message(embed=embed)
 
+    @app_commands.command(name="rank", description="Afficher la position d'un utilisateur dans le classement")
+    @app_commands.describe(member="L'utilisateur dont vous voulez voir le rang")
+    async def rank(self, interaction: discord.Interaction, member: discord.Member = None):
+        """Afficher la position d'un utilisateur dans le classement"""
+        if not member:
+            member = interaction.user
+
+        if self.ranking is None:
+            await interaction.response.send_message("⏳ Classement en cours de construction, réessayez dans un instant.", ephemeral=True)
+            return
+
+        global_rank = self.ranking.rank(member.id)
+        if global_rank is None:
+            await interaction.response.send_message(f"❌ {member.mention} n'a pas encore de compte.", ephemeral=True)
+            return
+
+        embed = discord.Embed(title=f"🏅 Rang de {member}", color=0xffd700)
+        embed.add_field(name="Solde", value=f"{self.ranking.balance(member.id)} 💰", inline=True)
+        embed.add_field(name="Global", value=f"#{global_rank} / {len(self.ranking)}", inline=True)
+        if interaction.guild:
+            member_ids = {m.id for m in interaction.guild.members}
+            guild_rank = self.ranking.subset_rank(member.id, member_ids)
+            if guild_rank is not None:
+                embed.add_field(name="Serveur", value=f"#{guild_rank} / {self.ranking.subset_count(member_ids)}", inline=True)
+        await interaction.response.send_message(embed=embed)
+
     @app_commands.command(name="gamble", description="Parier une somme pour tenter de gagner")
     @app_commands.describe(amount="Montant à parier (1-10000)")
     async def gamble(self, interaction: discord.Interaction, amount: app_commands.Range[int, 1, 10000]):
         """Parier une somme: possibilité de doubler ou de tout perdre"""
-        user_data = self.get_user_data(interaction.user.id)
-        if amount > user_data['balance']:
-            await interaction.response.send_message("❌ Solde insuffisant!", ephemeral=True)
-            return
-
-        # retirer la mise initiale
-        user_data['balance'] -= amount
-
         # Probabilités: 10% jackpot x5, 45% double (x2), reste perte
         roll = random.random()
         if roll < 0.10:
             # Jackpot x5 (le joueur récupère 5x sa mise)
             payout = amount * 5
-            user_data['balance'] += payout
             net = payout - amount
+            ttype, note = TxType.GAMBLE_JACKPOT, "Jackpot x5"
             result_text = f"🎉 JACKPOT! Vous gagnez {payout} 💰 (net +{net} 💰)"
         elif roll < 0.55:
             # Double
             payout = amount * 2
-            user_data['balance'] += payout
             net = payout - amount
+            ttype, note = TxType.GAMBLE_WIN, "Double x2"
             result_text = f"✅ Vous doublez votre mise et gagnez {payout} 💰 (net +{net} 💰)"
         else:
-            # Perte (la mise est déjà retirée)
+            # Perte de la mise
+            net = -amount
+            ttype, note = TxType.GAMBLE_LOSS, "Gamble perte"
             result_text = f"💥 Vous perdez votre mise de {amount} 💰"
 
-        # après calcul final des gains/pertes, enregistrer
-        if "Perte" in result_text or roll >= 0.55:
-            self._add_transaction(interaction.user.id, "gamble_loss", -amount, "Gamble perte")
-        else:
-            # net = (payout - amount) déjà calculé dans result_text; enregistrer net gain
-            net_change = user_data['balance'] - (user_data['balance'] - (payout if 'payout' in locals() else 0))
-            # simpler: store total effect
-            if roll < 0.10:
-                self._add_transaction(interaction.user.id, "gamble_jackpot", payout - amount, "Jackpot x5")
-            else:
-                self._add_transaction(interaction.user.id, "gamble_win", payout - amount, "Double x2")
-        self.save_data()
+        # mise vérifiée et effet net enregistré atomiquement
+        async with self.transfers.locks.hold(interaction.user.id):
+            balance = await self._apply(interaction.user.id, net, ttype, note, require_balance=amount)
+        if balance is None:
+            await interaction.response.send_message("❌ Solde insuffisant!", ephemeral=True)
+            return
         embed = discord.Embed(title="🎲 Gamble", description=result_text, color=0x00ff00)
-        embed.add_field(name="Nouveau solde", value=f"{user_data['balance']} 💰")
+        embed.add_field(name="Nouveau solde", value=f"{balance} 💰")
         await interaction.response.send_message(embed=embed)
 
     # --- nouveaux admin commands ---
@@ -237,50 +394,113 @@ class Economy(commands.Cog):
     @app_commands.default_permissions(administrator=True)
     async def give(self, interaction: discord.Interaction, member: discord.Member, amount: app_commands.Range[int, 1, 100000]):
         """Donner de l'argent à un utilisateur (admin)"""
-        user_data = self.get_user_data(member.id)
-        user_data['balance'] += amount
-        self._add_transaction(member.id, "admin_give", amount, f"Par {interaction.user.id}")
-        self.save_data()
+        async with self.transfers.locks.hold(member.id):
+            await self._apply(member.id, amount, TxType.ADMIN_GIVE, f"Par {interaction.user.id}")
         await interaction.response.send_message(f"✅ {amount} 💰 ajoutés à {member.mention}")
 
     @app_commands.command(name="setbalance", description="Définir le solde d'un utilisateur (admin)")
     @app_commands.default_permissions(administrator=True)
     async def setbalance(self, interaction: discord.Interaction, member: discord.Member, amount: app_commands.Range[int, 0, 10_000_000]):
         """Définir le solde exact d'un utilisateur (admin)"""
-        user_data = self.get_user_data(member.id)
-        old = user_data['balance']
-        user_data['balance'] = amount
-        self._add_transaction(member.id, "admin_set", amount - old, f"Set by {interaction.user.id}")
-        self.save_data()
+        async with self.transfers.locks.hold(member.id):
+            old = await self._set_balance(member.id, amount, TxType.ADMIN_SET, f"Set by {interaction.user.id}")
         await interaction.response.send_message(f"✅ Solde de {member.mention} réglé sur {amount} 💰 (ancien: {old})")
 
     @app_commands.command(name="resetbalance", description="Remettre le solde à la valeur initiale (admin)")
     @app_commands.default_permissions(administrator=True)
     async def resetbalance(self, interaction: discord.Interaction, member: discord.Member):
-        user_data = self.get_user_data(member.id)
-        old = user_data['balance']
-        user_data['balance'] = 100
-        self._add_transaction(member.id, "admin_reset", 100 - old, f"Reset by {interaction.user.id}")
-        self.save_data()
-        await interaction.response.send_message(f"✅ Solde de {member.mention} remis à 100 💰")
+        async with self.transfers.locks.hold(member.id):
+            await self._set_balance(member.id, START_BALANCE, TxType.ADMIN_RESET, f"Reset by {interaction.user.id}")
+        await interaction.response.send_message(f"✅ Solde de {member.mention} remis à {START_BALANCE} 💰")
+
+    @app_commands.command(name="payall", description="Envoyer la même somme à chaque membre d'un rôle")
+    @app_commands.describe(role="Le rôle dont les membres recevront l'argent", amount="Montant par membre")
+    async def payall(self, interaction: discord.Interaction, role: discord.Role, amount: app_commands.Range[int, 1, 10000]):
+        """Envoyer la même somme à chaque membre d'un rôle (tout ou rien)"""
+        receivers = [m.id for m in role.members if not m.bot and m.id != interaction.user.id]
+        if not receivers:
+            await interaction.response.send_message("❌ Aucun membre à payer dans ce rôle.", ephemeral=True)
+            return
+        await interaction.response.defer()
+        balances = await self.transfers.transfer_many(
+            interaction.user.id, receivers, amount, f"Rôle {role.id}", f"De {interaction.user.id}"
+        )
+        if balances is None:
+            await interaction.followup.send(f"❌ Solde insuffisant! Il faut {amount * len(receivers)} 💰.", ephemeral=True)
+            return
+        embed = discord.Embed(title="💸 Paiement groupé", color=0x00ff00)
+        embed.add_field(name="Rôle", value=role.mention, inline=True)
+        embed.add_field(name="Membres payés", value=len(receivers), inline=True)
+        embed.add_field(name="Total", value=f"{amount * len(receivers)} 💰", inline=True)
+        embed.add_field(name="Nouveau solde", value=f"{balances[interaction.user.id]} 💰", inline=True)
+        await interaction.followup.send(embed=embed)
+
+    @app_commands.command(name="giverole", description="Donner de l'argent à tous les membres d'un rôle (admin)")
+    @app_commands.default_permissions(administrator=True)
+    async def giverole(self, interaction: discord.Interaction, role: discord.Role, amount: app_commands.Range[int, 1, 100000]):
+        """Donner de l'argent à tous les membres d'un rôle (admin)"""
+        receivers = [m.id for m in role.members if not m.bot]
+        if not receivers:
+            await interaction.response.send_message("❌ Aucun membre dans ce rôle.", ephemeral=True)
+            return
+        await interaction.response.defer()
+        # une seule transaction SQL et un seul flush, quel que soit le nombre de membres
+        await self.transfers.credit_many(receivers, amount, TxType.ADMIN_GIVE, f"Par {interaction.user.id}")
+        await interaction.followup.send(f"✅ {amount} 💰 ajoutés à {len(receivers)} membres de {role.mention}")
 
     @app_commands.command(name="statement", description="Afficher les dernières transactions d'un utilisateur")
     @app_commands.describe(member="Optionnel: le membre à consulter")
     async def statement(self, interaction: discord.Interaction, member: discord.Member = None):
         if not member:
             member = interaction.user
-        user_data = self.get_user_data(member.id)
-        tx = user_data.get('transactions', [])[-10:]
-        if not tx:
+        total = await self.store.transaction_count(member.id)
+        if not total:
             await interaction.response.send_message("📄 Aucune transaction récente.", ephemeral=True)
             return
-        desc_lines = []
-        for t in reversed(tx):
-            ts = t['time'].replace('T', ' ')[:19]
-            amt = t['amount']
-            desc_lines.append(f"[{ts}] {t['type']} {amt:+} — {t.get('note','')}")
-        embed = discord.Embed(title=f"📄 Historique de {member}", description="\n".join(desc_lines), color=0x00ff00)
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        # plage de clé primaire (user_id, seq), plus récentes d'abord
+        view = StatementView(self.store, member, total)
+        await view.load()
+        await interaction.response.send_message(embed=view.embed(), view=view, ephemeral=True)
+
+    @app_commands.command(name="export", description="Exporter l'historique des transactions (CSV ou JSONL)")
+    @app_commands.describe(
+        format="Format du fichier",
+        member="Optionnel: le membre à exporter",
+        server="Exporter l'historique de tous les membres du serveur (admin)"
+    )
+    @app_commands.choices(format=[
+        app_commands.Choice(name="CSV", value="csv"),
+        app_commands.Choice(name="JSONL", value="jsonl"),
+    ])
+    async def export(self, interaction: discord.Interaction, format: app_commands.Choice[str], member: discord.Member = None, server: bool = False):
+        """Exporter l'historique complet d'un membre ou du serveur en pièces jointes .gz"""
+        if server:
+            if not interaction.guild or not interaction.user.guild_permissions.administrator:
+                await interaction.response.send_message("❌ L'export du serveur est réservé aux administrateurs.", ephemeral=True)
+                return
+            user_ids = [m.id for m in interaction.guild.members if not m.bot]
+            basename = f"transactions-{interaction.guild.id}"
+        else:
+            member = member or interaction.user
+            user_ids = [member.id]
+            basename = f"transactions-{member.id}"
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        # limite de pièce jointe du serveur (8 Mo en message privé)
+        max_bytes = interaction.guild.filesize_limit if interaction.guild else 8 * 1024 * 1024
+        async with self._export_slots:
+            with tempfile.TemporaryDirectory(prefix="economy-export-") as directory:
+                # paquets SQL -> formatage -> gzip sur disque, un paquet en mémoire à la fois
+                paths, rows = await export_history(
+                    self.store.iter_transactions(user_ids), directory, basename, format.value, max_bytes
+                )
+                if not paths:
+                    await interaction.followup.send("📄 Aucune transaction à exporter.", ephemeral=True)
+                    return
+                for i in range(0, len(paths), 10):
+                    files = [discord.File(path) for path in paths[i:i + 10]]
+                    content = f"📦 {rows} transactions exportées ({len(paths)} fichier(s))." if i == 0 else None
+                    await interaction.followup.send(content=content, files=files, ephemeral=True)
 
 async def setup(bot):
     await bot.add_cog(Economy(bot))
\ No newline at end of file
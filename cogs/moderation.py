@@ -2,36 +2,252 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import asyncio
-import json
 import os
+import re
+import time
+from datetime import datetime, timedelta, timezone
+
+from utils.automod import ACTIONS, RULES, Automod
+from utils.massban import MassBan, parse_ids, select_targets
+from utils.moderation_store import ModerationStore
+from utils.provisioning import OverwriteProvisioner, muted_overwrite
+from utils.purge import PurgeFilter, PurgeJob
+from utils.timing_wheel import TimingWheel
+
+SANCTION_PAGE_SIZE = 10
+SANCTION_LABELS = {'ban': "🔨 Bannissement", 'mute': "🔇 Muet"}
+# levées de sanctions simultanées (ex: rattrapage au démarrage)
+LIFT_CONCURRENCY = 5
+# nouvel essai après une erreur transitoire de l'API
+LIFT_RETRY_DELAY = 60
+# overwrites du rôle Muted appliqués en parallèle (requêtes en vol)
+PROVISION_CONCURRENCY = 8
+# intervalle minimal entre deux messages de progression (secondes)
+PROGRESS_INTERVAL = 2
+WARNINGS_PAGE_SIZE = 10
+# messages parcourus au maximum par une purge filtrée
+PURGE_SCAN_LIMIT = 50_000
+# seuls les avertissements des N derniers jours comptent pour les sanctions automatiques
+WARN_DECAY_DAYS = int(os.getenv("WARN_DECAY_DAYS", "30"))
+# (avertissements actifs, sanction, durée en minutes): le seuil le plus haut atteint s'applique
+WARN_THRESHOLDS = [
+    (3, 'kick', None),
+    (2, 'mute', 60),
+]
+# durée du muet appliqué par l'automod (minutes)
+AUTOMOD_MUTE_MINUTES = 10
+# bannissements individuels simultanés d'un /massban (requêtes en vol)
+MASSBAN_CONCURRENCY = 5
+# comptes listés dans l'aperçu de confirmation
+MASSBAN_PREVIEW = 15
+AUTOMOD_ACTION_LABELS = {
+    'delete': "suppression seule",
+    'warn': "avertissement",
+    'mute': f"muet {AUTOMOD_MUTE_MINUTES} minutes",
+    'kick': "expulsion",
+}
+
+class PurgeView(discord.ui.View):
+    """Bouton d'annulation d'une purge, réservé à son auteur."""
+
+    def __init__(self, job, author_id):
+        super().__init__(timeout=None)
+        self.job = job
+        self.author_id = author_id
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        return interaction.user.id == self.author_id
+
+    @discord.ui.button(label="Annuler", style=discord.ButtonStyle.danger)
+    async def cancel(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.job.cancel()
+        button.disabled = True
+        await interaction.response.edit_message(content="⏹️ Annulation en cours...", view=self)
+
+
+class ConfirmView(discord.ui.View):
+    """Confirmer / Annuler, réservé à l'auteur; `confirmed` reste None à l'expiration."""
+
+    def __init__(self, author_id, timeout=120):
+        super().__init__(timeout=timeout)
+        self.author_id = author_id
+        self.confirmed = None
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        return interaction.user.id == self.author_id
+
+    async def _choose(self, interaction, confirmed):
+        self.confirmed = confirmed
+        await interaction.response.defer()
+        self.stop()
+
+    @discord.ui.button(label="Confirmer", style=discord.ButtonStyle.danger)
+    async def confirm(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._choose(interaction, True)
+
+    @discord.ui.button(label="Annuler", style=discord.ButtonStyle.secondary)
+    async def cancel(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._choose(interaction, False)
+
 
 class Moderation(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        data_dir = os.path.join(os.path.dirname(__file__), '..', 'data')
+        # DATA_DIR permet de pointer ailleurs (benchmarks, plusieurs instances)
+        data_dir = os.getenv('DATA_DIR') or os.path.join(os.path.dirname(__file__), '..', 'data')
         os.makedirs(data_dir, exist_ok=True)
-        self.warns_file = os.path.join(data_dir, "warnings.json")
-        self.warnings = self.load_warnings()
+        # avertissements et sanctions temporaires en SQLite (warnings.json importé
+        # à la première ouverture); échéances des sanctions dans une seule roue
+        self.store = ModerationStore(
+            os.path.join(data_dir, "moderation.db"),
+            legacy_warnings=os.path.join(data_dir, "warnings.json")
+        )
+        self.sanctions = TimingWheel()
+        self._sanctions_task = None
+        self._lift_slots = asyncio.Semaphore(LIFT_CONCURRENCY)
+        # levées en cours: la boucle ne garde qu'une référence faible aux tâches
+        self._lift_tasks = set()
+        self.provisioner = OverwriteProvisioner(PROVISION_CONCURRENCY)
+        self._provisioning = {}  # guild_id -> tâche de création du rôle Muted
+        self._purges = {}  # channel_id -> PurgeJob en cours
+        self.automod = Automod()
+        self._massbans = set()  # guild_id avec un /massban en cours
+        self._raid_mode = {}  # guild_id -> (fin en epoch, âge minimal du compte en jours)
+
+    async def cog_load(self):
+        await self.store.open()
+        for guild_id, enabled, action, words in await self.store.automod_configs():
+            self.automod.configure(guild_id, enabled, action, words)
+        self._sanctions_task = asyncio.create_task(self._start_sanctions())
+
+    async def cog_unload(self):
+        for job in self._purges.values():
+            job.cancel()
+        self.sanctions.stop()
+        if self._sanctions_task:
+            self._sanctions_task.cancel()
+        # une levée interrompue reste en base et sera reprogrammée au prochain chargement
+        for task in self._lift_tasks:
+            task.cancel()
+        await self.store.close()
+
+    async def _start_sanctions(self):
+        # les guilds doivent être en cache pour lever les sanctions
+        await self.bot.wait_until_ready()
+        for sanction_id, expires in await self.store.sanction_schedule():
+            # échéances passées pendant l'arrêt: levées au premier tick
+            self.sanctions.schedule(sanction_id, expires)
+        self.sanctions.start(self._on_sanction_due)
+
+    async def _schedule_sanction(self, guild_id, user_id, kind, minutes, moderator_id, reason):
+        expires = int(time.time()) + minutes * 60
+        sanction_id, replaced = await self.store.add_sanction(guild_id, user_id, kind, expires, moderator_id, reason)
+        if replaced is not None:
+            self.sanctions.cancel(replaced)
+        self.sanctions.schedule(sanction_id, expires)
+        return sanction_id
+
+    async def _drop_sanction(self, guild_id, user_id, kind):
+        """Oublie l'échéance en cours (sanction levée à la main ou rendue définitive)."""
+        sanction_id = await self.store.find_sanction(guild_id, user_id, kind)
+        if sanction_id is not None:
+            self.sanctions.cancel(sanction_id)
+            await self.store.delete_sanction(sanction_id)
 
-    def load_warnings(self):
-        if os.path.exists(self.warns_file):
+    def _on_sanction_due(self, sanction_id):
+        task = asyncio.create_task(self._lift_sanction(sanction_id))
+        self._lift_tasks.add(task)
+        task.add_done_callback(self._lift_tasks.discard)
+
+    async def _lift_sanction(self, sanction_id):
+        async with self._lift_slots:
+            sanction = await self.store.get_sanction(sanction_id)
+            if sanction is None:
+                return
+            guild = self.bot.get_guild(sanction['guild_id'])
+            try:
+                # bot retiré du serveur: plus rien à lever
+                if guild is not None:
+                    await self._undo_sanction(guild, sanction)
+            except (discord.NotFound, discord.Forbidden):
+                pass
+            except discord.HTTPException:
+                retry = int(time.time()) + LIFT_RETRY_DELAY
+                await self.store.reschedule_sanction(sanction_id, retry)
+                self.sanctions.schedule(sanction_id, retry)
+                return
+            await self.store.delete_sanction(sanction_id)
+
+    async def _undo_sanction(self, guild, sanction):
+        if sanction['kind'] == 'ban':
+            await guild.unban(discord.Object(id=sanction['user_id']), reason="Fin du bannissement temporaire")
+            return
+        member = guild.get_member(sanction['user_id'])
+        muted_role = discord.utils.get(guild.roles, name="Muted")
+        if member and muted_role and muted_role in member.roles:
+            await member.remove_roles(muted_role, reason="Fin du muet temporaire")
             try:
-                with open(self.warns_file, "r", encoding="utf-8") as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, Exception):
-                return {}
-        return {}
-
-    def save_warnings(self):
-        os.makedirs(os.path.dirname(self.warns_file), exist_ok=True)
-        with open(self.warns_file, "w", encoding="utf-8") as f:
-            json.dump(self.warnings, f, indent=4, ensure_ascii=False)
-
-    def _ensure_guild(self, guild_id):
-        gid = str(guild_id)
-        if gid not in self.warnings:
-            self.warnings[gid] = {}
-        return gid
+                await member.send(f"🔊 Vous n'êtes plus muet sur **{guild.name}**!")
+            except discord.HTTPException:
+                pass
+
+    async def _get_muted_role(self, guild, report=None):
+        """Rôle Muted du serveur, créé et configuré au premier besoin.
+
+        Plusieurs /mute simultanés attendent la même configuration;
+        `report(content)` reçoit la progression (ex: édition de la réponse).
+        """
+        task = self._provisioning.get(guild.id)
+        if task is None:
+            muted_role = discord.utils.get(guild.roles, name="Muted")
+            if muted_role:
+                return muted_role
+            task = self._provisioning[guild.id] = asyncio.create_task(self._provision_muted_role(guild, report))
+            task.add_done_callback(lambda _: self._provisioning.pop(guild.id, None))
+        return await asyncio.shield(task)
+
+    async def _report(self, report, content):
+        if report is None:
+            return
+        try:
+            await report(content)
+        except discord.HTTPException:
+            pass
+
+    async def _provision_muted_role(self, guild, report):
+        muted_role = await guild.create_role(name="Muted", reason="Création du rôle Muted par le bot")
+        last_update = 0
+
+        async def progress(done, total, failed):
+            nonlocal last_update
+            now = time.monotonic()
+            if done < total and now - last_update < PROGRESS_INTERVAL:
+                return
+            last_update = now
+            await self._report(report, f"⏳ Configuration du rôle Muted: {done}/{total} salons")
+
+        # catégories puis salons, en parallèle borné; les salons déjà à jour sont ignorés
+        total, failed = await self.provisioner.provision(
+            guild, muted_role, muted_overwrite(), reason="Configuration du rôle Muted", progress=progress
+        )
+        if failed:
+            await self._report(report, f"⚠️ Rôle Muted configuré sur {total - failed}/{total} salons (permissions manquantes sur les autres).")
+        return muted_role
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel):
+        """Applique l'overwrite Muted aux salons créés après la configuration."""
+        muted_role = discord.utils.get(channel.guild.roles, name="Muted")
+        if muted_role is None:
+            return
+        overwrite = muted_overwrite()
+        # salon créé dans une catégorie synchronisée: overwrite déjà hérité
+        if channel.overwrites_for(muted_role) == overwrite:
+            return
+        try:
+            await channel.set_permissions(muted_role, overwrite=overwrite, reason="Rôle Muted: nouveau salon")
+        except discord.HTTPException:
+            pass
 
     @app_commands.command(name="ban", description="Bannir un membre du serveur")
     @app_commands.describe(member="Le membre à bannir", reason="La raison du bannissement")
@@ -57,6 +273,149 @@ class Moderation(commands.Cog):
         embed.add_field(name="Modérateur", value=interaction.user.mention)
         await interaction.response.send_message(embed=embed)
 
+    @app_commands.command(name="massban", description="Bannir de nombreux comptes en une fois (raid)")
+    @app_commands.describe(
+        ids="Identifiants des comptes, séparés par des espaces ou virgules",
+        joined_minutes="Membres arrivés dans les N dernières minutes",
+        account_age_days="Comptes créés il y a moins de N jours",
+        reason="La raison du bannissement",
+        delete_days="Jours de messages à supprimer (0-7)"
+    )
+    @app_commands.default_permissions(ban_members=True)
+    async def massban(
+        self,
+        interaction: discord.Interaction,
+        ids: str = None,
+        joined_minutes: app_commands.Range[int, 1, 10080] = None,
+        account_age_days: app_commands.Range[int, 1, 3650] = None,
+        reason: str = "Raid",
+        delete_days: app_commands.Range[int, 0, 7] = 1
+    ):
+        """Bannir une liste d'ids et/ou les membres correspondant aux filtres"""
+        user_ids = parse_ids(ids)
+        if not user_ids and joined_minutes is None and account_age_days is None:
+            await interaction.response.send_message("❌ Donnez des identifiants ou au moins un filtre.", ephemeral=True)
+            return
+        guild = interaction.guild
+        if guild.id in self._massbans:
+            await interaction.response.send_message("❌ Un bannissement de masse est déjà en cours sur ce serveur.", ephemeral=True)
+            return
+
+        now = discord.utils.utcnow()
+        targets, skipped = select_targets(
+            guild, interaction.user, user_ids,
+            joined_after=now - timedelta(minutes=joined_minutes) if joined_minutes else None,
+            created_after=now - timedelta(days=account_age_days) if account_age_days else None
+        )
+        if not targets:
+            await interaction.response.send_message(
+                f"✅ Aucun compte à bannir ({skipped} membre(s) protégé(s) ignoré(s)).", ephemeral=True
+            )
+            return
+
+        preview = ", ".join(f"<@{user_id}>" for user_id in targets[:MASSBAN_PREVIEW])
+        if len(targets) > MASSBAN_PREVIEW:
+            preview += f" et {len(targets) - MASSBAN_PREVIEW} autres"
+        view = ConfirmView(interaction.user.id)
+        await interaction.response.send_message(
+            f"⚠️ **{len(targets)}** compte(s) vont être bannis ({skipped} protégé(s) ignoré(s)):\n{preview}",
+            view=view, ephemeral=True
+        )
+        await view.wait()
+        if not view.confirmed:
+            await interaction.edit_original_response(content="❌ Bannissement de masse annulé.", view=None)
+            return
+        if guild.id in self._massbans:
+            await interaction.edit_original_response(content="❌ Un bannissement de masse est déjà en cours sur ce serveur.", view=None)
+            return
+
+        job = MassBan(
+            guild, targets, reason=f"{reason} (par {interaction.user})",
+            delete_message_seconds=delete_days * 86400, concurrency=MASSBAN_CONCURRENCY
+        )
+        last_update = 0
+
+        async def progress(done, total):
+            nonlocal last_update
+            now = time.monotonic()
+            if done < total and now - last_update < PROGRESS_INTERVAL:
+                return
+            last_update = now
+            await self._report(
+                lambda content: interaction.edit_original_response(content=content, view=None),
+                f"⏳ Bannissements: {done}/{total}"
+            )
+
+        self._massbans.add(guild.id)
+        start = time.monotonic()
+        try:
+            await job.run(progress)
+        finally:
+            self._massbans.discard(guild.id)
+
+        embed = discord.Embed(title="🔨 Bannissement de masse", description=f"{job.banned}/{len(targets)} comptes bannis.", color=0xff0000)
+        embed.add_field(name="Modérateur", value=interaction.user.mention, inline=True)
+        embed.add_field(name="Raison", value=reason, inline=True)
+        embed.add_field(name="Durée", value=f"{time.monotonic() - start:.1f} s", inline=True)
+        if skipped:
+            embed.add_field(name="Protégés ignorés", value=skipped, inline=True)
+        if job.failed:
+            embed.add_field(name="Échecs", value=job.failed, inline=True)
+        if job.missing:
+            embed.add_field(name="Introuvables", value=job.missing, inline=True)
+        if job.retries:
+            embed.add_field(name="Nouvelles tentatives", value=job.retries, inline=True)
+        await self._report(
+            lambda content: interaction.edit_original_response(content=content, view=None), "✅ Terminé."
+        )
+        try:
+            await interaction.followup.send(embed=embed)
+        except discord.HTTPException:
+            # jeton de l'interaction expiré (15 minutes) sur un très long bannissement
+            await interaction.channel.send(embed=embed)
+
+    @app_commands.command(name="raidmode", description="Bannir automatiquement les nouveaux comptes qui rejoignent")
+    @app_commands.describe(
+        enabled="Activer ou désactiver le mode raid",
+        account_age_days="Âge minimal du compte pour pouvoir rejoindre (jours)",
+        minutes="Durée du mode raid (minutes)"
+    )
+    @app_commands.default_permissions(ban_members=True)
+    async def raidmode(
+        self,
+        interaction: discord.Interaction,
+        enabled: bool,
+        account_age_days: app_commands.Range[int, 1, 365] = 7,
+        minutes: app_commands.Range[int, 5, 1440] = 60
+    ):
+        """Pendant un raid, bannir les comptes trop récents dès leur arrivée"""
+        if not enabled:
+            self._raid_mode.pop(interaction.guild.id, None)
+            await interaction.response.send_message("🛡️ Mode raid désactivé.")
+            return
+        until = int(time.time()) + minutes * 60
+        self._raid_mode[interaction.guild.id] = (until, account_age_days)
+        await interaction.response.send_message(
+            f"🚨 Mode raid activé jusqu'à <t:{until}:t>: les comptes de moins de {account_age_days} jours "
+            f"seront bannis à leur arrivée. `/massban` pour ceux déjà présents."
+        )
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        raid = self._raid_mode.get(member.guild.id)
+        if raid is None:
+            return
+        until, min_age = raid
+        if time.time() >= until:
+            self._raid_mode.pop(member.guild.id, None)
+            return
+        if member.bot or discord.utils.utcnow() - member.created_at >= timedelta(days=min_age):
+            return
+        try:
+            await member.ban(reason=f"Mode raid: compte de moins de {min_age} jours", delete_message_seconds=86400)
+        except discord.HTTPException:
+            pass
+
     @app_commands.command(name="kick", description="Expulser un membre du serveur")
     @app_commands.describe(member="Le membre à expulser", reason="La raison de l'expulsion")
     @app_commands.default_permissions(kick_members=True)
@@ -80,18 +439,75 @@ class Moderation(commands.Cog):
         embed.add_field(name="Modérateur", value=interaction.user.mention)
         await interaction.response.send_message(embed=embed)
 
-    @app_commands.command(name="clear", description="Supprimer un nombre spécifié de messages (optionnellement avec raison)")
-    @app_commands.describe(amount="Nombre de messages à supprimer (1-100)", reason="Raison du purge (optionnel)")
+    @app_commands.command(name="clear", description="Supprimer des messages, avec filtres optionnels")
+    @app_commands.describe(
+        amount="Nombre de messages à supprimer (1-10000)",
+        reason="Raison du purge (optionnel)",
+        member="Seulement les messages de ce membre",
+        contains="Expression régulière recherchée dans le contenu",
+        attachments="Seulement les messages avec (oui) ou sans (non) pièce jointe",
+        bots="Seulement les messages de bots (oui) ou d'humains (non)",
+        hours="Seulement les messages des N dernières heures"
+    )
     @app_commands.default_permissions(manage_messages=True)
-    async def clear(self, interaction: discord.Interaction, amount: app_commands.Range[int, 1, 100], reason: str = None):
-        """Supprimer un nombre spécifié de messages"""
+    async def clear(
+        self, interaction: discord.Interaction, amount: app_commands.Range[int, 1, 10000], reason: str = None,
+        member: discord.Member = None, contains: str = None, attachments: bool = None, bots: bool = None,
+        hours: app_commands.Range[int, 1, 8760] = None
+    ):
+        """Supprimer des messages: lots de 100 (< 14 jours) et suppression lente des plus anciens"""
+        try:
+            pattern = re.compile(contains, re.IGNORECASE) if contains else None
+        except re.error as e:
+            await interaction.response.send_message(f"❌ Expression régulière invalide: {e}", ephemeral=True)
+            return
+        if interaction.channel.id in self._purges:
+            await interaction.response.send_message("❌ Une purge est déjà en cours dans ce salon.", ephemeral=True)
+            return
+
+        check = PurgeFilter(author_id=member.id if member else None, pattern=pattern, attachments=attachments, bots=bots)
+        after = discord.utils.utcnow() - timedelta(hours=hours) if hours else None
+        job = PurgeJob(interaction.channel, amount, check, after=after, scan_limit=PURGE_SCAN_LIMIT)
+        view = PurgeView(job, interaction.user.id)
         await interaction.response.defer(ephemeral=True)
-        deleted = await interaction.channel.purge(limit=amount)
-        embed = discord.Embed(title="🗑️ Purge", description=f"{len(deleted)} messages supprimés.", color=0xffa500)
+        self._purges[interaction.channel.id] = job
+        task = asyncio.create_task(job.run())
+        try:
+            # progression dans la réponse différée tant que la purge tourne
+            while not task.done():
+                await asyncio.wait({task}, timeout=PROGRESS_INTERVAL)
+                if not task.done() and not job.cancelled:
+                    try:
+                        await interaction.edit_original_response(
+                            content=f"🗑️ Purge en cours: {job.deleted} supprimés • {job.scanned} messages analysés",
+                            view=view
+                        )
+                    except discord.HTTPException:
+                        pass
+            task.result()
+        except discord.HTTPException as e:
+            # permission retirée pendant la purge, erreur API non gérée par le job
+            await interaction.edit_original_response(
+                content=f"❌ Purge interrompue: {e} ({job.deleted} messages supprimés)", view=None
+            )
+            return
+        finally:
+            self._purges.pop(interaction.channel.id, None)
+            # sinon la vue resterait enregistrée indéfiniment (timeout=None)
+            view.stop()
+            if not task.done():
+                # handler interrompu (ex: déchargement du cog)
+                job.cancel()
+
+        title = "⏹️ Purge annulée" if job.cancelled else "🗑️ Purge"
+        embed = discord.Embed(title=title, description=f"{job.deleted} messages supprimés.", color=0xffa500)
         embed.add_field(name="Modérateur", value=interaction.user.mention, inline=True)
         if reason:
             embed.add_field(name="Raison", value=reason, inline=True)
-        await interaction.followup.send(embed=embed, ephemeral=True)
+        embed.add_field(name="Analysés", value=job.scanned, inline=True)
+        if job.failed:
+            embed.add_field(name="Échecs", value=job.failed, inline=True)
+        await interaction.edit_original_response(content=None, embed=embed, view=None)
 
     @app_commands.command(name="mute", description="Rendre muet un membre")
     @app_commands.describe(member="Le membre à rendre muet", reason="La raison", duration="Durée en minutes (optionnel)")
@@ -106,27 +522,17 @@ class Moderation(commands.Cog):
             await interaction.response.send_message("❌ Vous ne pouvez pas rendre muet un membre avec un rôle égal ou supérieur au vôtre!", ephemeral=True)
             return
         
-        muted_role = discord.utils.get(interaction.guild.roles, name="Muted")
-        
-        if not muted_role:
-            # Créer le rôle Muted s'il n'existe pas
-            muted_role = await interaction.guild.create_role(name="Muted", reason="Création du rôle Muted par le bot")
-
-            # Désactiver les permissions pour tous les salons (texte + voix)
-            for channel in interaction.guild.channels:
-                try:
-                    await channel.set_permissions(
-                        muted_role,
-                        send_messages=False,
-                        add_reactions=False,
-                        speak=False,
-                        connect=False
-                    )
-                except Exception:
-                    # certaines permissions peuvent échouer selon le type de salon; ignorer
-                    continue
-
-        await member.add_roles(muted_role, reason=reason)
+        # la création du rôle peut toucher des centaines de salons: répondre d'abord
+        await interaction.response.defer()
+        try:
+            muted_role = await self._get_muted_role(
+                interaction.guild, report=lambda content: interaction.edit_original_response(content=content)
+            )
+            await member.add_roles(muted_role, reason=reason)
+        except discord.HTTPException as e:
+            # permissions insuffisantes (Manage Roles, hiérarchie) ou erreur API
+            await interaction.followup.send(f"❌ Impossible de rendre {member.mention} muet: {e}", ephemeral=True)
+            return
         embed = discord.Embed(
             title="🔇 Membre rendu muet",
             description=f"{member.mention} a été rendu muet.",
@@ -137,17 +543,13 @@ class Moderation(commands.Cog):
             embed.add_field(name="Durée", value=f"{duration} minutes")
         embed.add_field(name="Modérateur", value=interaction.user.mention)
         
-        await interaction.response.send_message(embed=embed)
+        await interaction.followup.send(embed=embed)
         
-        # Si une durée est spécifiée, programmer le unmute
+        # Si une durée est spécifiée, programmer le unmute (persistant)
         if duration:
-            await asyncio.sleep(duration * 60)
-            if muted_role in member.roles:
-                await member.remove_roles(muted_role)
-                try:
-                    await member.send(f"🔊 Vous n'êtes plus muet sur **{interaction.guild.name}**!")
-                except:
-                    pass
+            await self._schedule_sanction(interaction.guild.id, member.id, 'mute', duration, interaction.user.id, reason)
+        else:
+            await self._drop_sanction(interaction.guild.id, member.id, 'mute')
 
     @app_commands.command(name="unmute", description="Retirer le muet d'un membre")
     @app_commands.describe(member="Le membre à unmute")
@@ -158,6 +560,7 @@ class Moderation(commands.Cog):
         
         if muted_role and muted_role in member.roles:
             await member.remove_roles(muted_role)
+            await self._drop_sanction(interaction.guild.id, member.id, 'mute')
             await interaction.response.send_message(f"🔊 {member.mention} n'est plus muet!")
         else:
             await interaction.response.send_message("❌ Ce membre n'est pas muet.", ephemeral=True)
@@ -171,45 +574,157 @@ class Moderation(commands.Cog):
             await interaction.response.send_message("❌ Vous ne pouvez pas vous avertir vous-même!", ephemeral=True)
             return
 
-        gid = self._ensure_guild(interaction.guild.id)
-        uid = str(member.id)
-        self.warnings[gid].setdefault(uid, []).append({
-            "moderator": str(interaction.user.id),
-            "reason": reason,
-            "timestamp": discord.utils.utcnow().isoformat()
-        })
-        self.save_warnings()
+        await self.store.add_warning(interaction.guild.id, member.id, interaction.user.id, reason)
 
         await interaction.response.send_message(f"⚠️ {member.mention} a été averti. Raison: {reason}")
 
-        # Optionnel: actions automatisées selon le nombre d'avertissements
-        count = len(self.warnings[gid][uid])
-        if count >= 3:
-            try:
-                await member.kick(reason="Trop d'avertissements")
-                await interaction.followup.send(f"🔨 {member.mention} a été expulsé automatiquement (3+ avertissements).")
-            except Exception:
-                pass
+        # actions automatisées selon le nombre d'avertissements récents
+        since = int(time.time()) - WARN_DECAY_DAYS * 86400
+        count = await self.store.count_warnings(interaction.guild.id, member.id, since)
+        await self._auto_sanction(interaction.guild, member, count, interaction.user.id, interaction.followup.send)
+
+    async def _auto_sanction(self, guild, member, count, moderator_id, notify):
+        for threshold, action, minutes in WARN_THRESHOLDS:
+            if count >= threshold:
+                break
+        else:
+            return
+        reason = f"Trop d'avertissements ({count} en {WARN_DECAY_DAYS} jours)"
+        try:
+            if action == 'kick':
+                await member.kick(reason=reason)
+                await notify(f"🔨 {member.mention} a été expulsé automatiquement ({count} avertissements en {WARN_DECAY_DAYS} jours).")
+            elif action == 'mute':
+                muted_role = await self._get_muted_role(guild)
+                await member.add_roles(muted_role, reason=reason)
+                await self._schedule_sanction(guild.id, member.id, 'mute', minutes, moderator_id, reason)
+                await notify(f"🔇 {member.mention} a été rendu muet {minutes} minutes automatiquement ({count} avertissements en {WARN_DECAY_DAYS} jours).")
+        except discord.HTTPException:
+            pass
+
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        """Automod: travail constant par message, rien à faire si désactivé."""
+        if message.guild is None or message.author.bot:
+            return
+        rule = self.automod.check(
+            message.guild.id, message.author.id, message.content,
+            len(message.mentions) + len(message.role_mentions)
+        )
+        if rule is None:
+            return
+        # les modérateurs ne sont pas concernés
+        if message.author.guild_permissions.manage_messages:
+            return
+        await self._automod_act(message, rule)
+
+    async def _automod_act(self, message, rule):
+        guild, member = message.guild, message.author
+        try:
+            await message.delete()
+        except discord.HTTPException:
+            pass
+        action = self.automod.configs[guild.id].action
+        # rafale de messages fautifs: une seule sanction par ACTION_COOLDOWN
+        if action == 'delete' or not self.automod.should_act(guild.id, member.id):
+            return
+        reason = f"Automod: {RULES[rule]}"
+        try:
+            if action == 'warn':
+                await self.store.add_warning(guild.id, member.id, self.bot.user.id, reason)
+                await message.channel.send(f"⚠️ {member.mention} a été averti automatiquement. Raison: {RULES[rule]}")
+                since = int(time.time()) - WARN_DECAY_DAYS * 86400
+                count = await self.store.count_warnings(guild.id, member.id, since)
+                await self._auto_sanction(guild, member, count, self.bot.user.id, message.channel.send)
+            elif action == 'mute':
+                muted_role = await self._get_muted_role(guild)
+                await member.add_roles(muted_role, reason=reason)
+                await self._schedule_sanction(guild.id, member.id, 'mute', AUTOMOD_MUTE_MINUTES, self.bot.user.id, reason)
+                await message.channel.send(f"🔇 {member.mention} a été rendu muet {AUTOMOD_MUTE_MINUTES} minutes automatiquement. Raison: {RULES[rule]}")
+            elif action == 'kick':
+                await member.kick(reason=reason)
+                await message.channel.send(f"👢 {member.mention} a été expulsé automatiquement. Raison: {RULES[rule]}")
+        except discord.HTTPException:
+            pass
+
+    @app_commands.command(name="automod", description="Configurer la modération automatique")
+    @app_commands.describe(enabled="Activer ou désactiver l'automod", action="Sanction appliquée en cas d'infraction")
+    @app_commands.choices(action=[app_commands.Choice(name=AUTOMOD_ACTION_LABELS[a], value=a) for a in ACTIONS])
+    @app_commands.default_permissions(manage_guild=True)
+    async def automod_config(self, interaction: discord.Interaction, enabled: bool, action: app_commands.Choice[str] = None):
+        """Activer l'automod (mots interdits, spam, mentions, messages répétés)"""
+        config = self.automod.configure(interaction.guild.id, enabled, action.value if action else None)
+        await self.store.save_automod(interaction.guild.id, config.enabled, config.action, config.words)
+        state = "activée" if config.enabled else "désactivée"
+        await interaction.response.send_message(
+            f"🛡️ Modération automatique {state} (action: {AUTOMOD_ACTION_LABELS[config.action]}, "
+            f"{len(config.words)} mot(s) interdit(s))."
+        )
+
+    @app_commands.command(name="automodword", description="Ajouter ou retirer un mot interdit")
+    @app_commands.describe(word="Le mot ou l'expression", remove="Retirer le mot au lieu de l'ajouter")
+    @app_commands.default_permissions(manage_guild=True)
+    async def automodword(self, interaction: discord.Interaction, word: app_commands.Range[str, 1, 100], remove: bool = False):
+        """Gérer la liste de mots interdits du serveur"""
+        config = self.automod.configs.get(interaction.guild.id)
+        words = set(config.words) if config else set()
+        word = word.strip().lower()
+        if remove:
+            if word not in words:
+                await interaction.response.send_message("❌ Ce mot n'est pas dans la liste.", ephemeral=True)
+                return
+            words.discard(word)
+        else:
+            words.add(word)
+        # liste recompilée une seule fois ici, pas à chaque message
+        config = self.automod.configure(interaction.guild.id, words=words)
+        await self.store.save_automod(interaction.guild.id, config.enabled, config.action, config.words)
+        verb = "retiré de" if remove else "ajouté à"
+        await interaction.response.send_message(f"✅ Mot {verb} la liste ({len(config.words)} au total).", ephemeral=True)
 
     @app_commands.command(name="warnings", description="Voir les avertissements d'un membre")
-    @app_commands.describe(member="Le membre à consulter")
-    async def warnings(self, interaction: discord.Interaction, member: discord.Member = None):
+    @app_commands.describe(member="Le membre à consulter", page="Numéro de page", days="Seulement les N derniers jours (optionnel)")
+    async def warnings(self, interaction: discord.Interaction, member: discord.Member = None, page: app_commands.Range[int, 1, 10000] = 1, days: app_commands.Range[int, 1, 3650] = None):
         """Afficher les avertissements d'un membre"""
         if not member:
             member = interaction.user
-        gid = str(interaction.guild.id)
-        uid = str(member.id)
-        guild_warns = self.warnings.get(gid, {})
-        user_warns = guild_warns.get(uid, [])
-        if not user_warns:
+        since = int(time.time()) - days * 86400 if days else 0
+        # plage d'index (guild_id, user_id, timestamp): les autres serveurs ne sont pas lus
+        total = await self.store.count_warnings(interaction.guild.id, member.id, since)
+        if not total:
             await interaction.response.send_message("✅ Aucun avertissement pour ce membre.", ephemeral=True)
             return
+        offset = (page - 1) * WARNINGS_PAGE_SIZE
+        rows = await self.store.warnings(interaction.guild.id, member.id, since, WARNINGS_PAGE_SIZE, offset)
+        if not rows:
+            await interaction.response.send_message("❌ Page vide.", ephemeral=True)
+            return
 
         embed = discord.Embed(title=f"⚠️ Avertissements de {member.display_name}", color=0xffd700)
-        for i, w in enumerate(user_warns, 1):
-            mod = self.bot.get_user(int(w["moderator"]))
-            ts = w.get("timestamp", "")[:19].replace('T', ' ')
-            embed.add_field(name=f"{i}. Par {mod or w['moderator']} • {ts}", value=f"{w['reason']}", inline=False)
+        for i, w in enumerate(rows, offset + 1):
+            mod = self.bot.get_user(w["moderator_id"])
+            ts = datetime.fromtimestamp(w["timestamp"], timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+            embed.add_field(name=f"{i}. Par {mod or w['moderator_id']} • {ts}", value=f"{w['reason']}", inline=False)
+        pages = max(1, -(-total // WARNINGS_PAGE_SIZE))
+        period = f" sur {days} jours" if days else ""
+        embed.set_footer(text=f"Page {page}/{pages} • {total} avertissements{period}")
+        await interaction.response.send_message(embed=embed)
+
+    @app_commands.command(name="warnstats", description="Statistiques des avertissements du serveur par modérateur")
+    @app_commands.describe(days="Période en jours")
+    @app_commands.default_permissions(kick_members=True)
+    async def warnstats(self, interaction: discord.Interaction, days: app_commands.Range[int, 1, 3650] = 30):
+        """Activité des modérateurs sur la période (plage d'index guild_id, timestamp)"""
+        since = int(time.time()) - days * 86400
+        stats = await self.store.moderator_stats(interaction.guild.id, since)
+        embed = discord.Embed(title=f"📊 Avertissements — {days} derniers jours", color=0xffd700)
+        embed.add_field(name="Avertissements", value=stats['warnings'], inline=True)
+        embed.add_field(name="Membres avertis", value=stats['members'], inline=True)
+        lines = [
+            f"{i}. {self.bot.get_user(mod_id) or mod_id} — {count}"
+            for i, (mod_id, count) in enumerate(stats['moderators'], 1)
+        ]
+        embed.add_field(name="Modérateurs", value="\n".join(lines) or "Aucun", inline=False)
         await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name="clearwarnings", description="Effacer les avertissements d'un membre")
@@ -217,11 +732,7 @@ class Moderation(commands.Cog):
     @app_commands.default_permissions(kick_members=True)
     async def clearwarnings(self, interaction: discord.Interaction, member: discord.Member):
         """Effacer tous les avertissements d'un membre"""
-        gid = str(interaction.guild.id)
-        uid = str(member.id)
-        if gid in self.warnings and uid in self.warnings[gid]:
-            del self.warnings[gid][uid]
-            self.save_warnings()
+        if await self.store.clear_warnings(interaction.guild.id, member.id):
             await interaction.response.send_message(f"✅ Tous les avertissements de {member.mention} ont été effacés.")
         else:
             await interaction.response.send_message("❌ Ce membre n'a aucun avertissement.", ephemeral=True)
@@ -239,15 +750,61 @@ class Moderation(commands.Cog):
             return
 
         await member.ban(reason=reason)
+        # débannissement persistant: survit aux redémarrages et aux /reload
+        await self._schedule_sanction(interaction.guild.id, member.id, 'ban', duration, interaction.user.id, reason)
         await interaction.response.send_message(f"🔨 {member.mention} banni pendant {duration} minutes. Raison: {reason}")
-        # schedule unban
-        async def _unban_later(guild, user_id, wait):
-            await asyncio.sleep(wait)
-            try:
-                await guild.unban(discord.Object(id=user_id))
-            except Exception:
-                pass
-        self.bot.loop.create_task(_unban_later(interaction.guild, member.id, duration * 60))
+
+    @app_commands.command(name="sanctions", description="Lister les sanctions temporaires en cours")
+    @app_commands.describe(page="Numéro de page")
+    @app_commands.default_permissions(ban_members=True)
+    async def sanctions_list(self, interaction: discord.Interaction, page: app_commands.Range[int, 1, 10000] = 1):
+        """Lister les tempbans et mutes temporaires du serveur, prochaine levée d'abord"""
+        total = await self.store.count_sanctions(interaction.guild.id)
+        offset = (page - 1) * SANCTION_PAGE_SIZE
+        rows = await self.store.guild_sanctions(interaction.guild.id, SANCTION_PAGE_SIZE, offset)
+        if not rows:
+            await interaction.response.send_message("✅ Aucune sanction temporaire en cours.", ephemeral=True)
+            return
+        embed = discord.Embed(title="⏳ Sanctions temporaires", color=0xffa500)
+        for s in rows:
+            embed.add_field(
+                name=f"#{s['sanction_id']} • {SANCTION_LABELS.get(s['kind'], s['kind'])}",
+                value=f"<@{s['user_id']}> • levée <t:{s['expires']}:R> • par <@{s['moderator_id']}>\n{s['reason'] or ''}",
+                inline=False
+            )
+        pages = max(1, -(-total // SANCTION_PAGE_SIZE))
+        embed.set_footer(text=f"Page {page}/{pages} • {total} sanctions • /sanctioncancel pour annuler")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="sanctioncancel", description="Annuler une sanction temporaire")
+    @app_commands.describe(
+        sanction_id="Numéro affiché par /sanctions",
+        lift="Oui: lever la sanction maintenant. Non: la rendre définitive"
+    )
+    @app_commands.default_permissions(ban_members=True)
+    async def sanctioncancel(self, interaction: discord.Interaction, sanction_id: int, lift: bool = True):
+        """Annuler l'échéance d'une sanction (levée immédiate ou sanction définitive)"""
+        sanction = await self.store.get_sanction(sanction_id)
+        if sanction is None or sanction['guild_id'] != interaction.guild.id:
+            await interaction.response.send_message("❌ Sanction introuvable.", ephemeral=True)
+            return
+        if not lift:
+            self.sanctions.cancel(sanction_id)
+            await self.store.delete_sanction(sanction_id)
+            await interaction.response.send_message(f"✅ Sanction #{sanction_id} rendue définitive pour <@{sanction['user_id']}>.")
+            return
+        try:
+            await self._undo_sanction(interaction.guild, sanction)
+        except discord.NotFound:
+            # déjà levée à la main: il ne reste que l'échéance à oublier
+            pass
+        except discord.HTTPException as e:
+            # échéance et ligne conservées: la levée automatique reste prévue
+            await interaction.response.send_message(f"❌ Impossible de lever la sanction: {e}", ephemeral=True)
+            return
+        self.sanctions.cancel(sanction_id)
+        await self.store.delete_sanction(sanction_id)
+        await interaction.response.send_message(f"✅ Sanction #{sanction_id} levée pour <@{sanction['user_id']}>.")
 
 async def setup(bot):
     await bot.add_cog(Moderation(bot))
\ No newline at end of file
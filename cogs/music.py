@@ -1,10 +1,22 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import yt_dlp
 import asyncio
+import io
+import json
+import math
 import os
-import random
+import time
+from collections import deque
+from itertools import islice
+
+from utils.audio_metrics import FRAME_SECONDS, GuildAudioStats, ffmpeg_pid
+from utils.extraction import LATENCY_SAMPLES, ExtractionService, is_playlist_url, percentile
+from utils.extraction_cache import ExtractionCache
+from utils.music_queue import Track, TrackQueue
+from utils.music_store import MusicStore
+from utils.persistence import atomic_write
+from utils.prefetch import Prefetcher
 
 # Configuration yt-dlp
 ytdl_format_options = {
@@ -24,56 +36,385 @@ ytdl_format_options = {
 ffmpeg_options = {
     'options': '-vn'
 }
-
-ytdl = yt_dlp.YoutubeDL(ytdl_format_options)
+# flux HTTP: ffmpeg se reconnecte lui-même après une coupure réseau passagère
+FFMPEG_RECONNECT = '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5'
+
+# pool d'extraction: nombre de workers, et processus plutôt que threads
+YTDL_WORKERS = int(os.getenv("YTDL_WORKERS", "4"))
+YTDL_PROCESSES = os.getenv("YTDL_PROCESSES", "0").lower() in ("1", "true", "yes")
+# résultats d'extraction gardés en mémoire (LRU, durée de vie = URL directe)
+YTDL_CACHE_SIZE = int(os.getenv("YTDL_CACHE_SIZE", "2048"))
+# pistes préparées à l'avance (URL directe + format) pendant la lecture
+PREFETCH_DEPTH = int(os.getenv("MUSIC_PREFETCH_DEPTH", "2"))
+# pistes ajoutées au plus par playlist
+PLAYLIST_MAX_TRACKS = int(os.getenv("MUSIC_PLAYLIST_MAX", "1000"))
+# première page courte pour lancer la lecture vite; les suivantes grandes,
+# car chaque page reparcourt côté site les pages précédentes (continuations)
+PLAYLIST_FIRST_PAGE = 25
+PLAYLIST_PAGE = 250
+# piste arrêtée plus de N secondes avant sa fin sans /skip ni /stop: coupure, reprise à la position
+STREAM_DROP_TOLERANCE = 5
+# reprises successives d'une même piste sans progression avant de l'abandonner
+MAX_STREAM_RESUMES = 3
+# blancs entre deux pistes gardés pour les statistiques
+GAP_SAMPLES = 256
+# 'auto': flux Opus envoyé sans décodage quand la source est déjà en Opus; 'pcm': toujours décoder
+PLAYBACK_MODE = os.getenv("MUSIC_PLAYBACK", "auto").lower()
+# volume quand le serveur n'en a pas choisi (1.0 = volume d'origine),
+# appliqué aux deux chemins: filtre ffmpeg pour Opus, mise à l'échelle pour
+# PCM. MUSIC_DEFAULT_VOLUME=1.0 garde les pistes Opus en copie directe.
+DEFAULT_VOLUME = float(os.getenv("MUSIC_DEFAULT_VOLUME", "0.5"))
+# échantillonnage de ffmpeg (CPU, RSS), du CPU du bot et du retard de la boucle (s)
+METRICS_INTERVAL = 5
+# export JSON périodique des mesures (désactivé si MUSIC_METRICS_FILE est vide)
+METRICS_FILE = os.getenv("MUSIC_METRICS_FILE")
+METRICS_EXPORT_INTERVAL = int(os.getenv("MUSIC_METRICS_EXPORT_INTERVAL", "60"))
+
+
+def ytdl_options():
+    """Options yt-dlp, avec le cookiefile de YTDL_COOKIEFILE s'il est défini."""
+    opts = ytdl_format_options.copy()
+    cookiefile = os.getenv('YTDL_COOKIEFILE')
+    if cookiefile:
+        opts['cookiefile'] = cookiefile
+    return opts
 
 class YTDLSource(discord.PCMVolumeTransformer):
-    def __init__(self, source, *, data, volume=0.5):
+    def __init__(self, source, *, data, volume=DEFAULT_VOLUME, start=0.0, stats=None):
         super().__init__(source, volume)
         self.data = data
         self.title = data.get('title')
         self.url = data.get('url')
+        self.start = start
+        self.frames = 0
+        self.stats = stats  # GuildAudioStats, ou None sans mesures
 
-    @classmethod
-    async def from_url(cls, url, *, loop=None, stream=False):
-        loop = loop or asyncio.get_event_loop()
-        # Create a local YoutubeDL instance so we can inject cookiefile if provided via env
-        opts = ytdl_format_options.copy()
-        cookiefile = os.getenv('YTDL_COOKIEFILE')
-        if cookiefile:
-            opts['cookiefile'] = cookiefile
-
-        local_ytdl = yt_dlp.YoutubeDL(opts)
-
-        try:
-            data = await loop.run_in_executor(None, lambda: local_ytdl.extract_info(url, download=not stream))
-        except Exception as e:
-            # propagate a clearer error for the caller
-            raise RuntimeError(f"yt-dlp extraction failed: {e}")
+    def _read(self):
+        # à 100%, la mise à l'échelle ne changerait aucun échantillon
+        return self.original.read() if self.volume == 1.0 else super().read()
 
-        if not data:
-            raise RuntimeError("Aucune donnée extraite (stream non supporté ou URL invalide)")
-
-        if 'entries' in data:
-            # playlists -> take first entry
-            data = data['entries'][0]
+    def read(self):
+        if self.stats is None:
+            frame = self._read()
+        else:
+            start = time.perf_counter()
+            frame = self._read()
+            self.stats.frame(start, time.perf_counter())
+        if frame:
+            self.frames += 1
+        return frame
+
+    @property
+    def position(self):
+        """Position de lecture dans la piste (secondes)."""
+        return self.start + self.frames * FRAME_SECONDS
+
+
+class OpusSource(discord.AudioSource):
+    """Flux Opus transmis tel quel: ffmpeg copie les paquets (ou applique le
+    volume en filtre et réencode lui-même). Aucune trame PCM ne passe par
+    Python, ni mise à l'échelle ni encodage Opus dans le processus du bot.
+    """
+
+    def __init__(self, original, *, data, volume=None, start=0.0, stats=None):
+        self.original = original
+        self.data = data
+        self.title = data.get('title')
+        self.url = data.get('url')
+        self.volume_filter = volume  # None: copie directe
+        self.start = start
+        self.frames = 0
+        self.stats = stats
+
+    def read(self):
+        if self.stats is None:
+            packet = self.original.read()
+        else:
+            start = time.perf_counter()
+            packet = self.original.read()
+            self.stats.frame(start, time.perf_counter())
+        if packet:
+            self.frames += 1
+        return packet
+
+    def is_opus(self):
+        return True
+
+    def cleanup(self):
+        self.original.cleanup()
+
+    @property
+    def position(self):
+        return self.start + self.frames * FRAME_SECONDS
+
+
+def make_source(track, volume=None, start=0.0, mode=PLAYBACK_MODE, stats=None):
+    """Source audio de `track` à partir de `start` secondes (URL directe déjà résolue).
+
+    `volume` None: DEFAULT_VOLUME. Flux Opus + mode 'auto': OpusSource, en
+    copie si le volume effectif est celui d'origine (100%), sinon avec le
+    volume en filtre ffmpeg. Sinon ffmpeg décode en PCM et le volume est
+    appliqué trame par trame (YTDLSource). `stats`: GuildAudioStats
+    alimenté à chaque trame.
+    """
+    data = {'title': track.title, 'url': track.stream_url, 'webpage_url': track.webpage_url, 'duration': track.duration}
+    options = dict(ffmpeg_options)
+    before = []
+    if track.stream_url and track.stream_url.startswith(('http://', 'https://')):
+        before.append(FFMPEG_RECONNECT)
+    if start:
+        # -ss avant -i: positionnement rapide dans l'entrée
+        before.append(f"-ss {start:.2f}")
+    if before:
+        options['before_options'] = ' '.join(before)
+    volume = DEFAULT_VOLUME if volume is None else volume
+    if mode != 'pcm' and track.codec == 'opus':
+        if volume == 1.0:
+            source = discord.FFmpegOpusAudio(track.stream_url, codec='copy', bitrate=track.bitrate, **options)
+            return OpusSource(source, data=data, start=start, stats=stats)
+        options['options'] = f"{options.get('options', '')} -filter:a volume={volume:.2f}".strip()
+        source = discord.FFmpegOpusAudio(track.stream_url, bitrate=track.bitrate, **options)
+        return OpusSource(source, data=data, volume=volume, start=start, stats=stats)
+    return YTDLSource(
+        discord.FFmpegPCMAudio(track.stream_url, **options), data=data, volume=volume, start=start, stats=stats
+    )
+
+
+async def track_source(track, cache, guild_id=None, volume=None, start=0.0, stats=None):
+    """Source jouable pour `track`: le processus ffmpeg démarre ici, pas à l'ajout.
+
+    L'URL directe doit rester valide jusqu'à la fin prévue de la piste,
+    sinon elle est réextraite (via l'ExtractionCache `cache`).
+    """
+    until = time.time() + max(0, (track.duration or 0) - start)
+    if not track.is_fresh(until):
+        track.resolved(await cache.extract(track.webpage_url, guild_id, fresh_until=until))
+    return make_source(track, volume, start, stats=stats)
 
-        # when streaming, data['url'] points to a direct media url for ffmpeg
-        filename = data['url'] if stream else local_ytdl.prepare_filename(data)
-        return cls(discord.FFmpegPCMAudio(filename, **ffmpeg_options), data=data)
 
 class Music(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.queues = {}  # guild_id -> [YTDLSource,...]
+        self.queues = {}  # guild_id -> TrackQueue (métadonnées seulement)
         self.repeat = {}  # guild_id -> bool
+        self._play_locks = {}  # guild_id -> asyncio.Lock (un seul _play_next à la fois)
+        self.extractor = ExtractionService(ytdl_options(), workers=YTDL_WORKERS, processes=YTDL_PROCESSES)
+        # devant le pool: un titre populaire n'est extrait qu'une fois par durée de vie d'URL
+        self.cache = ExtractionCache(self.extractor, max_entries=YTDL_CACHE_SIZE)
+        self.prefetcher = Prefetcher(self._prefetch_track, depth=PREFETCH_DEPTH)
+        self.current = {}  # guild_id -> (Track, time.monotonic() au démarrage)
+        self._sources = {}  # guild_id -> source de la piste en cours (remplacée par /volume)
+        self.gaps = deque(maxlen=GAP_SAMPLES)  # fin d'une piste -> début de la suivante (s)
+        self.volumes = {}  # guild_id -> volume choisi par /volume (1.0 = 100%)
+        # files et sessions survivent à un redémarrage ou à /reload music
+        # DATA_DIR permet de pointer ailleurs (benchmarks, plusieurs instances)
+        data_dir = os.getenv('DATA_DIR') or os.path.join(os.path.dirname(__file__), '..', 'data')
+        os.makedirs(data_dir, exist_ok=True)
+        self.store = MusicStore(os.path.join(data_dir, 'music.db'))
+        self._ops = []  # mutations des files en attente du prochain flush
+        self._resume_at = {}  # guild_id -> position (s) où reprendre la prochaine piste
+        self._skip_repeat = set()  # serveurs dont la piste en cours ne doit pas être rejouée
+        self._drops = {}  # guild_id -> (Track, reprises) après des coupures en cours de piste
+        self._restore_task = None
+        self._ingests = {}  # guild_id -> {Task} chargement de playlists en cours
+        self._closing = False
+        # instrumentation de la lecture (voir /musicstats)
+        self.audio_stats = {}  # guild_id -> GuildAudioStats
+        self.loop_lag = deque(maxlen=LATENCY_SAMPLES)  # retard de réveil de la boucle (s)
+        self.bot_cpu = deque(maxlen=LATENCY_SAMPLES)  # CPU du processus du bot (% d'un cœur)
+        self._sampler = None
+
+    async def cog_load(self):
+        await self.store.open()
+        # écritures regroupées par le scheduler du bot
+        self.bot.persistence.register("music", self._flush)
+        sessions, entries = await self.store.load()
+        for guild_id, rows in entries.items():
+            self.get_queue(guild_id).restore([(entry_id, key, Track.from_dict(data)) for entry_id, key, data in rows])
+        self.extractor.start()
+        self.cache.on_extract = self._on_extract
+        self._sampler = asyncio.create_task(self._sample())
+        self._restore_task = asyncio.create_task(self._restore(sessions))
+
+    async def cog_unload(self):
+        self._closing = True
+        if self._restore_task:
+            self._restore_task.cancel()
+        if self._sampler:
+            self._sampler.cancel()
+        self.prefetcher.close()
+        for guild_id in list(self._ingests):
+            self._cancel_ingests(guild_id)
+        for voice_client in list(self.bot.voice_clients):
+            guild_id = voice_client.guild.id
+            if guild_id in self.current:
+                # position exacte: la piste reprendra ici au prochain chargement
+                self._save_session(guild_id, voice_client)
+                voice_client.stop()
+        await self.bot.persistence.unregister("music")
+        await self.store.close()
+        await self.extractor.close()
+
+    # --- persistance ---
+
+    async def _flush(self):
+        ops, self._ops = self._ops, []
+        try:
+            await self.store.apply(ops)
+        except Exception:
+            # rejouées au prochain flush, avant les nouvelles
+            self._ops[:0] = ops
+            raise
+
+    def _record(self, op):
+        self._ops.append(op)
+        self.bot.persistence.mark_dirty("music")
+
+    def _queue_changed(self, guild_id, op):
+        if op[0] == 'add':
+            _, entry_id, key, track = op
+            self._record(('add', guild_id, entry_id, key, json.dumps(track.to_dict())))
+        else:
+            self._record((op[0], guild_id, *op[1:]))
+
+    def _save_session(self, guild_id, voice_client):
+        """Salon, réglages et piste en cours (avec sa position) de `guild_id`."""
+        channel = getattr(voice_client, 'channel', None)
+        if channel is None:
+            return
+        current = self.current.get(guild_id)
+        position = getattr(voice_client.source, 'position', 0.0) if current else 0.0
+        self._record((
+            'session', guild_id, channel.id, int(self.repeat.get(guild_id, False)), self.volumes.get(guild_id),
+            json.dumps(current[0].to_dict()) if current else None, position
+        ))
+
+    def _end_session(self, guild_id):
+        self._record(('end', guild_id))
+
+    def _clear(self, guild_id):
+        """Vide la file et oublie la session (stop, leave)."""
+        if guild_id in self.current:
+            # la piste arrêtée ne doit pas revenir en tête avec repeat
+            self._skip_repeat.add(guild_id)
+        self.get_queue(guild_id).clear()
+        self._resume_at.pop(guild_id, None)
+        self._end_session(guild_id)
+        self._cancel_ingests(guild_id)
+        self.prefetcher.cancel(guild_id)
+
+    async def _restore(self, sessions):
+        """Reconnecte les serveurs qui jouaient au dernier arrêt et reprend la piste en cours."""
+        await self.bot.wait_until_ready()
+        for guild_id, session in sessions.items():
+            guild = self.bot.get_guild(guild_id)
+            channel = guild.get_channel(session['channel_id']) if guild else None
+            if channel is None:
+                self._end_session(guild_id)
+                continue
+            queue = self.get_queue(guild_id)
+            self.repeat[guild_id] = session['repeat']
+            if session['volume'] is not None:
+                self.volumes[guild_id] = session['volume']
+            if session['current']:
+                queue.appendleft(Track.from_dict(session['current']))
+                self._resume_at[guild_id] = session['position']
+            try:
+                voice_client = guild.voice_client or await channel.connect()
+            except Exception as e:
+                print(f"Music restore failed for guild {guild_id}: {e}")
+                self._resume_at.pop(guild_id, None)
+                continue
+            await self._play_next(guild_id, voice_client)
+
+    async def _prefetch_track(self, track, guild_id, play_at):
+        """Rend `track` jouable à `play_at` sans attente au changement de piste."""
+        if not track.is_fresh(play_at):
+            track.resolved(await self.cache.extract(track.webpage_url, guild_id, fresh_until=play_at))
+        if track.codec is None:
+            # format non annoncé par yt-dlp: ffprobe pendant que la piste courante joue
+            track.codec, track.bitrate = await discord.FFmpegOpusAudio.probe(track.stream_url, method='fallback')
+
+    def _prefetch(self, guild_id):
+        current = self.current.get(guild_id)
+        lead = 0
+        if current and current[0].duration:
+            lead = max(0, current[0].duration - (time.monotonic() - current[1]))
+        self.prefetcher.schedule(guild_id, self.get_queue(guild_id), lead, current[0] if current else None)
+
+    def gap_stats(self):
+        """Blancs entre deux pistes (ms) et compteurs du préchargement."""
+        def ms(value):
+            return None if value is None else round(value * 1000, 1)
+
+        return {
+            'samples': len(self.gaps),
+            'gap_p50_ms': ms(percentile(self.gaps, 50)),
+            'gap_p95_ms': ms(percentile(self.gaps, 95)),
+            'gap_max_ms': ms(max(self.gaps, default=None)),
+            'prefetched': self.prefetcher.resolved,
+            'prefetch_failed': self.prefetcher.failed,
+            'urls_refreshed': self.prefetcher.refreshed,
+        }
+
+    # --- mesures ---
+
+    def _stats(self, guild_id):
+        stats = self.audio_stats.get(guild_id)
+        if stats is None:
+            stats = self.audio_stats[guild_id] = GuildAudioStats()
+        return stats
+
+    def _on_extract(self, guild_id, seconds):
+        if guild_id is not None:
+            self._stats(guild_id).extractions.append(seconds)
+
+    async def _sample(self):
+        """Échantillonne ffmpeg (CPU, RSS), le CPU du bot et le retard de la boucle."""
+        loop = asyncio.get_running_loop()
+        previous = (time.perf_counter(), time.process_time())
+        exported = loop.time()
+        while True:
+            expected = loop.time() + METRICS_INTERVAL
+            await asyncio.sleep(METRICS_INTERVAL)
+            self.loop_lag.append(max(0.0, loop.time() - expected))
+            now, cpu = time.perf_counter(), time.process_time()
+            self.bot_cpu.append((cpu - previous[1]) / (now - previous[0]) * 100)
+            previous = (now, cpu)
+            for guild_id, source in list(self._sources.items()):
+                self._stats(guild_id).sample_process(ffmpeg_pid(source), now)
+            if METRICS_FILE and loop.time() - exported >= METRICS_EXPORT_INTERVAL:
+                exported = loop.time()
+                try:
+                    await asyncio.to_thread(atomic_write, METRICS_FILE, json.dumps(self.metrics(), indent=2))
+                except OSError as e:
+                    print(f"Music metrics export failed: {e}")
+
+    def metrics(self):
+        """Toutes les mesures de lecture (export JSON de /musicstats et MUSIC_METRICS_FILE)."""
+        def ms(value):
+            return None if value is None else round(value * 1000, 1)
+
+        return {
+            'timestamp': int(time.time()),
+            'guilds_playing': len(self._sources),
+            'bot_cpu_pct': round(self.bot_cpu[-1], 1) if self.bot_cpu else None,
+            'loop_lag_p95_ms': ms(percentile(self.loop_lag, 95)),
+            'loop_lag_max_ms': ms(max(self.loop_lag, default=None)),
+            'gateway_latency_ms': ms(self.bot.latency) if math.isfinite(self.bot.latency) else None,
+            'extraction': self.extractor.stats(),
+            'cache': self.cache.stats(),
+            'gaps': self.gap_stats(),
+            'guilds': {str(guild_id): stats.summary() for guild_id, stats in list(self.audio_stats.items())},
+        }
 
     def get_queue(self, guild_id):
-        if guild_id not in self.queues:
-            self.queues[guild_id] = []
+        queue = self.queues.get(guild_id)
+        if queue is None:
+            queue = self.queues[guild_id] = TrackQueue(on_change=lambda op: self._queue_changed(guild_id, op))
         if guild_id not in self.repeat:
             self.repeat[guild_id] = False
-        return self.queues[guild_id]
+        return queue
 
     @app_commands.command(name="play", description="Jouer de la musique depuis YouTube")
     @app_commands.describe(query="URL ou titre de la musique")
@@ -100,16 +441,24 @@ class Music(commands.Cog):
                 return
 
         try:
-            player = await YTDLSource.from_url(query, loop=self.bot.loop, stream=True)
+            if is_playlist_url(query):
+                await self._play_playlist(interaction, voice_client, query)
+                return
+            track = Track.from_info(await self.cache.extract(query, interaction.guild.id), interaction.user.id)
             queue = self.get_queue(interaction.guild.id)
-            queue.append(player)
+            queue.append(track)
 
-            if not voice_client.is_playing():
+            if not (voice_client.is_playing() or voice_client.is_paused()):
                 # Start playback of the first item (async helper will schedule chaining)
                 await self._play_next(interaction.guild.id, voice_client)
-                await interaction.followup.send(f"🎵 En train de jouer: **{player.title}**")
+            current = self.current.get(interaction.guild.id)
+            if current and current[0] is track:
+                await interaction.followup.send(f"🎵 En train de jouer: **{track.title}**")
             else:
-                await interaction.followup.send(f"✅ Ajouté à la file d'attente: **{player.title}**")
+                # en pause, ou un autre _play_next a démarré une piste avant celle-ci
+                if len(queue) <= PREFETCH_DEPTH:
+                    self._prefetch(interaction.guild.id)
+                await interaction.followup.send(f"✅ Ajouté à la file d'attente: **{track.title}**")
         except RuntimeError as e:
             msg = str(e).lower()
             if "cookies" in msg or "cookiefile" in msg or "sign in to confirm" in msg:
@@ -120,34 +469,157 @@ class Music(commands.Cog):
             else:
                 await interaction.followup.send(f"❌ Erreur: {e}", ephemeral=True)
 
-    async def _play_next(self, guild_id, voice_client):
-        """Internal helper: play next track from queue. The after callback schedules this on the loop."""
+    def _enqueue_entries(self, guild_id, entries, requester_id):
+        """Ajoute des entrées de playlist (métadonnées seulement) à la file."""
+        queue = self.get_queue(guild_id)
+        short = len(queue) < PREFETCH_DEPTH
+        for entry in entries:
+            queue.append(Track.from_entry(entry, requester_id))
+        if short and guild_id in self.current:
+            self._prefetch(guild_id)
+        return len(entries)
+
+    async def _play_playlist(self, interaction, voice_client, url):
+        """Première page ajoutée et jouée tout de suite, la suite chargée en arrière-plan."""
+        gid = interaction.guild.id
+        first = min(PLAYLIST_FIRST_PAGE, PLAYLIST_MAX_TRACKS)
+        data = await self.extractor.extract_playlist(url, gid, 1, first)
+        added = self._enqueue_entries(gid, data['entries'], interaction.user.id)
+        if not added and data['listed'] < first:
+            await interaction.followup.send("❌ Playlist vide ou indisponible", ephemeral=True)
+            return
+        title = data.get('title') or "Playlist"
+        if not (voice_client.is_playing() or voice_client.is_paused()):
+            await self._play_next(gid, voice_client)
+        if data['listed'] < first or first >= PLAYLIST_MAX_TRACKS:
+            await interaction.followup.send(f"📃 Playlist **{title}**: {added} musiques ajoutées")
+            return
+        await interaction.followup.send(f"📃 Playlist **{title}**: {added} musiques ajoutées, chargement de la suite...")
+        task = asyncio.create_task(self._ingest(interaction, url, title, first + 1, added))
+        tasks = self._ingests.setdefault(gid, set())
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    async def _ingest(self, interaction, url, title, start, added):
+        """Pages suivantes de la playlist, jusqu'à PLAYLIST_MAX_TRACKS entrées."""
+        gid = interaction.guild.id
+        error = None
+        while start <= PLAYLIST_MAX_TRACKS:
+            end = min(start + PLAYLIST_PAGE - 1, PLAYLIST_MAX_TRACKS)
+            try:
+                data = await self.extractor.extract_playlist(url, gid, start, end)
+            except RuntimeError as e:
+                error = e
+                break
+            added += self._enqueue_entries(gid, data['entries'], interaction.user.id)
+            if data['listed'] <= end - start:
+                break
+            start = end + 1
+        message = f"✅ Playlist **{title}**: {added} musiques ajoutées au total"
+        if error:
+            message += f" (chargement interrompu: {error})"
+        elif start > PLAYLIST_MAX_TRACKS and (data.get('playlist_count') or 0) > PLAYLIST_MAX_TRACKS:
+            message += f" (limite de {PLAYLIST_MAX_TRACKS} atteinte)"
+        try:
+            await interaction.followup.send(message)
+        except discord.HTTPException:
+            pass
+
+    def _cancel_ingests(self, guild_id):
+        for task in self._ingests.pop(guild_id, ()):
+            task.cancel()
+
+    async def _play_next(self, guild_id, voice_client, ended=None, finished=None):
+        """Internal helper: play next track from queue. The after callback schedules this on the loop.
+
+        `ended`: time.perf_counter() à la fin de la piste précédente (mesure du blanc).
+        `finished`: piste qui vient de se terminer, reprise à sa position si le
+        flux a été coupé, remise en tête si repeat est actif.
+        """
+        lock = self._play_locks.setdefault(guild_id, asyncio.Lock())
+        async with lock:
+            if finished is not None:
+                player = self._sources.pop(guild_id, None)
+                skipped = guild_id in self._skip_repeat
+                self._skip_repeat.discard(guild_id)
+                if not skipped and self._dropped(guild_id, finished, player):
+                    # coupure réseau ou URL expirée: la piste reprend où elle s'était arrêtée
+                    if finished.stream_url == player.url:
+                        finished.expires = None
+                        self.cache.invalidate(finished.webpage_url)
+                    self._resume_at[guild_id] = player.position
+                    self.get_queue(guild_id).appendleft(finished)
+                elif self.repeat.get(guild_id, False) and not skipped:
+                    # replay the same entry (source rebuilt lazily)
+                    self.get_queue(guild_id).appendleft(finished)
+            await self._start_next(guild_id, voice_client, ended)
+
+    def _dropped(self, guild_id, track, player):
+        """True si `player` s'est arrêté avant la fin de `track` et qu'une reprise est encore permise."""
+        if player is None or not track.duration or player.position >= track.duration - STREAM_DROP_TOLERANCE:
+            self._drops.pop(guild_id, None)
+            return False
+        previous, resumes = self._drops.get(guild_id, (None, 0))
+        if previous is not track or player.position - player.start > 30:
+            # nouvelle piste, ou la précédente reprise a joué un moment
+            resumes = 0
+        if resumes >= MAX_STREAM_RESUMES:
+            self._drops.pop(guild_id, None)
+            print(f"Giving up on {track.title} after {resumes} stream resumes")
+            return False
+        self._drops[guild_id] = (track, resumes + 1)
+        print(f"Stream dropped at {player.position:.1f}s in {track.title}, resuming")
+        return True
+
+    async def _start_next(self, guild_id, voice_client, ended=None):
+        if voice_client.is_playing() or voice_client.is_paused():
+            return
+        self.current.pop(guild_id, None)
         queue = self.get_queue(guild_id)
-        if queue:
-            player = queue.pop(0)
+        while queue:
+            track = queue.popleft()
+            start = self._resume_at.pop(guild_id, 0.0)
+            try:
+                # seule la piste jouée possède une source (et un processus ffmpeg)
+                player = await track_source(
+                    track, self.cache, guild_id, self.volumes.get(guild_id), start, self._stats(guild_id)
+                )
+            except RuntimeError as e:
+                print(f"Skipping {track.title}: {e}")
+                continue
+            if not voice_client.is_connected():
+                player.cleanup()
+                queue.appendleft(track)
+                if start:
+                    self._resume_at[guild_id] = start
+                return
 
-            def _after(err):
+            def _after(err, track=track):
+                if self._closing:
+                    # cog déchargé: la session est déjà enregistrée
+                    return
+                ended = time.perf_counter()
                 if err:
                     print(f"Player error: {err}")
-                # if repeat enabled, recreate a source from player.data (stream case)
                 try:
-                    if self.repeat.get(guild_id, False):
-                        # attempt to recreate source for repeating
-                        try:
-                            data = getattr(player, "data", None)
-                            if data:
-                                src = discord.FFmpegPCMAudio(data['url'], **ffmpeg_options) if data.get('url') else None
-                                if src:
-                                    new_player = YTDLSource(src, data=data)
-                                    # append to front so it plays next
-                                    self.queues[guild_id].insert(0, new_player)
-                        except Exception as e:
-                            print(f"repeat recreate failed: {e}")
-                    asyncio.run_coroutine_threadsafe(self._play_next(guild_id, voice_client), self.bot.loop)
+                    # la file n'est modifiée que depuis la boucle
+                    asyncio.run_coroutine_threadsafe(self._play_next(guild_id, voice_client, ended, track), self.bot.loop)
                 except Exception as exc:
                     print(f"Failed to schedule next track: {exc}")
 
+            self._stats(guild_id).reset_cadence()
             voice_client.play(player, after=_after)
+            self._sources[guild_id] = player
+            if ended is not None:
+                self.gaps.append(time.perf_counter() - ended)
+            self.current[guild_id] = (track, time.monotonic() - start)
+            queue.history.appendleft(track)
+            self._save_session(guild_id, voice_client)
+            # pistes suivantes résolues pendant que celle-ci joue
+            self._prefetch(guild_id)
+            return
+        # file épuisée: rien à reprendre au redémarrage
+        self._end_session(guild_id)
 
     @app_commands.command(name="pause", description="Mettre en pause la musique")
     async def pause(self, interaction: discord.Interaction):
@@ -164,6 +636,7 @@ class Music(commands.Cog):
         """Reprendre la musique"""
         voice_client = interaction.guild.voice_client
         if voice_client and voice_client.is_paused():
+            self._stats(interaction.guild.id).reset_cadence()
             voice_client.resume()
             await interaction.response.send_message("▶️ Musique reprise")
         else:
@@ -174,7 +647,7 @@ class Music(commands.Cog):
         """Arrêter la musique et vider la file d'attente"""
         voice_client = interaction.guild.voice_client
         if voice_client:
-            self.queues[interaction.guild.id] = []
+            self._clear(interaction.guild.id)
             voice_client.stop()
             await interaction.response.send_message("⏹️ Musique arrêtée et file d'attente vidée")
         else:
@@ -185,6 +658,7 @@ class Music(commands.Cog):
         """Passer à la musique suivante"""
         voice_client = interaction.guild.voice_client
         if voice_client and voice_client.is_playing():
+            self._skip_repeat.add(interaction.guild.id)
             voice_client.stop()
             await interaction.response.send_message("⏭️ Musique passée")
         else:
@@ -199,8 +673,8 @@ class Music(commands.Cog):
             return
         
         embed = discord.Embed(title="📋 File d'attente", color=0x00ff00)
-        for i, player in enumerate(queue[:10], 1):
-            embed.add_field(name=f"{i}.", value=player.title, inline=False)
+        for i, track in enumerate(islice(queue, 10), 1):
+            embed.add_field(name=f"{i}.", value=track.title, inline=False)
         
         if len(queue) > 10:
             embed.set_footer(text=f"... et {len(queue) - 10} autres musiques")
@@ -212,7 +686,8 @@ class Music(commands.Cog):
         """Faire quitter le bot du salon vocal"""
         voice_client = interaction.guild.voice_client
         if voice_client:
-            self.queues[interaction.guild.id] = []
+            self._clear(interaction.guild.id)
+            self.audio_stats.pop(interaction.guild.id, None)
             await voice_client.disconnect()
             await interaction.response.send_message("👋 Déconnecté du salon vocal")
         else:
@@ -237,12 +712,30 @@ class Music(commands.Cog):
             await interaction.response.send_message("❌ Je ne suis pas dans un salon vocal.", ephemeral=True)
             return
 
+        volume = value / 100
+        self.volumes[interaction.guild.id] = volume
         src = getattr(voice_client, "source", None)
-        if src and hasattr(src, "volume"):
-            src.volume = value / 100
+        current = self.current.get(interaction.guild.id)
+        if isinstance(src, OpusSource) and current:
+            # volume appliqué par ffmpeg: la piste repart de la position courante
+            try:
+                stats = self._stats(interaction.guild.id)
+                voice_client.source = self._sources[interaction.guild.id] = make_source(
+                    current[0], volume, src.position, stats=stats
+                )
+                stats.reset_cadence()
+            except (ValueError, discord.ClientException) as e:
+                await interaction.response.send_message(f"❌ Impossible de changer le volume: {e}", ephemeral=True)
+                return
+            src.cleanup()
+            await interaction.response.send_message(f"🔊 Volume réglé à {value}%")
+        elif src and hasattr(src, "volume"):
+            src.volume = volume
             await interaction.response.send_message(f"🔊 Volume réglé à {value}%")
         else:
-            await interaction.response.send_message("❌ Impossible de changer le volume pour cette source.", ephemeral=True)
+            await interaction.response.send_message(f"🔊 Volume réglé à {value}% pour les prochaines musiques")
+        if current:
+            self._save_session(interaction.guild.id, voice_client)
 
     @app_commands.command(name="shuffle", description="Mélanger la file d'attente")
     async def shuffle(self, interaction: discord.Interaction):
@@ -251,7 +744,8 @@ class Music(commands.Cog):
         if not q:
             await interaction.response.send_message("📭 La file d'attente est vide", ephemeral=True)
             return
-        random.shuffle(q)
+        q.shuffle()
+        self._prefetch(interaction.guild.id)
         await interaction.response.send_message("🔀 File d'attente mélangée")
 
     @app_commands.command(name="remove", description="Retirer une musique de la file d'attente par index")
@@ -262,7 +756,9 @@ class Music(commands.Cog):
         if not q or index < 1 or index > len(q):
             await interaction.response.send_message("❌ Index invalide", ephemeral=True)
             return
-        removed = q.pop(index - 1)
+        removed = q.remove_at(index - 1)
+        if index <= PREFETCH_DEPTH:
+            self._prefetch(interaction.guild.id)
         await interaction.response.send_message(f"🗑️ Retiré: **{getattr(removed, 'title', 'Inconnu')}**")
 
     @app_commands.command(name="repeat", description="Basculer le mode repeat pour la guild")
@@ -270,7 +766,101 @@ class Music(commands.Cog):
         """Basculer le mode repeat pour la guild"""
         gid = interaction.guild.id
         self.repeat[gid] = not self.repeat.get(gid, False)
+        if gid in self.current:
+            self._save_session(gid, interaction.guild.voice_client)
         await interaction.response.send_message(f"🔁 Repeat {'activé' if self.repeat[gid] else 'désactivé'}")
 
+    @app_commands.command(name="move", description="Déplacer une musique dans la file d'attente")
+    @app_commands.describe(position="Position actuelle (1-based)", new_position="Nouvelle position (1-based)")
+    async def move(self, interaction: discord.Interaction, position: int, new_position: int):
+        """Déplacer une musique dans la file d'attente"""
+        q = self.get_queue(interaction.guild.id)
+        if not 1 <= position <= len(q) or not 1 <= new_position <= len(q):
+            await interaction.response.send_message("❌ Index invalide", ephemeral=True)
+            return
+        track = q.move(position - 1, new_position - 1)
+        if min(position, new_position) <= PREFETCH_DEPTH:
+            self._prefetch(interaction.guild.id)
+        await interaction.response.send_message(f"↕️ **{track.title}** déplacée en position {new_position}")
+
+    @app_commands.command(name="skipto", description="Passer directement à une musique de la file d'attente")
+    @app_commands.describe(position="Position (1-based) de la musique à jouer")
+    async def skipto(self, interaction: discord.Interaction, position: int):
+        """Passer directement à une musique de la file d'attente"""
+        gid = interaction.guild.id
+        voice_client = interaction.guild.voice_client
+        q = self.get_queue(gid)
+        if not voice_client or not voice_client.is_connected():
+            await interaction.response.send_message("❌ Je ne suis pas dans un salon vocal.", ephemeral=True)
+            return
+        if not 1 <= position <= len(q):
+            await interaction.response.send_message("❌ Index invalide", ephemeral=True)
+            return
+        q.skip_to(position - 1)
+        await interaction.response.send_message(f"⏭️ Passage à **{next(iter(q)).title}**")
+        if voice_client.is_playing() or voice_client.is_paused():
+            # la suite est lancée par le callback de fin de piste
+            self._skip_repeat.add(gid)
+            voice_client.stop()
+        else:
+            await self._play_next(gid, voice_client)
+
+    @app_commands.command(name="history", description="Afficher les dernières musiques jouées")
+    async def history(self, interaction: discord.Interaction):
+        """Afficher les dernières musiques jouées"""
+        history = self.get_queue(interaction.guild.id).history
+        if not history:
+            await interaction.response.send_message("📭 Aucune musique jouée récemment", ephemeral=True)
+            return
+        embed = discord.Embed(title="🕘 Historique", color=0x00ff00)
+        for i, track in enumerate(islice(history, 10), 1):
+            embed.add_field(name=f"{i}.", value=track.title, inline=False)
+        await interaction.response.send_message(embed=embed)
+
+    @app_commands.command(name="musicstats", description="Mesures de la lecture audio (propriétaire du bot)")
+    @app_commands.describe(export="Joindre toutes les mesures au format JSON")
+    async def musicstats(self, interaction: discord.Interaction, export: bool = False):
+        """Mesures de la lecture audio (propriétaire du bot)"""
+        if not await self.bot.is_owner(interaction.user):
+            await interaction.response.send_message("❌ Commande réservée au propriétaire du bot.", ephemeral=True)
+            return
+        metrics = self.metrics()
+        extraction, cache, gaps = metrics['extraction'], metrics['cache'], metrics['gaps']
+        embed = discord.Embed(title="📊 Lecture audio", color=0x00ff00)
+        embed.add_field(
+            name="Bot",
+            value=f"{metrics['guilds_playing']} serveur(s) en lecture · CPU {metrics['bot_cpu_pct']}%\n"
+                  f"Retard de la boucle p95 {metrics['loop_lag_p95_ms']} ms (max {metrics['loop_lag_max_ms']} ms)",
+            inline=False
+        )
+        embed.add_field(
+            name="Extraction",
+            value=f"p50 {extraction['latency_p50_ms']} ms · p95 {extraction['latency_p95_ms']} ms · "
+                  f"file {extraction['queue_depth']} · cache {cache['hit_rate']}\n"
+                  f"Blancs entre pistes p95 {gaps['gap_p95_ms']} ms · URL rafraîchies {gaps['urls_refreshed']}",
+            inline=False
+        )
+        # serveur courant d'abord, puis ceux qui décrochent le plus
+        guild_id = interaction.guild.id if interaction.guild else None
+        ranked = sorted(
+            metrics['guilds'].items(),
+            key=lambda item: (item[0] != str(guild_id), -item[1]['underruns'], -(item[1]['jitter_p99_ms'] or 0))
+        )
+        for gid, stats in ranked[:5]:
+            guild = self.bot.get_guild(int(gid))
+            rss = f"{stats['ffmpeg_rss_kb'] // 1024} Mo" if stats['ffmpeg_rss_kb'] else "?"
+            embed.add_field(
+                name=guild.name if guild else gid,
+                value=f"{stats['frames']} trames · {stats['underruns']} décrochages\n"
+                      f"Lecture p99 {stats['read_p99_ms']} ms · gigue p99 {stats['jitter_p99_ms']} ms\n"
+                      f"ffmpeg {stats['ffmpeg_cpu_pct']}% CPU · {rss} · extraction p95 {stats['extraction_p95_ms']} ms",
+                inline=False
+            )
+        kwargs = {}
+        if export:
+            payload = json.dumps(metrics, indent=2).encode()
+            kwargs['file'] = discord.File(io.BytesIO(payload), filename="music_metrics.json")
+        await interaction.response.send_message(embed=embed, ephemeral=True, **kwargs)
+
 async def setup(bot):
     await bot.add_cog(Music(bot))
\ No newline at end of file
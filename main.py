@@ -7,6 +7,8 @@ from dotenv import load_dotenv
 import logging
 import json
 
+from utils.persistence import PersistenceScheduler
+
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
 
@@ -34,6 +36,12 @@ class Bot(commands.Bot):
             # gardez "unknown" si échec
             pass
 
+        # Écritures disque regroupées pour tous les cogs (voir utils/persistence.py)
+        self.persistence = PersistenceScheduler(
+            interval=int(os.getenv("FLUSH_INTERVAL_MS", "500")) / 1000,
+            max_pending=int(os.getenv("FLUSH_MAX_PENDING", "200"))
+        )
+
         # Chargement des cogs
         self.initial_extensions = [
             'cogs.moderation',
@@ -44,6 +52,7 @@ class Bot(commands.Bot):
         ]
 
     async def setup_hook(self):
+        self.persistence.start()
         for extension in self.initial_extensions:
             try:
                 await self.load_extension(extension)
@@ -77,6 +86,11 @@ class Bot(commands.Bot):
             except Exception as e:
                 print(f"❌ Erreur lors de la synchro globale: {e}")
 
+    async def close(self):
+        # les cogs sont déchargés (flush final chacun) avant l'arrêt du scheduler
+        await super().close()
+        await self.persistence.close()
+
     async def on_ready(self):
         print(f'✅ {self.user} est connecté à Discord!')
         print(f'📊 Connecté à {len(self.guilds)} serveurs')
@@ -113,7 +127,7 @@ async def help(interaction: discord.Interaction):
     # Modération
     embed.add_field(
         name="🛡️ Modération",
-        value="`/ban`, `/kick`, `/mute`, `/clear`",
+        value="`/ban`, `/kick`, `/tempban`, `/mute`, `/clear`, `/sanctions`, `/automod`, `/massban`, `/raidmode`",
         inline=False
     )
     
@@ -141,7 +155,7 @@ async def help(interaction: discord.Interaction):
     # Économie
     embed.add_field(
         name="💰 Économie",
-        value="`/balance`, `/daily`, `/work`, `/pay`, `/leaderboard`",
+        value="`/balance`, `/daily`, `/work`, `/remind`, `/pay`, `/payall`, `/leaderboard`, `/rank`, `/statement`, `/export`",
         inline=False
     )
     
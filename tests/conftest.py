@@ -0,0 +1,5 @@
+import os
+import sys
+
+# modules du bot importables depuis les tests (utils/, cogs/)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
@@ -0,0 +1,144 @@
+import asyncio
+import json
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+from utils.economy_store import COOLDOWNS, SCHEMA_VERSION, USER_SHARDS, EconomyStore, TxType
+
+ALICE, BOB = 111111111111111111, 222222222222222222
+
+
+def iso_utc(dt):
+    # format de la version de base: datetime.utcnow().isoformat(), naïf
+    return dt.astimezone(timezone.utc).replace(tzinfo=None).isoformat()
+
+
+def baseline_data(now):
+    last_daily = now - timedelta(hours=2)
+    return {
+        str(ALICE): {
+            'balance': 340,
+            # datetime.now() naïf (heure locale) dans la version de base
+            'last_daily': last_daily.replace(tzinfo=None).isoformat(),
+            'last_work': None,
+            'transactions': [
+                {'time': iso_utc(now - timedelta(days=1)), 'type': 'daily', 'amount': 250,
+                 'note': "Récompense quotidienne"},
+                {'time': iso_utc(now - timedelta(hours=3)), 'type': 'pay_sent', 'amount': -10,
+                 'note': f"À {BOB}"},
+            ],
+        },
+        # ancien fichier sans clé transactions
+        str(BOB): {'balance': 110, 'last_daily': None, 'last_work': None},
+    }
+
+
+async def snapshot(store):
+    return {
+        'alice': await store.get_user(ALICE),
+        'bob': await store.get_user(BOB),
+        'alice_tx': await store.transactions(ALICE, limit=10),
+        'alice_count': await store.transaction_count(ALICE),
+        'bob_count': await store.transaction_count(BOB),
+        'cooldowns': await store.active_cooldowns(),
+        'top': await store.top(10),
+    }
+
+
+def open_and_snapshot(path, **kwargs):
+    async def main():
+        store = EconomyStore(str(path), **kwargs)
+        await store.open()
+        try:
+            return await snapshot(store)
+        finally:
+            await store.close()
+    return asyncio.run(main())
+
+
+def check(state, now):
+    assert state['alice'] == {'balance': 340}
+    assert state['bob'] == {'balance': 110}
+    assert state['top'] == [(ALICE, 340), (BOB, 110)]
+    assert state['alice_count'] == 2
+    assert state['bob_count'] == 0
+    newest, oldest = state['alice_tx']
+    assert (oldest['seq'], oldest['type'], oldest['amount']) == (0, 'daily', 250)
+    assert oldest['note'] == "Récompense quotidienne"
+    assert (newest['seq'], newest['type'], newest['amount']) == (1, 'pay_sent', -10)
+    # identifiant sorti de la note (colonne ref) puis recomposé
+    assert newest['note'] == f"À {BOB}"
+    assert abs(newest['time'] - int((now - timedelta(hours=3)).timestamp())) <= 1
+    expires = int((now - timedelta(hours=2)).timestamp()) + COOLDOWNS[TxType.DAILY]
+    [(kind, user_id, when)] = state['cooldowns']
+    assert (kind, user_id) == (int(TxType.DAILY), ALICE)
+    assert abs(when - expires) <= 1
+
+
+def test_migrates_baseline_json(tmp_path):
+    now = datetime.now().astimezone()
+    legacy = tmp_path / 'economy_data.json'
+    legacy.write_text(json.dumps(baseline_data(now)), encoding='utf-8')
+    db = tmp_path / 'economy.db'
+
+    state = open_and_snapshot(
+        db, legacy_json=str(legacy), legacy_journal=str(tmp_path / 'economy_journal.jsonl')
+    )
+    check(state, now)
+    assert not legacy.exists()
+    assert (tmp_path / 'economy_data.json.migrated').exists()
+    with sqlite3.connect(db) as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+
+
+def test_upgrades_v1_database(tmp_path):
+    """Base créée par le premier stockage SQLite (user_version 0, ISO en texte)."""
+    now = datetime.now().astimezone()
+    data = baseline_data(now)
+    db = tmp_path / 'economy.db'
+    conn = sqlite3.connect(db)
+    conn.executescript("""
+        CREATE TABLE users (
+            user_id INTEGER PRIMARY KEY,
+            balance INTEGER NOT NULL DEFAULT 100,
+            last_daily TEXT,
+            last_work TEXT
+        );
+        CREATE INDEX idx_users_balance ON users(balance DESC, user_id);
+        CREATE TABLE transactions (
+            user_id INTEGER NOT NULL,
+            time TEXT NOT NULL,
+            type TEXT NOT NULL,
+            amount INTEGER NOT NULL,
+            note TEXT NOT NULL DEFAULT ''
+        );
+        CREATE INDEX idx_transactions_user_time ON transactions(user_id, time);
+    """)
+    for uid, user in data.items():
+        conn.execute(
+            "INSERT INTO users (user_id, balance, last_daily, last_work) VALUES (?, ?, ?, ?)",
+            (int(uid), user['balance'], user['last_daily'], user['last_work'])
+        )
+        for t in user.get('transactions', []):
+            conn.execute(
+                "INSERT INTO transactions (user_id, time, type, amount, note) VALUES (?, ?, ?, ?, ?)",
+                (int(uid), t['time'], t['type'], t['amount'], t['note'])
+            )
+    conn.commit()
+    conn.close()
+
+    check(open_and_snapshot(db), now)
+    with sqlite3.connect(db) as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        shards = dict(conn.execute("SELECT user_id, shard FROM users"))
+    assert shards == {ALICE: ALICE % USER_SHARDS, BOB: BOB % USER_SHARDS}
+
+
+def test_reopening_migrated_database_is_stable(tmp_path):
+    now = datetime.now().astimezone()
+    legacy = tmp_path / 'economy_data.json'
+    legacy.write_text(json.dumps(baseline_data(now)), encoding='utf-8')
+    db = tmp_path / 'economy.db'
+    journal = str(tmp_path / 'economy_journal.jsonl')
+    first = open_and_snapshot(db, legacy_json=str(legacy), legacy_journal=journal)
+    assert open_and_snapshot(db, legacy_json=str(legacy), legacy_journal=journal) == first
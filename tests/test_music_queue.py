@@ -0,0 +1,108 @@
+import random
+
+from utils.music_queue import Track, TrackQueue
+
+
+def track(n):
+    return Track(f"t{n}", f"https://example.com/{n}")
+
+
+def titles(queue):
+    return [t.title for t in queue]
+
+
+class Recorder:
+    """Rejoue les opérations émises comme le ferait MusicStore."""
+
+    def __init__(self):
+        self.rows = {}  # entry_id -> [clé, Track]
+
+    def __call__(self, op):
+        if op[0] == 'add':
+            self.rows[op[1]] = [op[2], op[3]]
+        elif op[0] == 'remove':
+            del self.rows[op[1]]
+        elif op[0] == 'key':
+            self.rows[op[1]][0] = op[2]
+        elif op[0] == 'clear':
+            self.rows.clear()
+
+    def restored(self):
+        queue = TrackQueue()
+        queue.restore([(entry_id, key, t) for entry_id, (key, t) in self.rows.items()])
+        return queue
+
+
+def test_move_skip_to_and_restore_keep_order():
+    rng = random.Random(5)
+    recorder = Recorder()
+    queue = TrackQueue(on_change=recorder)
+    expected = []
+    for n in range(40):
+        queue.append(track(n))
+        expected.append(f"t{n}")
+    for step in range(1500):
+        r = rng.random()
+        if r < 0.1 and expected:
+            index = rng.randrange(len(expected))
+            queue.remove_at(index)
+            del expected[index]
+        elif r < 0.15:
+            queue.appendleft(track(100 + step))
+            expected.insert(0, f"t{100 + step}")
+        elif r < 0.25:
+            queue.append(track(100 + step))
+            expected.append(f"t{100 + step}")
+        elif r < 0.27:
+            skipped = queue.skip_to(rng.randrange(3))
+            del expected[:skipped]
+        elif expected:
+            src, dst = rng.randrange(len(expected)), rng.randrange(len(expected))
+            queue.move(src, dst)
+            expected.insert(dst, expected.pop(src))
+        assert titles(queue) == expected
+    # l'état persisté (clés réelles) redonne le même ordre
+    assert titles(recorder.restored()) == expected
+
+
+def test_repeated_moves_to_same_gap_renumber():
+    recorder = Recorder()
+    queue = TrackQueue(on_change=recorder)
+    for n in range(4):
+        queue.append(track(n))
+    expected = ["t0", "t1", "t2", "t3"]
+    renumbered = []
+    renumber = queue._renumber
+    queue._renumber = lambda: (renumbered.append(True), renumber())
+    # la dernière juste après t1 (clé 1.0): l'écart est divisé par deux à
+    # chaque fois, jusqu'à épuiser la précision des flottants
+    for _ in range(80):
+        queue.move(3, 2)
+        expected.insert(2, expected.pop())
+        assert titles(queue) == expected
+        assert titles(recorder.restored()) == expected
+    assert renumbered
+    keys = [recorder.rows[entry_id][0] for entry_id in queue._live_ids()]
+    assert keys == sorted(keys) and len(set(keys)) == len(keys)
+
+
+def test_move_out_of_range_is_ignored():
+    queue = TrackQueue()
+    for n in range(3):
+        queue.append(track(n))
+    assert queue.move(3, 0) is None
+    assert queue.move(0, 5) is None
+    assert queue.move(2, 0).title == "t2"
+    assert titles(queue) == ["t2", "t0", "t1"]
+
+
+def test_restore_continues_ids_after_persisted_ones():
+    recorder = Recorder()
+    queue = TrackQueue(on_change=recorder)
+    for n in range(3):
+        queue.append(track(n))
+    queue.popleft()
+    restored = recorder.restored()
+    entry_id = restored.append(track(9))
+    assert entry_id not in recorder.rows
+    assert titles(restored) == ["t1", "t2", "t9"]
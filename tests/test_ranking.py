@@ -0,0 +1,66 @@
+import random
+
+from utils.ranking import RankIndex
+
+
+def expected(balances):
+    return [(u, -b) for b, u in sorted((-b, u) for u, b in balances.items())]
+
+
+def check(index, balances):
+    ranked = expected(balances)
+    assert len(index) == len(balances)
+    assert index.page(0, len(ranked) + 10) == ranked
+    for position, (user_id, _) in enumerate(ranked, 1):
+        assert index.rank(user_id) == position
+
+
+def test_build_orders_by_balance_then_id():
+    index = RankIndex()
+    index.build([(3, 50), (1, 50), (2, 200)])
+    assert index.page(0, 10) == [(2, 200), (1, 50), (3, 50)]
+    assert index.rank(3) == 3
+    assert index.rank(42) is None
+
+
+def test_updates_and_discards_keep_ranks_exact():
+    rng = random.Random(7)
+    # petit LOAD: découpages et suppressions de seaux à chaque itération
+    index = RankIndex()
+    index.LOAD = 4
+    balances = {u: rng.randint(0, 100) for u in range(200)}
+    index.build(balances.items())
+    for _ in range(2000):
+        user_id = rng.randrange(250)
+        if rng.random() < 0.2:
+            index.discard(user_id)
+            balances.pop(user_id, None)
+        else:
+            balances[user_id] = rng.randint(0, 100)
+            index.update(user_id, balances[user_id])
+    check(index, balances)
+
+
+def test_pages_from_offset():
+    index = RankIndex()
+    index.LOAD = 3
+    balances = {u: u % 17 for u in range(60)}
+    index.build(balances.items())
+    ranked = expected(balances)
+    for offset in (0, 5, 29, 58, 60):
+        assert index.page(offset, 7) == ranked[offset:offset + 7]
+
+
+def test_subset_page_and_rank_match_filtered_ranking():
+    rng = random.Random(3)
+    index = RankIndex()
+    balances = {u: rng.randint(0, 30) for u in range(500)}
+    index.build(balances.items())
+    # membres sans compte inclus: ignorés
+    members = set(rng.sample(range(600), 150))
+    ranked = [(u, b) for u, b in expected(balances) if u in members]
+    assert index.subset_count(members) == len(ranked)
+    for offset in (0, 10, len(ranked) - 3, len(ranked)):
+        assert index.subset_page(members, offset, 10) == ranked[offset:offset + 10]
+    for position, (user_id, _) in enumerate(ranked, 1):
+        assert index.subset_rank(user_id, members) == position
@@ -0,0 +1,65 @@
+import random
+
+from utils.timing_wheel import TimingWheel
+
+
+def make_wheel(start=1000):
+    now = [start]
+    # 4 cases par roue: 4 s, 16 s, 64 s, 256 s -> les 4 niveaux servent vite
+    wheel = TimingWheel(tick=1, slots=4, levels=4, clock=lambda: now[0])
+    return wheel, now
+
+
+def run(wheel, until):
+    """{clé: tick d'expiration} en avançant d'un tick à la fois."""
+    fired = {}
+    for t in range(wheel.current + 1, until + 1):
+        for key in wheel.advance(t):
+            assert key not in fired
+            fired[key] = t
+    return fired
+
+
+def test_expiry_on_exact_tick_across_all_levels():
+    rng = random.Random(11)
+    wheel, now = make_wheel()
+    due = {}
+    for key in range(500):
+        due[key] = now[0] + rng.randint(1, 1200)  # au-delà du dernier niveau aussi
+        wheel.schedule(key, due[key])
+    fired = run(wheel, now[0] + 1200)
+    assert fired == due
+    assert len(wheel) == 0
+
+
+def test_level_boundaries():
+    wheel, _ = make_wheel(start=0)
+    # juste avant/après chaque frontière de niveau (4, 16, 64, 256)
+    delays = [d + e for d in (4, 16, 64, 256) for e in (-1, 0, 1)]
+    for delay in delays:
+        wheel.schedule(delay, delay)
+    assert run(wheel, 300) == {delay: delay for delay in delays}
+
+
+def test_large_jump_returns_every_key_in_order():
+    wheel, now = make_wheel()
+    for key, delay in enumerate([900, 3, 70, 17, 260]):
+        wheel.schedule(key, now[0] + delay)
+    assert wheel.advance(now[0] + 1000) == [1, 3, 2, 4, 0]
+
+
+def test_past_deadline_fires_on_next_tick():
+    wheel, now = make_wheel()
+    wheel.schedule('late', now[0] - 50)
+    assert wheel.advance(now[0]) == []
+    assert wheel.advance(now[0] + 1) == ['late']
+
+
+def test_reschedule_and_cancel():
+    wheel, now = make_wheel()
+    wheel.schedule('a', now[0] + 100)
+    wheel.schedule('a', now[0] + 5)
+    wheel.schedule('b', now[0] + 20)
+    assert wheel.cancel('b')
+    assert not wheel.cancel('b')
+    assert run(wheel, now[0] + 200) == {'a': now[0] + 5}
@@ -0,0 +1,75 @@
+import asyncio
+
+from utils.transfers import AccountLocks
+
+
+class RecordingLock(asyncio.Lock):
+    def __init__(self, user_id, order):
+        super().__init__()
+        self.user_id = user_id
+        self.order = order
+
+    async def acquire(self):
+        self.order.append(self.user_id)
+        return await super().acquire()
+
+
+def test_locks_taken_in_sorted_order():
+    async def main():
+        locks = AccountLocks()
+        order = []
+        held = []
+
+        def get(user_id):
+            lock = RecordingLock(user_id, order)
+            held.append(lock)
+            return lock
+
+        locks._get = get
+        async with locks.hold(30, 10, 20, 10):
+            pass
+        return order
+
+    assert asyncio.run(main()) == [10, 20, 30]
+
+
+def test_opposite_transfers_do_not_deadlock():
+    async def main():
+        locks = AccountLocks()
+        balances = {1: 100, 2: 100}
+
+        async def transfer(sender, receiver, amount):
+            async with locks.hold(sender, receiver):
+                # lecture, attente, écriture: une double dépense passerait ici
+                balance = balances[sender]
+                await asyncio.sleep(0)
+                if balance >= amount:
+                    balances[sender] = balance - amount
+                    balances[receiver] += amount
+
+        jobs = [transfer(1, 2, 30) if i % 2 else transfer(2, 1, 30) for i in range(20)]
+        await asyncio.wait_for(asyncio.gather(*jobs), timeout=5)
+        return balances
+
+    balances = asyncio.run(main())
+    assert sum(balances.values()) == 200
+    assert min(balances.values()) >= 0
+
+
+def test_no_double_spend():
+    async def main():
+        locks = AccountLocks()
+        balances = {1: 50, 2: 0, 3: 0}
+
+        async def pay(receiver):
+            async with locks.hold(1, receiver):
+                balance = balances[1]
+                await asyncio.sleep(0)
+                if balance >= 50:
+                    balances[1] = balance - 50
+                    balances[receiver] += 50
+
+        await asyncio.gather(pay(2), pay(3))
+        return balances
+
+    assert sorted(asyncio.run(main()).values()) == [0, 0, 50]
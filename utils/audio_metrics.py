@@ -0,0 +1,118 @@
+import os
+from collections import deque
+
+from utils.extraction import LATENCY_SAMPLES, percentile
+
+# durée d'une trame audio lue par le lecteur discord.py
+FRAME_SECONDS = 0.02
+# trames gardées par serveur (une minute de lecture)
+FRAME_SAMPLES = 3000
+# échantillons CPU/RSS de ffmpeg gardés par serveur
+PROCESS_SAMPLES = 120
+# lecture en retard de plus d'une trame entière sur la cadence: le client
+# Discord n'a plus rien à jouer
+UNDERRUN_SECONDS = 2 * FRAME_SECONDS
+
+
+def process_cpu(pid):
+    """Temps CPU (s) consommé par `pid`, lu dans /proc (None hors Linux ou processus terminé)."""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def process_rss(pid):
+    """Mémoire résidente (Ko) de `pid`, lue dans /proc."""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except (OSError, IndexError, ValueError):
+        pass
+    return None
+
+
+def ffmpeg_pid(source):
+    """pid du processus ffmpeg derrière une source du cog (None si aucun)."""
+    original = getattr(source, 'original', source)
+    process = getattr(original, '_process', None)
+    return process.pid if process else None
+
+
+def _ms(value, digits=2):
+    return None if value is None else round(value * 1000, digits)
+
+
+class GuildAudioStats:
+    """Mesures de lecture d'un serveur, en anneaux de taille fixe.
+
+    `frame()` est appelé par la source à chaque trame, depuis le thread du
+    lecteur: deux appels perf_counter et deux ajouts en deque, rien d'autre.
+    Le reste (percentiles, CPU de ffmpeg) est calculé à la demande ou par
+    l'échantillonneur du cog.
+    """
+
+    __slots__ = ('reads', 'jitter', 'frames', 'underruns', 'extractions', 'cpu', 'rss', '_last', '_cpu_prev')
+
+    def __init__(self):
+        self.reads = deque(maxlen=FRAME_SAMPLES)  # durée de read() d'une trame (s)
+        self.jitter = deque(maxlen=FRAME_SAMPLES)  # intervalle entre deux trames - 20 ms (s)
+        self.frames = 0
+        self.underruns = 0
+        self.extractions = deque(maxlen=LATENCY_SAMPLES)  # extractions yt-dlp du serveur (s)
+        self.cpu = deque(maxlen=PROCESS_SAMPLES)  # CPU de ffmpeg (% d'un cœur)
+        self.rss = None  # mémoire de ffmpeg au dernier échantillon (Ko)
+        self._last = None
+        self._cpu_prev = None  # (pid, temps CPU, horloge)
+
+    def frame(self, start, end):
+        """Trame lue entre `start` et `end` (time.perf_counter())."""
+        self.frames += 1
+        self.reads.append(end - start)
+        last = self._last
+        self._last = start
+        if last is not None:
+            interval = start - last
+            self.jitter.append(interval - FRAME_SECONDS)
+            if interval > UNDERRUN_SECONDS:
+                self.underruns += 1
+
+    def reset_cadence(self):
+        """Pause, changement de piste ou de source: l'intervalle suivant n'est pas compté."""
+        self._last = None
+
+    def sample_process(self, pid, now):
+        """Échantillon CPU/RSS du processus ffmpeg `pid` (horloge `now`, s)."""
+        cpu = process_cpu(pid) if pid else None
+        if cpu is None:
+            self._cpu_prev = None
+            return
+        previous = self._cpu_prev
+        if previous is not None and previous[0] == pid and now > previous[2]:
+            self.cpu.append((cpu - previous[1]) / (now - previous[2]) * 100)
+        self._cpu_prev = (pid, cpu, now)
+        self.rss = process_rss(pid)
+
+    def summary(self):
+        # copies d'abord (list() et sorted() sur une deque ne rendent pas le
+        # GIL): le thread du lecteur continue d'ajouter pendant le calcul
+        reads = sorted(self.reads)
+        jitter = sorted(abs(value) for value in list(self.jitter))
+        return {
+            'frames': self.frames,
+            'underruns': self.underruns,
+            'read_p50_ms': _ms(percentile(reads, 50), 3),
+            'read_p99_ms': _ms(percentile(reads, 99), 3),
+            'read_max_ms': _ms(reads[-1] if reads else None, 3),
+            'jitter_p50_ms': _ms(percentile(jitter, 50)),
+            'jitter_p99_ms': _ms(percentile(jitter, 99)),
+            'ffmpeg_cpu_pct': round(self.cpu[-1], 1) if self.cpu else None,
+            'ffmpeg_cpu_p95_pct': round(percentile(self.cpu, 95), 1) if self.cpu else None,
+            'ffmpeg_rss_kb': self.rss,
+            'extraction_p50_ms': _ms(percentile(self.extractions, 50), 1),
+            'extraction_p95_ms': _ms(percentile(self.extractions, 95), 1),
+        }
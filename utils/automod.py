@@ -0,0 +1,155 @@
+import re
+import time
+import zlib
+from array import array
+from collections import OrderedDict
+
+# messages mémorisés par utilisateur: toutes les fenêtres glissantes lisent
+# au plus RING entrées, le travail par message est donc constant
+RING = 8
+# seuils (les comptes de messages doivent rester <= RING)
+SPAM_COUNT = 5
+SPAM_SECONDS = 5
+MENTION_LIMIT = 8
+MENTION_SECONDS = 10
+DUPLICATE_COUNT = 3
+DUPLICATE_SECONDS = 30
+# délai minimal entre deux sanctions automatiques pour un même membre
+ACTION_COOLDOWN = 30
+
+RULES = {
+    'words': "mot interdit",
+    'spam': "spam",
+    'mentions': "mentions en masse",
+    'duplicates': "messages répétés",
+}
+ACTIONS = ('delete', 'warn', 'mute', 'kick')
+
+
+_TOKEN = re.compile(r"\w+")
+
+
+def compile_words(words):
+    """(mots simples, regex des expressions) pour une liste de mots interdits.
+
+    Les mots simples sont cherchés par jeton dans un ensemble (coût
+    indépendant de la taille de la liste); seules les expressions de
+    plusieurs mots passent par une regex unique, les plus longues d'abord.
+    """
+    singles = frozenset(w for w in words if _TOKEN.fullmatch(w))
+    phrases = sorted({re.escape(w) for w in words if w not in singles}, key=len, reverse=True)
+    pattern = re.compile(r"(?<!\w)(?:" + "|".join(phrases) + r")(?!\w)") if phrases else None
+    return singles, pattern
+
+
+class AutomodConfig:
+    __slots__ = ('enabled', 'action', 'words', 'singles', 'pattern')
+
+    def __init__(self, enabled=False, action='warn', words=()):
+        self.enabled = enabled
+        self.action = action
+        self.words = sorted({w.lower() for w in words})
+        self.singles, self.pattern = compile_words(self.words)
+
+    def matches(self, content):
+        """True si `content` contient un mot ou une expression interdite."""
+        if not self.words or not content:
+            return False
+        content = content.lower()
+        if self.singles and not self.singles.isdisjoint(_TOKEN.findall(content)):
+            return True
+        return self.pattern is not None and self.pattern.search(content) is not None
+
+
+class UserWindow:
+    """Derniers messages d'un membre dans des tableaux circulaires compacts."""
+
+    __slots__ = ('times', 'mentions', 'digests', 'pos', 'last_action')
+
+    def __init__(self):
+        self.times = array('d', [float('-inf')] * RING)
+        self.mentions = array('H', bytes(2 * RING))
+        self.digests = array('L', [0] * RING)
+        self.pos = 0
+        self.last_action = 0.0
+
+    def push(self, now, mentions, digest):
+        i = self.pos
+        self.times[i] = now
+        self.mentions[i] = min(mentions, 0xffff)
+        self.digests[i] = digest
+        self.pos = (i + 1) % RING
+
+    def count_since(self, since):
+        return sum(1 for t in self.times if t >= since)
+
+    def mentions_since(self, since):
+        return sum(m for t, m in zip(self.times, self.mentions) if t >= since)
+
+    def duplicates_since(self, digest, since):
+        return sum(1 for t, d in zip(self.times, self.digests) if t >= since and d == digest)
+
+
+class Automod:
+    """Détection par message en O(1): liste de mots compilée par serveur +
+    fenêtres glissantes par membre (LRU bornée à `max_users` fenêtres).
+    """
+
+    def __init__(self, max_users=50000, clock=time.monotonic):
+        self.configs = {}  # guild_id -> AutomodConfig
+        self.max_users = max_users
+        self.clock = clock
+        self._windows = OrderedDict()  # (guild_id, user_id) -> UserWindow
+
+    def configure(self, guild_id, enabled=None, action=None, words=None):
+        """Met à jour la configuration d'un serveur (liste recompilée une fois)."""
+        old = self.configs.get(guild_id) or AutomodConfig()
+        config = AutomodConfig(
+            old.enabled if enabled is None else enabled,
+            old.action if action is None else action,
+            old.words if words is None else words
+        )
+        self.configs[guild_id] = config
+        return config
+
+    def _window(self, key):
+        window = self._windows.get(key)
+        if window is None:
+            window = self._windows[key] = UserWindow()
+            if len(self._windows) > self.max_users:
+                self._windows.popitem(last=False)
+        else:
+            self._windows.move_to_end(key)
+        return window
+
+    def check(self, guild_id, user_id, content, mentions=0):
+        """Règle enfreinte par ce message ('words', 'spam'...), ou None."""
+        config = self.configs.get(guild_id)
+        if config is None or not config.enabled:
+            return None
+        now = self.clock()
+        window = self._window((guild_id, user_id))
+        digest = zlib.crc32(content.lower().encode()) if content else 0
+        window.push(now, mentions, digest)
+        if config.matches(content):
+            return 'words'
+        if window.count_since(now - SPAM_SECONDS) >= SPAM_COUNT:
+            return 'spam'
+        # sans mention dans ce message, le total n'a pas pu franchir le seuil
+        if mentions and window.mentions_since(now - MENTION_SECONDS) >= MENTION_LIMIT:
+            return 'mentions'
+        if digest and window.duplicates_since(digest, now - DUPLICATE_SECONDS) >= DUPLICATE_COUNT:
+            return 'duplicates'
+        return None
+
+    def should_act(self, guild_id, user_id):
+        """True au plus une fois par ACTION_COOLDOWN pour un membre (les
+        messages fautifs suivants sont seulement supprimés)."""
+        window = self._windows.get((guild_id, user_id))
+        if window is None:
+            return True
+        now = self.clock()
+        if now - window.last_action < ACTION_COOLDOWN:
+            return False
+        window.last_action = now
+        return True
@@ -0,0 +1,115 @@
+import time
+
+from utils.timing_wheel import TimingWheel
+
+# entrée spéciale de la roue: purge périodique des cooldowns expirés
+_PRUNE_KEY = -1
+PRUNE_INTERVAL = 3600
+
+
+def _key(kind, user_id):
+    return user_id << 8 | int(kind)
+
+
+class Cooldown:
+    """Expirations (secondes epoch) d'une commande: user_id -> expires.
+
+    Seuls les cooldowns actifs sont gardés; "prêt ?" est une lecture de dict.
+    """
+
+    def __init__(self, duration):
+        self.duration = duration
+        self._expires = {}
+
+    def __len__(self):
+        return len(self._expires)
+
+    def expires(self, user_id, now=None):
+        """Fin du cooldown en cours, ou None si la commande est disponible."""
+        expires = self._expires.get(user_id)
+        if expires is not None and expires <= (time.time() if now is None else now):
+            del self._expires[user_id]
+            return None
+        return expires
+
+    def ready(self, user_id, now=None):
+        return self.expires(user_id, now) is None
+
+    def set(self, user_id, expires):
+        self._expires[user_id] = expires
+
+    def prune(self, now=None):
+        now = time.time() if now is None else now
+        expired = [u for u, e in self._expires.items() if e <= now]
+        for user_id in expired:
+            del self._expires[user_id]
+        return len(expired)
+
+
+class CooldownEngine:
+    """Cooldowns par commande + rappels "c'est prêt" en message privé.
+
+    Les commandes sont identifiées par un code entier (TxType). Les rappels
+    des utilisateurs inscrits sont des entrées d'une unique TimingWheel;
+    `on_ready(kind, user_id)` est appelé à l'échéance.
+    """
+
+    def __init__(self, durations, on_ready):
+        self.tables = {kind: Cooldown(duration) for kind, duration in durations.items()}
+        self.on_ready = on_ready
+        self.wheel = TimingWheel()
+        self._optins = set()  # clés (kind, user_id) encodées
+
+    def load(self, cooldowns, reminders, now=None):
+        """Charge [(kind, user_id, expires)] et [(kind, user_id)] depuis le stockage."""
+        now = int(time.time()) if now is None else now
+        for kind, user_id, expires in cooldowns:
+            if kind in self.tables and expires > now:
+                self.tables[kind].set(user_id, expires)
+        for kind, user_id in reminders:
+            if kind in self.tables:
+                self._optins.add(_key(kind, user_id))
+                expires = self.tables[kind].expires(user_id, now)
+                if expires is not None:
+                    self.wheel.schedule(_key(kind, user_id), expires)
+
+    def start(self):
+        self.wheel.schedule(_PRUNE_KEY, time.time() + PRUNE_INTERVAL)
+        self.wheel.start(self._fire)
+
+    def stop(self):
+        self.wheel.stop()
+
+    def _fire(self, key):
+        if key == _PRUNE_KEY:
+            for table in self.tables.values():
+                table.prune()
+            self.wheel.schedule(_PRUNE_KEY, time.time() + PRUNE_INTERVAL)
+            return
+        self.on_ready(key & 0xff, key >> 8)
+
+    def expires(self, kind, user_id, now=None):
+        return self.tables[kind].expires(user_id, now)
+
+    def trigger(self, kind, user_id, now=None):
+        """Démarre le cooldown et programme le rappel si l'utilisateur est inscrit."""
+        now = int(time.time()) if now is None else now
+        expires = now + self.tables[kind].duration
+        self.tables[kind].set(user_id, expires)
+        if _key(kind, user_id) in self._optins:
+            self.wheel.schedule(_key(kind, user_id), expires)
+        return expires
+
+    def reminder(self, kind, user_id):
+        return _key(kind, user_id) in self._optins
+
+    def set_reminder(self, kind, user_id, enabled):
+        key = _key(kind, user_id)
+        if not enabled:
+            self._optins.discard(key)
+            self.wheel.cancel(key)
+            return
+        self._optins.add(key)
+        expires = self.tables[kind].expires(user_id)
+        if expires is not None:
+            self.wheel.schedule(key, expires)
@@ -0,0 +1,611 @@
+import asyncio
+import os
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from enum import IntEnum
+
+from utils.journal import Journal
+
+START_BALANCE = 100
+
+SCHEMA_VERSION = 5
+# partition des comptes (cache mémoire): shard = user_id % USER_SHARDS
+USER_SHARDS = 256
+# Historique complet, sans plafond: la transaction n° seq d'un utilisateur
+# (users.tx_count) a la clé (user_id, seq); pages et exports parcourent la
+# clé primaire par plage (keyset), jamais par OFFSET. Les notes sont internées
+# (table notes) et l'identifiant éventuel qu'elles contiennent va dans `ref`.
+# Cooldowns: fin du cooldown en secondes epoch par (commande, utilisateur);
+# la commande est identifiée par son TxType. Les bases < v4 gardent les
+# anciennes colonnes users.last_daily/last_work, qui ne sont plus lues.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id INTEGER PRIMARY KEY,
+    balance INTEGER NOT NULL DEFAULT 100,
+    tx_count INTEGER NOT NULL DEFAULT 0,
+    shard INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_users_balance ON users(balance DESC, user_id);
+CREATE INDEX IF NOT EXISTS idx_users_shard ON users(shard);
+CREATE TABLE IF NOT EXISTS notes (
+    note_id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS transactions (
+    user_id INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    time INTEGER NOT NULL,
+    type INTEGER NOT NULL,
+    amount INTEGER NOT NULL,
+    note_id INTEGER NOT NULL,
+    ref INTEGER,
+    PRIMARY KEY (user_id, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_transactions_user_time ON transactions(user_id, time);
+CREATE TABLE IF NOT EXISTS cooldowns (
+    kind INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    expires INTEGER NOT NULL,
+    PRIMARY KEY (kind, user_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS reminders (
+    kind INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    PRIMARY KEY (kind, user_id)
+) WITHOUT ROWID;
+"""
+
+# identifiant en fin de note ("À 1234", "Par 1234"...) -> stocké dans `ref`
+NOTE_REF = re.compile(r"^(.*?)([1-9][0-9]*)$", re.S)
+
+
+class TxType(IntEnum):
+    """Codes des types de transaction (le nom en minuscules est affiché)."""
+    OTHER = 0
+    DAILY = 1
+    WORK = 2
+    PAY_SENT = 3
+    PAY_RECEIVED = 4
+    GAMBLE_WIN = 5
+    GAMBLE_LOSS = 6
+    GAMBLE_JACKPOT = 7
+    ADMIN_GIVE = 8
+    ADMIN_SET = 9
+    ADMIN_RESET = 10
+
+    @classmethod
+    def parse(cls, value):
+        if isinstance(value, str):
+            return cls.__members__.get(value.upper(), cls.OTHER)
+        return cls(value)
+
+    def __str__(self):
+        return self.name.lower()
+
+
+# durée des cooldowns par commande, en secondes
+COOLDOWNS = {TxType.DAILY: 24 * 3600, TxType.WORK: 3600}
+COOLDOWN_FIELDS = {TxType.DAILY: 'last_daily', TxType.WORK: 'last_work'}
+
+
+def _apply_legacy_record(state, record):
+    """Rejoue un record de l'ancien journal JSON (voir `_migrate_legacy`)."""
+    user = state.setdefault(record['u'], {'balance': START_BALANCE, 'transactions': []})
+    if 'set' in record:
+        user.update(record['set'])
+    if 'tx' in record:
+        user.setdefault('transactions', []).append(record['tx'])
+
+
+def _iso_to_epoch(value):
+    """Horodatage ISO des anciens formats (UTC naïf) -> secondes epoch."""
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+def _cooldown_rows(user_id, user):
+    """Anciens last_daily/last_work (datetime.now() naïf, heure locale) -> lignes cooldowns."""
+    for kind, field in COOLDOWN_FIELDS.items():
+        if user.get(field):
+            yield int(kind), user_id, int(datetime.fromisoformat(user[field]).timestamp()) + COOLDOWNS[kind]
+
+
+class ShardedUserCache:
+    """Lignes `users` en mémoire, partitionnées par shard (user_id % USER_SHARDS).
+
+    Un shard est chargé d'un bloc au premier accès (requête indexée sur
+    users.shard); les shards les moins récemment utilisés sont évincés dès
+    que le nombre de lignes résidentes dépasse `max_users`. Le démarrage ne
+    charge rien. Utilisé uniquement depuis le thread DB.
+    """
+
+    def __init__(self, load_shard, max_users):
+        self._load_shard = load_shard  # shard_id -> {user_id: balance}
+        self.max_users = max_users
+        self._shards = OrderedDict()
+        self.size = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def resident(self, user_id):
+        return user_id % USER_SHARDS in self._shards
+
+    def get(self, user_id):
+        shard_id = user_id % USER_SHARDS
+        shard = self._shards.get(shard_id)
+        if shard is None:
+            shard = self._shards[shard_id] = self._load_shard(shard_id)
+            self.size += len(shard)
+            self.loads += 1
+            self._evict()
+        else:
+            self._shards.move_to_end(shard_id)
+        return shard.get(user_id)
+
+    def put(self, user_id, balance):
+        """Write-through: met à jour le solde si son shard est résident."""
+        shard = self._shards.get(user_id % USER_SHARDS)
+        if shard is not None:
+            if user_id not in shard:
+                self.size += 1
+            shard[user_id] = balance
+
+    def _evict(self):
+        # le shard qui vient d'être chargé (le plus récent) n'est jamais évincé
+        while self.size > self.max_users and len(self._shards) > 1:
+            _, shard = self._shards.popitem(last=False)
+            self.size -= len(shard)
+            self.evictions += 1
+
+
+class EconomyStore:
+    """Stockage SQLite de l'économie.
+
+    La connexion appartient à un thread dédié: toutes les requêtes passent par
+    `_run` et ne bloquent jamais la boucle asyncio. Chaque opération publique
+    est atomique (savepoint); le COMMIT sur disque est regroupé: `on_write`
+    est appelé après chaque écriture et le propriétaire appelle `commit()`
+    (en pratique via le PersistenceScheduler du bot).
+    """
+
+    def __init__(self, path, legacy_json=None, legacy_journal=None, on_write=None, cache_users=50000):
+        self.path = path
+        self.legacy_json = legacy_json
+        self.legacy_journal = legacy_journal
+        self.on_write = on_write
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="economy-db")
+        self._conn = None
+        self._note_ids = {}  # texte -> note_id (thread DB)
+        self._note_texts = {}  # note_id -> texte
+        self.cache = ShardedUserCache(self._load_shard, cache_users)
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    # --- cycle de vie ---
+
+    async def open(self):
+        await self._run(self._open)
+
+    async def close(self):
+        await self._run(self._close)
+        self._executor.shutdown(wait=True)
+
+    async def commit(self):
+        """Rend durables les opérations effectuées depuis le dernier commit."""
+        await self._run(self._commit)
+
+    async def _write(self, fn, touched, *args):
+        result = await self._run(self._write_through, fn, touched, *args)
+        if self.on_write:
+            self.on_write()
+        return result
+
+    def _write_through(self, fn, touched, *args):
+        result = fn(*args)
+        self._refresh(*touched)
+        return result
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        is_new = not os.path.exists(self.path)
+        # autocommit: les transactions sont gérées à la main (voir _op/_commit)
+        self._conn = sqlite3.connect(self.path, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if not is_new and version < 3:
+            self._migrate_v2()
+        if not is_new and version < 2:
+            self._migrate_v1()
+        elif not is_new and version < 5:
+            self._migrate_v4()
+        self._conn.executescript(SCHEMA)
+        if not is_new and version < 4:
+            self._migrate_v3()
+        self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        for note_id, text in self._conn.execute("SELECT note_id, text FROM notes"):
+            self._note_ids[text] = note_id
+            self._note_texts[note_id] = text
+        if is_new:
+            self._migrate_legacy()
+
+    def _close(self):
+        if self._conn:
+            self._commit()
+            self._conn.close()
+            self._conn = None
+
+    @contextmanager
+    def _op(self):
+        """Opération atomique dans la transaction courante (ouverte si besoin)."""
+        if not self._conn.in_transaction:
+            self._conn.execute("BEGIN")
+        self._conn.execute("SAVEPOINT op")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK TO op")
+            self._conn.execute("RELEASE op")
+            raise
+        self._conn.execute("RELEASE op")
+
+    def _commit(self):
+        if self._conn.in_transaction:
+            self._conn.execute("COMMIT")
+
+    def _migrate_legacy(self):
+        """Importe l'ancien stockage JSON (snapshot + journal) dans la base."""
+        if not self.legacy_json or not (os.path.exists(self.legacy_json) or os.path.exists(self.legacy_journal)):
+            return
+        journal = Journal(self.legacy_journal, self.legacy_json, _apply_legacy_record)
+        state = journal.load()
+        journal.close()
+        with self._op():
+            for uid, user in state.items():
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO users (user_id, balance, shard) VALUES (?, ?, ?)",
+                    (int(uid), user.get('balance', START_BALANCE), int(uid) % USER_SHARDS)
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO cooldowns (kind, user_id, expires) VALUES (?, ?, ?)",
+                    _cooldown_rows(int(uid), user)
+                )
+                for t in user.get('transactions', []):
+                    self._insert_transaction(int(uid), t['type'], t['amount'], t.get('note'), when=_iso_to_epoch(t['time']))
+        self._commit()
+        for path in (self.legacy_json, self.legacy_journal):
+            if os.path.exists(path):
+                os.replace(path, path + ".migrated")
+
+    def _migrate_v1(self):
+        """Convertit l'ancienne table transactions (texte ISO, type et note en clair)."""
+        self._conn.execute("DROP INDEX IF EXISTS idx_transactions_user_time")
+        self._conn.execute("ALTER TABLE transactions RENAME TO transactions_v1")
+        self._conn.execute("ALTER TABLE users ADD COLUMN tx_count INTEGER NOT NULL DEFAULT 0")
+        self._conn.executescript(SCHEMA)
+        with self._op():
+            rows = self._conn.execute(
+                "SELECT user_id, time, type, amount, note FROM transactions_v1 ORDER BY user_id, time"
+            )
+            for user_id, when, ttype, amount, note in rows.fetchall():
+                self._insert_transaction(user_id, ttype, amount, note, when=_iso_to_epoch(when))
+            self._conn.execute("DROP TABLE transactions_v1")
+        self._commit()
+
+    def _migrate_v2(self):
+        """Ajoute la colonne shard (cache partitionné)."""
+        self._conn.execute("ALTER TABLE users ADD COLUMN shard INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute(f"UPDATE users SET shard = user_id % {USER_SHARDS}")
+
+    def _migrate_v4(self):
+        """Remplace l'anneau (user_id, slot) par l'historique complet (user_id, seq)."""
+        self._conn.execute("DROP INDEX IF EXISTS idx_transactions_user_time")
+        self._conn.execute("ALTER TABLE transactions RENAME TO transactions_v4")
+        self._conn.executescript(SCHEMA)
+        with self._op():
+            self._conn.execute(
+                "INSERT INTO transactions (user_id, seq, time, type, amount, note_id, ref) "
+                "SELECT user_id, seq, time, type, amount, note_id, ref FROM transactions_v4"
+            )
+            self._conn.execute("DROP TABLE transactions_v4")
+        self._commit()
+
+    def _migrate_v3(self):
+        """Convertit users.last_daily/last_work (texte ISO) en expirations epoch."""
+        with self._op():
+            rows = self._conn.execute(
+                "SELECT user_id, last_daily, last_work FROM users WHERE last_daily IS NOT NULL OR last_work IS NOT NULL"
+            )
+            for user_id, last_daily, last_work in rows.fetchall():
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO cooldowns (kind, user_id, expires) VALUES (?, ?, ?)",
+                    _cooldown_rows(user_id, {'last_daily': last_daily, 'last_work': last_work})
+                )
+            self._conn.execute("UPDATE users SET last_daily = NULL, last_work = NULL")
+        self._commit()
+
+    # --- helpers (thread DB) ---
+
+    def _load_shard(self, shard_id):
+        return dict(self._conn.execute("SELECT user_id, balance FROM users WHERE shard = ?", (shard_id,)))
+
+    def _refresh(self, *user_ids):
+        """Recopie dans le cache les lignes modifiées dont le shard est résident."""
+        for user_id in user_ids:
+            if self.cache.resident(user_id):
+                row = self._conn.execute("SELECT balance FROM users WHERE user_id = ?", (user_id,)).fetchone()
+                if row is not None:
+                    self.cache.put(user_id, row[0])
+
+    def _ensure_user(self, user_id):
+        self._conn.execute(
+            "INSERT OR IGNORE INTO users (user_id, balance, shard) VALUES (?, ?, ?)",
+            (user_id, START_BALANCE, user_id % USER_SHARDS)
+        )
+
+    def _balance(self, user_id):
+        row = self._conn.execute("SELECT balance FROM users WHERE user_id = ?", (user_id,)).fetchone()
+        return row[0]
+
+    def _can_debit(self, user_id, minimum):
+        """Solde >= minimum, sans créer de compte (solde de départ si absent)."""
+        row = self._conn.execute("SELECT balance FROM users WHERE user_id = ?", (user_id,)).fetchone()
+        return (START_BALANCE if row is None else row[0]) >= minimum
+
+    def _intern_note(self, note):
+        """(note_id, ref) pour une note; le gabarit est interné une seule fois."""
+        note = note or ""
+        ref = None
+        match = NOTE_REF.match(note)
+        if match and "{}" not in note:
+            note, ref = match.group(1) + "{}", int(match.group(2))
+        note_id = self._note_ids.get(note)
+        if note_id is None:
+            note_id = self._conn.execute("INSERT INTO notes (text) VALUES (?)", (note,)).lastrowid
+            self._note_ids[note] = note_id
+            self._note_texts[note_id] = note
+        return note_id, ref
+
+    def _note_text(self, note_id, ref):
+        text = self._note_texts.get(note_id, "")
+        return text if ref is None else text.replace("{}", str(ref), 1)
+
+    def _insert_transaction(self, user_id, ttype, amount, note, when=None):
+        seq = self._conn.execute("SELECT tx_count FROM users WHERE user_id = ?", (user_id,)).fetchone()[0]
+        self._conn.execute("UPDATE users SET tx_count = ? WHERE user_id = ?", (seq + 1, user_id))
+        note_id, ref = self._intern_note(note)
+        self._conn.execute(
+            "INSERT INTO transactions (user_id, seq, time, type, amount, note_id, ref) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (user_id, seq, int(time.time()) if when is None else when,
+             int(TxType.parse(ttype)), amount, note_id, ref)
+        )
+
+    def _get_user(self, user_id):
+        # un seul shard touché; chargé depuis SQLite au premier accès
+        balance = self.cache.get(user_id)
+        return {'balance': START_BALANCE if balance is None else balance}
+
+    def _apply(self, user_id, delta, ttype, note, cooldown, require_balance):
+        with self._op():
+            # refus avant toute écriture: un débit rejeté ne crée pas de compte
+            if require_balance is not None and not self._can_debit(user_id, require_balance):
+                return None
+            self._ensure_user(user_id)
+            self._conn.execute("UPDATE users SET balance = balance + ? WHERE user_id = ?", (delta, user_id))
+            if cooldown is not None:
+                kind, expires = cooldown
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cooldowns (kind, user_id, expires) VALUES (?, ?, ?)",
+                    (int(kind), user_id, expires)
+                )
+            self._insert_transaction(user_id, ttype, delta, note)
+            return self._balance(user_id)
+
+    def _transfer(self, sender_id, receiver_id, amount, sent_note, received_note):
+        with self._op():
+            if not self._can_debit(sender_id, amount):
+                return None
+            self._ensure_user(sender_id)
+            self._ensure_user(receiver_id)
+            self._conn.execute("UPDATE users SET balance = balance - ? WHERE user_id = ?", (amount, sender_id))
+            self._conn.execute("UPDATE users SET balance = balance + ? WHERE user_id = ?", (amount, receiver_id))
+            self._insert_transaction(sender_id, TxType.PAY_SENT, -amount, sent_note)
+            self._insert_transaction(receiver_id, TxType.PAY_RECEIVED, amount, received_note)
+            return self._balance(sender_id), self._balance(receiver_id)
+
+    def _balances(self, user_ids):
+        balances = {}
+        for i in range(0, len(user_ids), 500):
+            chunk = user_ids[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            balances.update(self._conn.execute(
+                f"SELECT user_id, balance FROM users WHERE user_id IN ({marks})", chunk
+            ).fetchall())
+        return balances
+
+    def _credit_rows(self, user_ids, amount, ttype, note):
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO users (user_id, balance, shard) VALUES (?, ?, ?)",
+            [(u, START_BALANCE, u % USER_SHARDS) for u in user_ids]
+        )
+        self._conn.executemany("UPDATE users SET balance = balance + ? WHERE user_id = ?", [(amount, u) for u in user_ids])
+        for user_id in user_ids:
+            self._insert_transaction(user_id, ttype, amount, note)
+
+    def _transfer_many(self, sender_id, receiver_ids, amount, sent_note, received_note):
+        total = amount * len(receiver_ids)
+        with self._op():
+            if not self._can_debit(sender_id, total):
+                return None
+            self._ensure_user(sender_id)
+            self._conn.execute("UPDATE users SET balance = balance - ? WHERE user_id = ?", (total, sender_id))
+            self._insert_transaction(sender_id, TxType.PAY_SENT, -total, sent_note)
+            self._credit_rows(receiver_ids, amount, TxType.PAY_RECEIVED, received_note)
+            return self._balances([sender_id, *receiver_ids])
+
+    def _credit_many(self, user_ids, amount, ttype, note):
+        with self._op():
+            self._credit_rows(user_ids, amount, ttype, note)
+            return self._balances(user_ids)
+
+    def _set_balance(self, user_id, amount, ttype, note):
+        with self._op():
+            self._ensure_user(user_id)
+            old = self._balance(user_id)
+            self._conn.execute("UPDATE users SET balance = ? WHERE user_id = ?", (amount, user_id))
+            self._insert_transaction(user_id, ttype, amount - old, note)
+            return old
+
+    def _top(self, limit, offset):
+        return self._conn.execute(
+            "SELECT user_id, balance FROM users ORDER BY balance DESC, user_id LIMIT ? OFFSET ?",
+            (limit, offset)
+        ).fetchall()
+
+    def _balances_after(self, after_id, limit):
+        return self._conn.execute(
+            "SELECT user_id, balance FROM users WHERE user_id > ? ORDER BY user_id LIMIT ?", (after_id, limit)
+        ).fetchall()
+
+    def _transactions(self, user_id, limit, before):
+        rows = self._conn.execute(
+            "SELECT seq, time, type, amount, note_id, ref FROM transactions "
+            "WHERE user_id = ? AND seq < ? ORDER BY seq DESC LIMIT ?",
+            (user_id, before, limit)
+        ).fetchall()
+        return [
+            {'seq': seq, 'time': t, 'type': str(TxType(code)), 'amount': amount, 'note': self._note_text(note_id, ref)}
+            for seq, t, code, amount, note_id, ref in rows
+        ]
+
+    def _transaction_count(self, user_id):
+        # tx_count est tenu à jour par _insert_transaction: pas de COUNT(*) sur l'historique
+        row = self._conn.execute("SELECT tx_count FROM users WHERE user_id = ?", (user_id,)).fetchone()
+        return row[0] if row else 0
+
+    def _transactions_after(self, user_ids, after, limit):
+        """Page (user_id, seq) > after parmi `user_ids`, dans l'ordre de la clé primaire."""
+        marks = ",".join("?" * len(user_ids))
+        rows = self._conn.execute(
+            f"SELECT user_id, seq, time, type, amount, note_id, ref FROM transactions "
+            f"WHERE user_id IN ({marks}) AND (user_id, seq) > (?, ?) ORDER BY user_id, seq LIMIT ?",
+            (*user_ids, *after, limit)
+        ).fetchall()
+        return [
+            (user_id, seq, t, str(TxType(code)), amount, self._note_text(note_id, ref))
+            for user_id, seq, t, code, amount, note_id, ref in rows
+        ]
+
+    def _active_cooldowns(self):
+        with self._op():
+            self._conn.execute("DELETE FROM cooldowns WHERE expires <= ?", (int(time.time()),))
+        return self._conn.execute("SELECT kind, user_id, expires FROM cooldowns").fetchall()
+
+    def _reminders(self):
+        return self._conn.execute("SELECT kind, user_id FROM reminders").fetchall()
+
+    def _set_reminder(self, kind, user_id, enabled):
+        with self._op():
+            if enabled:
+                self._conn.execute("INSERT OR IGNORE INTO reminders (kind, user_id) VALUES (?, ?)", (int(kind), user_id))
+            else:
+                self._conn.execute("DELETE FROM reminders WHERE kind = ? AND user_id = ?", (int(kind), user_id))
+
+    # --- API asynchrone ---
+
+    async def get_user(self, user_id):
+        """Solde d'un utilisateur (valeur par défaut s'il n'existe pas)."""
+        return await self._run(self._get_user, int(user_id))
+
+    async def apply(self, user_id, delta, ttype, note=None, cooldown=None, require_balance=None):
+        """Ajoute `delta` au solde + transaction, atomiquement.
+
+        `cooldown=(kind, expires)` enregistre la fin d'un cooldown dans la même
+        opération. Si `require_balance` est donné, l'opération est refusée
+        (None) quand le solde courant est inférieur. Retourne le nouveau solde.
+        """
+        return await self._write(self._apply, [int(user_id)], int(user_id), delta, ttype, note, cooldown, require_balance)
+
+    async def transfer(self, sender_id, receiver_id, amount, sent_note=None, received_note=None):
+        """Débite et crédite dans la même transaction.
+
+        Retourne (solde émetteur, solde destinataire), ou None si solde insuffisant.
+        """
+        return await self._write(self._transfer, [int(sender_id), int(receiver_id)], int(sender_id), int(receiver_id), amount, sent_note, received_note)
+
+    async def transfer_many(self, sender_id, receiver_ids, amount, sent_note=None, received_note=None):
+        """Débite amount * len(receiver_ids) et crédite chaque destinataire, en une transaction.
+
+        Retourne {user_id: solde} pour tous les comptes touchés, ou None si solde insuffisant.
+        """
+        receivers = [int(u) for u in receiver_ids]
+        return await self._write(self._transfer_many, [int(sender_id), *receivers], int(sender_id), receivers, amount, sent_note, received_note)
+
+    async def credit_many(self, user_ids, amount, ttype, note=None):
+        """Crédite `amount` à chaque compte en une transaction. Retourne {user_id: solde}."""
+        user_ids = [int(u) for u in user_ids]
+        return await self._write(self._credit_many, user_ids, user_ids, amount, ttype, note)
+
+    async def set_balance(self, user_id, amount, ttype, note=None):
+        """Fixe le solde et retourne l'ancien."""
+        return await self._write(self._set_balance, [int(user_id)], int(user_id), amount, ttype, note)
+
+    async def top(self, limit=10, offset=0):
+        """Classement via l'index sur balance: [(user_id, balance), ...]."""
+        return await self._run(self._top, limit, offset)
+
+    async def iter_balances(self, chunk=20000):
+        """Itère [(user_id, balance), ...] par paquets, sans monopoliser le thread DB."""
+        after = -1
+        while True:
+            rows = await self._run(self._balances_after, after, chunk)
+            if not rows:
+                return
+            yield rows
+            after = rows[-1][0]
+
+    async def transactions(self, user_id, limit=10, before=None):
+        """Transactions plus récentes d'abord, de numéro < `before` (toutes si None).
+
+        `time` en secondes epoch UTC; `seq` sert de curseur pour la page suivante.
+        """
+        return await self._run(self._transactions, int(user_id), limit, 2 ** 63 - 1 if before is None else before)
+
+    async def transaction_count(self, user_id):
+        return await self._run(self._transaction_count, int(user_id))
+
+    async def iter_transactions(self, user_ids, chunk=5000):
+        """Itère l'historique complet de `user_ids` par paquets de tuples
+        (user_id, seq, time, type, amount, note), sans monopoliser le thread DB.
+        """
+        user_ids = sorted({int(u) for u in user_ids})
+        for i in range(0, len(user_ids), 500):
+            batch = user_ids[i:i + 500]
+            after = (-1, -1)
+            while True:
+                rows = await self._run(self._transactions_after, batch, after, chunk)
+                if not rows:
+                    break
+                yield rows
+                after = rows[-1][:2]
+
+    async def active_cooldowns(self):
+        """Purge les cooldowns expirés et retourne [(kind, user_id, expires), ...]."""
+        return await self._write(self._active_cooldowns, [])
+
+    async def reminders(self):
+        """Inscriptions aux rappels: [(kind, user_id), ...]."""
+        return await self._run(self._reminders)
+
+    async def set_reminder(self, kind, user_id, enabled):
+        await self._write(self._set_reminder, [], kind, int(user_id), enabled)
@@ -0,0 +1,262 @@
+import asyncio
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+from urllib.parse import parse_qs, urlparse
+
+import yt_dlp
+
+# champs conservés d'un résultat extract_info: le reste (formats, miniatures,
+# sous-titres...) pèse des centaines de Ko et traverserait le pool pour rien
+INFO_FIELDS = (
+    'id', 'title', 'url', 'webpage_url', 'original_url', 'duration', 'is_live',
+    'extractor', 'ext', 'acodec', 'abr', 'asr', 'protocol', 'http_headers',
+)
+# latences gardées pour les percentiles
+LATENCY_SAMPLES = 256
+# une URL directe n'est plus utilisée à moins de N secondes de son expiration
+STREAM_EXPIRY_MARGIN = 600
+# durée de vie supposée d'une URL directe sans paramètre `expire`
+DEFAULT_STREAM_TTL = 3600
+# champs conservés d'une entrée de playlist (extraction à plat)
+FLAT_FIELDS = ('id', 'title', 'url', 'duration')
+
+_EXPIRE_PATH = re.compile(r"/expire/(\d+)")
+
+_local = threading.local()
+
+
+def _init_worker(options):
+    # une instance YoutubeDL par worker (thread ou processus), créée une fois
+    _local.options = options
+    _local.ytdl = yt_dlp.YoutubeDL(options)
+    _local.flat = None
+
+
+def _extract(query, download=False):
+    """Exécuté dans un worker: résultat allégé (première entrée d'une playlist)."""
+    ytdl = _local.ytdl
+    try:
+        info = ytdl.extract_info(query, download=download)
+    except Exception as e:
+        # les exceptions yt-dlp ne sont pas toujours sérialisables entre processus
+        raise RuntimeError(f"yt-dlp extraction failed: {e}") from None
+    if info and 'entries' in info:
+        info = next((entry for entry in info['entries'] if entry), None)
+    if not info:
+        return None
+    data = {field: info[field] for field in INFO_FIELDS if field in info}
+    if data.get('url'):
+        # daté ici: le cache et la file ne rajeunissent pas une URL déjà servie
+        data['expires'] = stream_expiry(data['url'], time.time())
+    if download:
+        data['filename'] = ytdl.prepare_filename(info)
+    return data
+
+
+def _extract_flat(url, start, end):
+    """Exécuté dans un worker: entrées `start`..`end` (1-based) d'une playlist,
+    listées sans résoudre les vidéos."""
+    if _local.flat is None:
+        _local.flat = yt_dlp.YoutubeDL({**_local.options, 'extract_flat': 'in_playlist', 'noplaylist': False})
+    ytdl = _local.flat
+    ytdl.params['playlist_items'] = f"{start}-{end}"
+    try:
+        info = ytdl.extract_info(url, download=False)
+    except Exception as e:
+        raise RuntimeError(f"yt-dlp extraction failed: {e}") from None
+    if not info:
+        return None
+    entries = list(info.get('entries') or ())
+    return {
+        'title': info.get('title'),
+        'playlist_count': info.get('playlist_count'),
+        # entrées lues, y compris celles ignorées (fin de playlist si < demandé)
+        'listed': len(entries),
+        'entries': [{field: entry[field] for field in FLAT_FIELDS if field in entry} for entry in entries if entry and entry.get('url')],
+    }
+
+
+def is_playlist_url(query):
+    """True si `query` désigne une playlist plutôt qu'une vidéo (une vidéo
+    ouverte depuis une playlist, `watch?v=...&list=...`, reste une vidéo)."""
+    parsed = urlparse(query.strip())
+    if parsed.scheme not in ('http', 'https'):
+        return False
+    params = parse_qs(parsed.query)
+    if 'list' in params and 'v' not in params and 'youtu.be' not in parsed.netloc:
+        return True
+    path = parsed.path.rstrip('/')
+    return path.endswith('/playlist') or '/sets/' in path or '/album/' in path
+
+
+def stream_expiry(url, resolved_at):
+    """Epoch d'expiration d'une URL directe: paramètre `expire` (URL
+    googlevideo, en query ou dans le chemin des manifestes), sinon
+    `resolved_at + DEFAULT_STREAM_TTL`."""
+    if url:
+        parsed = urlparse(url)
+        values = parse_qs(parsed.query).get('expire')
+        match = _EXPIRE_PATH.search(parsed.path) if not values else None
+        try:
+            if values:
+                return int(values[0])
+            if match:
+                return int(match.group(1))
+        except ValueError:
+            pass
+    return int(resolved_at) + DEFAULT_STREAM_TTL
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, round(pct / 100 * (len(values) - 1)))]
+
+
+class ExtractionService:
+    """Pool dédié aux extractions yt-dlp.
+
+    `workers` threads (ou processus si `processes`, pour sortir l'analyse
+    lourde du GIL) gardent chacun une instance YoutubeDL préinitialisée. Les
+    demandes attendent dans une file par serveur servie à tour de rôle: une
+    rafale de /play sur un serveur ne retarde les autres que d'une
+    extraction au plus.
+    """
+
+    def __init__(self, options, workers=4, processes=False):
+        self.options = options
+        self.workers = workers
+        self.processes = processes
+        self._executor = None
+        self._dispatchers = []
+        self._pending = OrderedDict()  # guild_id -> deque[(fonction, args, future, t_file)]
+        self._wakeup = None
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)  # durée d'extraction (s)
+        self.waits = deque(maxlen=LATENCY_SAMPLES)  # attente dans la file (s)
+
+    def _new_executor(self):
+        if self.processes:
+            return ProcessPoolExecutor(
+                self.workers, mp_context=get_context('spawn'),
+                initializer=_init_worker, initargs=(self.options,)
+            )
+        return ThreadPoolExecutor(
+            self.workers, thread_name_prefix="ytdl",
+            initializer=_init_worker, initargs=(self.options,)
+        )
+
+    def start(self):
+        self._executor = self._new_executor()
+        self._wakeup = asyncio.Event()
+        self._dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+
+    async def close(self):
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        self._dispatchers = []
+        for queue in self._pending.values():
+            for _, _, future, _ in queue:
+                if not future.done():
+                    future.set_exception(RuntimeError("Service d'extraction arrêté"))
+        self._pending.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    @property
+    def queue_depth(self):
+        return sum(len(queue) for queue in self._pending.values())
+
+    async def _submit(self, guild_id, fn, *args):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(guild_id, deque()).append((fn, args, future, time.perf_counter()))
+        self._wakeup.set()
+        data = await future
+        if not data:
+            raise RuntimeError("Aucune donnée extraite (stream non supporté ou URL invalide)")
+        return data
+
+    async def extract(self, query, guild_id=None, download=False):
+        """Résultat allégé de extract_info pour `query`; RuntimeError en cas d'échec."""
+        return await self._submit(guild_id, _extract, query, download)
+
+    async def extract_playlist(self, url, guild_id=None, start=1, end=100):
+        """Page `start`..`end` d'une playlist: {'title', 'playlist_count',
+        'listed', 'entries': [{id, title, url, duration}, ...]}.
+
+        Une page est une demande comme une autre dans la file du serveur: une
+        longue playlist ne monopolise pas le pool.
+        """
+        return await self._submit(guild_id, _extract_flat, url, start, end)
+
+    def _next(self):
+        # tourniquet: le serveur servi repasse en fin de file s'il lui reste des demandes
+        guild_id, queue = self._pending.popitem(last=False)
+        item = queue.popleft()
+        if queue:
+            self._pending[guild_id] = queue
+        return item
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            fn, args, future, queued = self._next()
+            if future.done():
+                # demandeur annulé (interaction expirée...)
+                continue
+            start = time.perf_counter()
+            self.waits.append(start - queued)
+            self.in_flight += 1
+            try:
+                executor = self._executor
+                data = await loop.run_in_executor(executor, fn, *args)
+            except BrokenExecutor:
+                # worker mort (processus tué, initialisation impossible): pool recréé
+                self.failed += 1
+                if executor is self._executor:
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    self._executor = self._new_executor()
+                if not future.done():
+                    future.set_exception(RuntimeError("yt-dlp extraction failed: worker arrêté"))
+            except Exception as e:
+                self.failed += 1
+                if not future.done():
+                    future.set_exception(e if isinstance(e, RuntimeError) else RuntimeError(f"yt-dlp extraction failed: {e}"))
+            else:
+                self.completed += 1
+                if not future.done():
+                    future.set_result(data)
+            finally:
+                self.in_flight -= 1
+                self.latencies.append(time.perf_counter() - start)
+
+    def stats(self):
+        """Profondeur de file et latences (ms) sur les dernières extractions."""
+        def ms(value):
+            return None if value is None else round(value * 1000, 1)
+
+        return {
+            'workers': self.workers,
+            'mode': 'process' if self.processes else 'thread',
+            'queue_depth': self.queue_depth,
+            'guilds_waiting': len(self._pending),
+            'in_flight': self.in_flight,
+            'completed': self.completed,
+            'failed': self.failed,
+            'latency_p50_ms': ms(percentile(self.latencies, 50)),
+            'latency_p95_ms': ms(percentile(self.latencies, 95)),
+            'wait_p95_ms': ms(percentile(self.waits, 95)),
+        }
@@ -0,0 +1,129 @@
+import asyncio
+import re
+import time
+from collections import OrderedDict
+
+from utils.extraction import STREAM_EXPIRY_MARGIN, stream_expiry
+
+# identifiant de vidéo dans les formes d'URL YouTube courantes
+_YOUTUBE_ID = re.compile(
+    r"(?:youtube\.com/(?:watch\?(?:.*&)?v=|shorts/|embed/|live/)|youtu\.be/)([\w-]{11})"
+)
+
+
+def cache_key(query):
+    """Clé normalisée: identifiant YouTube si possible, sinon la requête
+    (recherche insensible à la casse et aux espaces)."""
+    query = query.strip()
+    match = _YOUTUBE_ID.search(query)
+    if match:
+        return f"youtube:{match.group(1)}"
+    if "://" in query:
+        return query
+    return "search:" + " ".join(query.casefold().split())
+
+
+class ExtractionCache:
+    """Cache LRU des résultats d'extraction devant un ExtractionService.
+
+    Une entrée (métadonnées + URL directe) vit jusqu'à l'expiration de son
+    URL moins STREAM_EXPIRY_MARGIN; au-delà de `max_entries`, la moins
+    récemment utilisée est évincée. Les demandes identiques simultanées
+    attendent la même extraction.
+    """
+
+    def __init__(self, extractor, max_entries=2048, clock=time.time):
+        self.extractor = extractor
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()  # clé -> (valide jusqu'à, data)
+        self._inflight = {}  # clé -> [Task de l'extraction en cours, demandeurs en attente]
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        # on_extract(guild_id, secondes) après chaque extraction réelle (mesures)
+        self.on_extract = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, fresh_until=None):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        valid_until, data = entry
+        if max(self.clock(), fresh_until or 0) >= valid_until:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return data
+
+    def put(self, data, *keys):
+        now = self.clock()
+        valid_until = (data.get('expires') or stream_expiry(data.get('url'), now)) - STREAM_EXPIRY_MARGIN
+        if valid_until <= now:
+            return
+        for key in keys:
+            self._entries[key] = (valid_until, data)
+            self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, query):
+        self._entries.pop(cache_key(query), None)
+
+    async def extract(self, query, guild_id=None, fresh_until=None):
+        """Comme ExtractionService.extract, servi depuis le cache si possible.
+
+        `fresh_until`: l'URL directe doit encore être utilisable à cet
+        instant (epoch), sinon l'entrée est réextraite.
+        """
+        key = cache_key(query)
+        data = self.get(key, fresh_until)
+        if data is not None:
+            self.hits += 1
+            return data
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.create_task(self._fetch(key, query, guild_id))
+            inflight = self._inflight[key] = [task, 0]
+        task = inflight[0]
+        inflight[1] += 1
+        try:
+            # un demandeur annulé (préchargement remplacé...) n'annule que son attente
+            return await asyncio.shield(task)
+        finally:
+            inflight[1] -= 1
+            if not inflight[1] and not task.done():
+                # plus personne n'attend: l'extraction est abandonnée
+                task.cancel()
+
+    async def _fetch(self, key, query, guild_id):
+        """Extraction réelle, partagée par tous les demandeurs de `key`."""
+        start = time.perf_counter()
+        try:
+            data = await self.extractor.extract(query, guild_id)
+        finally:
+            if self._inflight.get(key, (None,))[0] is asyncio.current_task():
+                del self._inflight[key]
+        if self.on_extract is not None:
+            self.on_extract(guild_id, time.perf_counter() - start)
+        keys = [key]
+        # une recherche et l'URL de la vidéo trouvée partagent l'entrée
+        if data.get('id') and data.get('extractor', '').startswith('youtube'):
+            keys.append(f"youtube:{data['id']}")
+        self.put(data, *keys)
+        return data
+
+    def stats(self):
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'hit_rate': round((self.hits + self.coalesced) / lookups, 3) if lookups else None,
+        }
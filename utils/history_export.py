@@ -0,0 +1,93 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+import os
+from datetime import datetime, timezone
+
+FIELDS = ('user_id', 'seq', 'time', 'type', 'amount', 'note')
+FORMATS = ('csv', 'jsonl')
+
+
+def _iso(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat()
+
+
+def format_csv(rows, header=False):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if header:
+        writer.writerow(FIELDS)
+    writer.writerows((u, seq, _iso(t), ttype, amount, note) for u, seq, t, ttype, amount, note in rows)
+    return buf.getvalue()
+
+
+def format_jsonl(rows, header=False):
+    return "".join(
+        json.dumps(dict(zip(FIELDS, (u, seq, _iso(t), ttype, amount, note))), ensure_ascii=False) + "\n"
+        for u, seq, t, ttype, amount, note in rows
+    )
+
+
+FORMATTERS = {'csv': format_csv, 'jsonl': format_jsonl}
+
+
+class ExportWriter:
+    """Écrit un export en fichiers .gz sur disque, paquet par paquet.
+
+    Une nouvelle partie (avec son propre en-tête) démarre dès que la partie
+    courante atteint `max_bytes` compressés: chaque fichier reste sous la
+    limite de pièce jointe Discord. Seul le paquet en cours est en mémoire.
+    """
+
+    def __init__(self, directory, basename, fmt, max_bytes):
+        self.directory = directory
+        self.basename = basename
+        self.fmt = fmt
+        self.max_bytes = max_bytes
+        self.paths = []
+        self.rows = 0
+        self._raw = None
+        self._gz = None
+
+    def _open_part(self):
+        path = os.path.join(self.directory, f"{self.basename}-{len(self.paths) + 1}.{self.fmt}.gz")
+        self._raw = open(path, "wb")
+        self._gz = gzip.GzipFile(fileobj=self._raw, mode="wb")
+        self.paths.append(path)
+
+    def _close_part(self):
+        if self._gz is not None:
+            self._gz.close()
+            self._raw.close()
+            self._gz = self._raw = None
+
+    def write(self, rows):
+        if self._gz is not None and self._raw.tell() >= self.max_bytes:
+            self._close_part()
+        header = self._gz is None
+        if header:
+            self._open_part()
+        self._gz.write(FORMATTERS[self.fmt](rows, header).encode("utf-8"))
+        self.rows += len(rows)
+
+    def close(self):
+        self._close_part()
+        return self.paths
+
+
+async def export_history(chunks, directory, basename, fmt, max_bytes):
+    """Consomme l'itérateur asynchrone `chunks` (paquets de lignes) vers des
+    fichiers .gz; le formatage et la compression tournent hors de la boucle.
+
+    Retourne (chemins des parties, nombre de lignes).
+    """
+    # marge pour l'en-tête gzip et le dernier paquet écrit après le seuil
+    writer = ExportWriter(directory, basename, fmt, int(max_bytes * 0.9))
+    try:
+        async for rows in chunks:
+            await asyncio.to_thread(writer.write, rows)
+    finally:
+        paths = await asyncio.to_thread(writer.close)
+    return paths, writer.rows
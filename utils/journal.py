@@ -0,0 +1,124 @@
+import json
+import os
+
+
+class Journal:
+    """Journal append-only (JSON lines) + snapshot compacté.
+
+    Chaque mutation est ajoutée en fin de fichier avec un numéro de séquence.
+    La compaction fait tourner le journal sur un segment, puis fusionne
+    snapshot + segment dans un thread, sans toucher à l'état en mémoire.
+    Au démarrage: snapshot, puis segment éventuel, puis journal courant.
+    """
+
+    def __init__(self, path, snapshot_path, apply):
+        self.path = path
+        self.snapshot_path = snapshot_path
+        self.segment_path = path + ".1"
+        self.apply = apply  # apply(state, record) -> None
+        self.seq = 0
+        self.pending = 0  # records écrits depuis la dernière compaction
+        self._fh = None
+
+    # --- lecture ---
+
+    def _read_snapshot(self):
+        if not os.path.exists(self.snapshot_path):
+            return 0, {}
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except (json.JSONDecodeError, Exception):
+            return 0, {}
+        if isinstance(raw, dict) and "state" in raw and "seq" in raw:
+            return raw["seq"], raw["state"]
+        # ancien format: le fichier entier est l'état, sans numéro de séquence
+        return 0, raw if isinstance(raw, dict) else {}
+
+    def _replay(self, path, seq, state, truncate=False):
+        if not os.path.exists(path):
+            return seq, 0
+        count = 0
+        good = 0  # offset de la fin du dernier record valide
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    # dernière ligne tronquée (crash pendant l'écriture)
+                    break
+                good += len(line)
+                if record.get("s", 0) <= seq:
+                    continue  # déjà inclus dans le snapshot
+                self.apply(state, record)
+                seq = record["s"]
+                count += 1
+        if truncate and good < os.path.getsize(path):
+            # sinon le prochain append serait collé à la ligne tronquée
+            with open(path, "r+b") as f:
+                f.truncate(good)
+        return seq, count
+
+    def load(self):
+        """Reconstruit l'état complet et ouvre le journal en écriture."""
+        seq, state = self._read_snapshot()
+        if os.path.exists(self.segment_path):
+            # compaction interrompue: on la termine avant de repartir
+            seq, _ = self._replay(self.segment_path, seq, state)
+            self._write_snapshot(seq, state)
+            os.remove(self.segment_path)
+        seq, self.pending = self._replay(self.path, seq, state, truncate=True)
+        self.seq = seq
+        self._open()
+        return state
+
+    # --- écriture ---
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._fh = open(self.path, "a", encoding="utf-8")
+
+    def append(self, record):
+        """Ajoute un record au journal; coût proportionnel à la taille du record."""
+        self.seq += 1
+        record["s"] = self.seq
+        self._fh.write(json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n")
+        self._fh.flush()
+        self.pending += 1
+
+    def close(self):
+        if self._fh:
+            self._fh.close()
+            self._fh = None
+
+    # --- compaction ---
+
+    def _write_snapshot(self, seq, state):
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"seq": seq, "state": state}, f, separators=(",", ":"), ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+
+    def rotate(self):
+        """Bascule le journal courant sur le segment (à appeler depuis la boucle).
+
+        Retourne True s'il y a un segment à compacter.
+        """
+        if os.path.exists(self.segment_path):
+            return True  # compaction précédente non terminée
+        if not self.pending:
+            return False
+        self.close()
+        os.replace(self.path, self.segment_path)
+        self._open()
+        self.pending = 0
+        return True
+
+    def compact_segment(self):
+        """Fusionne snapshot + segment (bloquant, à exécuter dans un thread)."""
+        seq, state = self._read_snapshot()
+        seq, _ = self._replay(self.segment_path, seq, state)
+        self._write_snapshot(seq, state)
+        os.remove(self.segment_path)
@@ -0,0 +1,154 @@
+import asyncio
+import re
+
+import discord
+
+# identifiants Discord (snowflakes) dans une liste collée par un modérateur
+_SNOWFLAKE = re.compile(r"\b\d{17,20}\b")
+# utilisateurs par appel bulk-ban (API Discord, discord.py >= 2.4)
+BULK_BAN_SIZE = 200
+# statuts considérés comme transitoires (rate limit épuisé, erreur serveur)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def parse_ids(text):
+    """Identifiants uniques trouvés dans `text`, dans l'ordre d'apparition."""
+    return list(dict.fromkeys(int(m) for m in _SNOWFLAKE.findall(text or "")))
+
+
+def _protected(member, moderator, guild):
+    if member.id in (guild.owner_id, moderator.id, guild.me.id):
+        return True
+    # même règle que /ban, et le bot ne peut pas bannir au-dessus de son rôle
+    if guild.owner_id != moderator.id and member.top_role >= moderator.top_role:
+        return True
+    return member.top_role >= guild.me.top_role
+
+
+def select_targets(guild, moderator, ids=(), joined_after=None, created_after=None):
+    """Un seul parcours de `guild.members`.
+
+    Un membre est ciblé s'il figure dans `ids`, ou s'il satisfait tous les
+    filtres donnés (arrivé après `joined_after`, compte créé après
+    `created_after`). Les identifiants absents du serveur sont ciblés aussi
+    (bannissement préventif). Retourne (ids ciblés, membres protégés ignorés).
+    """
+    wanted = set(ids)
+    filtered = joined_after is not None or created_after is not None
+    targets = []
+    skipped = 0
+    for member in guild.members:
+        listed = member.id in wanted
+        wanted.discard(member.id)
+        if not listed:
+            if not filtered:
+                continue
+            if joined_after is not None and (member.joined_at is None or member.joined_at < joined_after):
+                continue
+            if created_after is not None and member.created_at < created_after:
+                continue
+        if _protected(member, moderator, guild):
+            skipped += 1
+            continue
+        targets.append(member.id)
+    targets.extend(user_id for user_id in ids if user_id in wanted)
+    return targets, skipped
+
+
+def _retry_after(error, attempt):
+    """Délai avant un nouvel essai: en-tête Retry-After, sinon backoff exponentiel."""
+    headers = getattr(error.response, 'headers', None) or {}
+    try:
+        return float(headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return 2 ** attempt
+
+
+class MassBan:
+    """Bannit une liste d'utilisateurs avec une concurrence bornée.
+
+    Avec discord.py >= 2.4 et la permission Gérer le serveur, les ids partent
+    par lots de 200 (bulk-ban); sinon, ou si un lot est refusé, un pool de
+    `concurrency` requêtes individuelles. discord.py attend déjà les 429
+    annoncés; une erreur transitoire qui remonte quand même est rejouée
+    jusqu'à `max_retries` fois. `progress(done, total)` est appelé après
+    chaque lot ou utilisateur.
+    """
+
+    def __init__(self, guild, user_ids, reason=None, delete_message_seconds=0, concurrency=5, max_retries=3):
+        self.guild = guild
+        self.user_ids = user_ids
+        self.reason = reason
+        self.delete_message_seconds = delete_message_seconds
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.banned = 0
+        self.failed = 0
+        self.missing = 0
+        self.retries = 0
+
+    @property
+    def done(self):
+        return self.banned + self.failed + self.missing
+
+    async def _with_retry(self, call):
+        attempt = 0
+        while True:
+            try:
+                return await call()
+            except discord.HTTPException as e:
+                if isinstance(e, (discord.NotFound, discord.Forbidden)) or e.status not in RETRY_STATUSES:
+                    raise
+                if attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                self.retries += 1
+                await asyncio.sleep(_retry_after(e, attempt))
+
+    def _can_bulk(self):
+        return hasattr(self.guild, 'bulk_ban') and self.guild.me.guild_permissions.manage_guild
+
+    async def _bulk(self, progress):
+        """Lots de 200; retourne les ids à reprendre un par un."""
+        pending = []
+        for i in range(0, len(self.user_ids), BULK_BAN_SIZE):
+            batch = self.user_ids[i:i + BULK_BAN_SIZE]
+            try:
+                result = await self._with_retry(lambda: self.guild.bulk_ban(
+                    [discord.Object(id=user_id) for user_id in batch],
+                    reason=self.reason, delete_message_seconds=self.delete_message_seconds
+                ))
+            except discord.HTTPException:
+                pending.extend(batch)
+                continue
+            self.banned += len(result.banned)
+            # déjà bannis ou non bannissables: un appel individuel échouerait aussi
+            self.failed += len(result.failed)
+            if progress:
+                await progress(self.done, len(self.user_ids))
+        return pending
+
+    async def _single(self, user_ids, progress):
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def one(user_id):
+            async with semaphore:
+                try:
+                    await self._with_retry(lambda: self.guild.ban(
+                        discord.Object(id=user_id),
+                        reason=self.reason, delete_message_seconds=self.delete_message_seconds
+                    ))
+                    self.banned += 1
+                except discord.NotFound:
+                    self.missing += 1
+                except discord.HTTPException:
+                    self.failed += 1
+            if progress:
+                await progress(self.done, len(self.user_ids))
+
+        await asyncio.gather(*(one(user_id) for user_id in user_ids))
+
+    async def run(self, progress=None):
+        pending = await self._bulk(progress) if self._can_bulk() else self.user_ids
+        if pending:
+            await self._single(pending, progress)
@@ -0,0 +1,289 @@
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+SCHEMA_VERSION = 3
+# Sanctions temporaires en attente de levée (tempban, mute): une seule par
+# (guild, utilisateur, type); l'index (guild_id, expires) sert au listing.
+# Avertissements: toutes les requêtes commencent par guild_id, via
+# (guild_id, user_id, timestamp) ou (guild_id, timestamp); jamais de scan
+# des autres serveurs. `timestamp` en secondes epoch UTC.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sanctions (
+    sanction_id INTEGER PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    expires INTEGER NOT NULL,
+    moderator_id INTEGER,
+    reason TEXT,
+    created INTEGER NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_sanctions_target ON sanctions(guild_id, user_id, kind);
+CREATE INDEX IF NOT EXISTS idx_sanctions_guild_expires ON sanctions(guild_id, expires);
+CREATE TABLE IF NOT EXISTS warnings (
+    warning_id INTEGER PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    moderator_id INTEGER NOT NULL,
+    reason TEXT,
+    timestamp INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_warnings_user ON warnings(guild_id, user_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_warnings_time ON warnings(guild_id, timestamp);
+CREATE TABLE IF NOT EXISTS automod (
+    guild_id INTEGER PRIMARY KEY,
+    enabled INTEGER NOT NULL DEFAULT 0,
+    action TEXT NOT NULL DEFAULT 'warn',
+    words TEXT NOT NULL DEFAULT '[]'
+);
+"""
+
+SANCTION_FIELDS = ('sanction_id', 'guild_id', 'user_id', 'kind', 'expires', 'moderator_id', 'reason', 'created')
+WARNING_FIELDS = ('warning_id', 'guild_id', 'user_id', 'moderator_id', 'reason', 'timestamp')
+
+
+def _iso_to_epoch(value):
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+class ModerationStore:
+    """Stockage SQLite de la modération.
+
+    Même modèle qu'EconomyStore: la connexion appartient à un thread dédié et
+    toutes les requêtes passent par `_run`. Les écritures sont rares et
+    doivent survivre à un redémarrage: chacune est committée immédiatement.
+    """
+
+    def __init__(self, path, legacy_warnings=None):
+        self.path = path
+        self.legacy_warnings = legacy_warnings
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="moderation-db")
+        self._conn = None
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    # --- cycle de vie ---
+
+    async def open(self):
+        await self._run(self._open)
+
+    async def close(self):
+        await self._run(self._close)
+        self._executor.shutdown(wait=True)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # transactions implicites du module sqlite3: `with self._conn` = un COMMIT
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        self._conn.executescript(SCHEMA)
+        if version < 2:
+            self._migrate_legacy()
+        self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _close(self):
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+
+    def _migrate_legacy(self):
+        """Importe l'ancien warnings.json ({guild: {user: [...]}}) puis le renomme."""
+        if not self.legacy_warnings or not os.path.exists(self.legacy_warnings):
+            return
+        try:
+            with open(self.legacy_warnings, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            data = {}
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO warnings (guild_id, user_id, moderator_id, reason, timestamp) VALUES (?, ?, ?, ?, ?)",
+                (
+                    (int(gid), int(uid), int(w["moderator"]), w.get("reason"), _iso_to_epoch(w["timestamp"]))
+                    for gid, users in data.items()
+                    for uid, warns in users.items()
+                    for w in warns
+                )
+            )
+        os.replace(self.legacy_warnings, self.legacy_warnings + ".migrated")
+
+    # --- sanctions (thread DB) ---
+
+    def _add_sanction(self, guild_id, user_id, kind, expires, moderator_id, reason):
+        with self._conn:
+            old = self._conn.execute(
+                "SELECT sanction_id FROM sanctions WHERE guild_id = ? AND user_id = ? AND kind = ?",
+                (guild_id, user_id, kind)
+            ).fetchone()
+            if old:
+                self._conn.execute("DELETE FROM sanctions WHERE sanction_id = ?", (old[0],))
+            sanction_id = self._conn.execute(
+                "INSERT INTO sanctions (guild_id, user_id, kind, expires, moderator_id, reason, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (guild_id, user_id, kind, expires, moderator_id, reason, int(time.time()))
+            ).lastrowid
+        return sanction_id, old[0] if old else None
+
+    def _get_sanction(self, sanction_id):
+        row = self._conn.execute(
+            f"SELECT {', '.join(SANCTION_FIELDS)} FROM sanctions WHERE sanction_id = ?", (sanction_id,)
+        ).fetchone()
+        return dict(zip(SANCTION_FIELDS, row)) if row else None
+
+    def _find_sanction(self, guild_id, user_id, kind):
+        row = self._conn.execute(
+            "SELECT sanction_id FROM sanctions WHERE guild_id = ? AND user_id = ? AND kind = ?",
+            (guild_id, user_id, kind)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _delete_sanction(self, sanction_id):
+        with self._conn:
+            return self._conn.execute("DELETE FROM sanctions WHERE sanction_id = ?", (sanction_id,)).rowcount > 0
+
+    def _reschedule_sanction(self, sanction_id, expires):
+        with self._conn:
+            self._conn.execute("UPDATE sanctions SET expires = ? WHERE sanction_id = ?", (expires, sanction_id))
+
+    def _sanction_schedule(self):
+        return self._conn.execute("SELECT sanction_id, expires FROM sanctions").fetchall()
+
+    def _guild_sanctions(self, guild_id, limit, offset):
+        rows = self._conn.execute(
+            f"SELECT {', '.join(SANCTION_FIELDS)} FROM sanctions WHERE guild_id = ? "
+            "ORDER BY expires, sanction_id LIMIT ? OFFSET ?",
+            (guild_id, limit, offset)
+        ).fetchall()
+        return [dict(zip(SANCTION_FIELDS, row)) for row in rows]
+
+    def _count_sanctions(self, guild_id):
+        return self._conn.execute("SELECT COUNT(*) FROM sanctions WHERE guild_id = ?", (guild_id,)).fetchone()[0]
+
+    # --- avertissements (thread DB) ---
+
+    def _add_warning(self, guild_id, user_id, moderator_id, reason, timestamp):
+        with self._conn:
+            return self._conn.execute(
+                "INSERT INTO warnings (guild_id, user_id, moderator_id, reason, timestamp) VALUES (?, ?, ?, ?, ?)",
+                (guild_id, user_id, moderator_id, reason, timestamp)
+            ).lastrowid
+
+    def _warnings(self, guild_id, user_id, since, limit, offset):
+        rows = self._conn.execute(
+            f"SELECT {', '.join(WARNING_FIELDS)} FROM warnings "
+            "WHERE guild_id = ? AND user_id = ? AND timestamp >= ? "
+            "ORDER BY timestamp DESC, warning_id DESC LIMIT ? OFFSET ?",
+            (guild_id, user_id, since, limit, offset)
+        ).fetchall()
+        return [dict(zip(WARNING_FIELDS, row)) for row in rows]
+
+    def _count_warnings(self, guild_id, user_id, since):
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM warnings WHERE guild_id = ? AND user_id = ? AND timestamp >= ?",
+            (guild_id, user_id, since)
+        ).fetchone()[0]
+
+    def _clear_warnings(self, guild_id, user_id):
+        with self._conn:
+            return self._conn.execute(
+                "DELETE FROM warnings WHERE guild_id = ? AND user_id = ?", (guild_id, user_id)
+            ).rowcount
+
+    def _moderator_stats(self, guild_id, since, limit):
+        total = self._conn.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT user_id) FROM warnings WHERE guild_id = ? AND timestamp >= ?",
+            (guild_id, since)
+        ).fetchone()
+        top = self._conn.execute(
+            "SELECT moderator_id, COUNT(*) AS n FROM warnings WHERE guild_id = ? AND timestamp >= ? "
+            "GROUP BY moderator_id ORDER BY n DESC, moderator_id LIMIT ?",
+            (guild_id, since, limit)
+        ).fetchall()
+        return {'warnings': total[0], 'members': total[1], 'moderators': top}
+
+    # --- automod (thread DB) ---
+
+    def _automod_configs(self):
+        rows = self._conn.execute("SELECT guild_id, enabled, action, words FROM automod").fetchall()
+        return [(guild_id, bool(enabled), action, json.loads(words)) for guild_id, enabled, action, words in rows]
+
+    def _save_automod(self, guild_id, enabled, action, words):
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO automod (guild_id, enabled, action, words) VALUES (?, ?, ?, ?)",
+                (guild_id, int(enabled), action, json.dumps(list(words), ensure_ascii=False))
+            )
+
+    # --- API asynchrone ---
+
+    async def add_sanction(self, guild_id, user_id, kind, expires, moderator_id=None, reason=None):
+        """Enregistre une sanction à lever à `expires` (epoch).
+
+        Remplace la sanction du même type en cours pour ce membre; retourne
+        (nouvel id, id remplacé ou None).
+        """
+        return await self._run(self._add_sanction, int(guild_id), int(user_id), kind, int(expires), moderator_id, reason)
+
+    async def get_sanction(self, sanction_id):
+        return await self._run(self._get_sanction, sanction_id)
+
+    async def find_sanction(self, guild_id, user_id, kind):
+        return await self._run(self._find_sanction, int(guild_id), int(user_id), kind)
+
+    async def delete_sanction(self, sanction_id):
+        """Retire la sanction; False si elle n'existait plus."""
+        return await self._run(self._delete_sanction, sanction_id)
+
+    async def reschedule_sanction(self, sanction_id, expires):
+        await self._run(self._reschedule_sanction, sanction_id, int(expires))
+
+    async def sanction_schedule(self):
+        """[(sanction_id, expires), ...] pour toutes les sanctions en attente."""
+        return await self._run(self._sanction_schedule)
+
+    async def guild_sanctions(self, guild_id, limit=10, offset=0):
+        """Sanctions d'un serveur, la prochaine levée d'abord."""
+        return await self._run(self._guild_sanctions, int(guild_id), limit, offset)
+
+    async def count_sanctions(self, guild_id):
+        return await self._run(self._count_sanctions, int(guild_id))
+
+    async def add_warning(self, guild_id, user_id, moderator_id, reason, timestamp=None):
+        return await self._run(
+            self._add_warning, int(guild_id), int(user_id), int(moderator_id), reason,
+            int(time.time()) if timestamp is None else int(timestamp)
+        )
+
+    async def warnings(self, guild_id, user_id, since=0, limit=10, offset=0):
+        """Avertissements d'un membre depuis `since` (epoch), plus récents d'abord."""
+        return await self._run(self._warnings, int(guild_id), int(user_id), int(since), limit, offset)
+
+    async def count_warnings(self, guild_id, user_id, since=0):
+        return await self._run(self._count_warnings, int(guild_id), int(user_id), int(since))
+
+    async def clear_warnings(self, guild_id, user_id):
+        """Supprime les avertissements d'un membre; retourne le nombre supprimé."""
+        return await self._run(self._clear_warnings, int(guild_id), int(user_id))
+
+    async def moderator_stats(self, guild_id, since=0, limit=10):
+        """{'warnings', 'members', 'moderators': [(moderator_id, count), ...]} depuis `since`."""
+        return await self._run(self._moderator_stats, int(guild_id), int(since), limit)
+
+    async def automod_configs(self):
+        """[(guild_id, enabled, action, words), ...] pour tous les serveurs configurés."""
+        return await self._run(self._automod_configs)
+
+    async def save_automod(self, guild_id, enabled, action, words):
+        await self._run(self._save_automod, int(guild_id), enabled, action, words)
@@ -0,0 +1,249 @@
+import random
+import time
+from collections import deque
+from itertools import islice
+
+from utils.extraction import STREAM_EXPIRY_MARGIN, stream_expiry
+
+# pistes gardées dans l'historique de chaque serveur
+HISTORY_SIZE = 50
+
+
+def _audio_format(info):
+    """(codec, débit kb/s) annoncés par yt-dlp, (None, None) si inconnus."""
+    codec = info.get('acodec')
+    if not codec or codec == 'none':
+        return None, None
+    return codec.split('.')[0], int(info['abr']) if info.get('abr') else None
+
+
+class Track:
+    """Entrée de file d'attente: métadonnées seulement.
+
+    Aucune source audio (ni processus ffmpeg) n'existe tant que la piste
+    n'est pas sur le point d'être jouée; `stream_url` est l'URL directe
+    obtenue à l'extraction, réutilisée tant qu'elle n'approche pas de son
+    expiration (`expires`, epoch).
+    """
+
+    __slots__ = ('title', 'webpage_url', 'duration', 'requester_id', 'stream_url', 'expires', 'codec', 'bitrate')
+
+    def __init__(self, title, webpage_url, duration=None, requester_id=None, stream_url=None, expires=None,
+                 codec=None, bitrate=None):
+        self.title = title
+        self.webpage_url = webpage_url
+        self.duration = duration
+        self.requester_id = requester_id
+        self.stream_url = stream_url
+        self.expires = expires
+        # format audio de stream_url (ex: 'opus', 160), None tant qu'inconnu
+        self.codec = codec
+        self.bitrate = bitrate
+
+    @classmethod
+    def from_info(cls, info, requester_id=None):
+        """Construit une piste depuis un résultat `extract_info` de yt-dlp."""
+        url = info.get('url')
+        return cls(
+            info.get('title') or "Inconnu",
+            info.get('webpage_url') or info.get('original_url') or url,
+            int(info['duration']) if info.get('duration') else None,
+            requester_id,
+            url,
+            info.get('expires') or (stream_expiry(url, time.time()) if url else None),
+            *_audio_format(info),
+        )
+
+    @classmethod
+    def from_entry(cls, entry, requester_id=None):
+        """Piste d'une playlist extraite à plat: URL de la page seulement,
+        résolue au moment de la jouer (ou par le préchargement)."""
+        return cls(
+            entry.get('title') or "Inconnu",
+            entry['url'],
+            int(entry['duration']) if entry.get('duration') else None,
+            requester_id,
+        )
+
+    def is_fresh(self, now=None):
+        """True si `stream_url` peut encore être passée à ffmpeg."""
+        if not self.stream_url or self.expires is None:
+            return False
+        return (now or time.time()) < self.expires - STREAM_EXPIRY_MARGIN
+
+    def resolved(self, info):
+        """Met à jour l'URL directe après une nouvelle extraction."""
+        self.stream_url = info.get('url')
+        self.expires = info.get('expires') or stream_expiry(self.stream_url, time.time())
+        if info.get('duration'):
+            self.duration = int(info['duration'])
+        self.codec, self.bitrate = _audio_format(info)
+        return self
+
+    def to_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{slot: data.get(slot) for slot in cls.__slots__})
+
+
+class TrackQueue:
+    """File d'attente d'un serveur.
+
+    Une deque d'identifiants d'entrée donne l'ordre, un index id -> Track le
+    contenu: ajout, retrait en tête et retrait par identifiant en O(1) (les
+    identifiants retirés restent dans la deque jusqu'à un compactage
+    amorti). Chaque entrée a une clé d'ordre réelle: un déplacement ne
+    change que la clé de l'entrée déplacée.
+
+    `on_change(op)` reçoit chaque mutation pour la persistance:
+    ('add', entry_id, key, track), ('remove', entry_id), ('key', entry_id, key),
+    ('clear',).
+    """
+
+    def __init__(self, history=HISTORY_SIZE, on_change=None):
+        self._order = deque()  # identifiants, éventuellement déjà retirés
+        self._entries = {}  # entry_id -> Track
+        self._keys = {}  # entry_id -> clé d'ordre
+        self._next_id = 1
+        self.history = deque(maxlen=history)  # pistes jouées, la plus récente d'abord
+        self.on_change = on_change
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        entries = self._entries
+        return (entries[entry_id] for entry_id in self._order if entry_id in entries)
+
+    def _emit(self, *op):
+        if self.on_change is not None:
+            self.on_change(op)
+
+    def _live_ids(self):
+        return (entry_id for entry_id in self._order if entry_id in self._entries)
+
+    def _compact(self):
+        if len(self._order) > 2 * len(self._entries) + 16:
+            self._order = deque(self._live_ids())
+
+    def _new_id(self):
+        entry_id = self._next_id
+        self._next_id += 1
+        return entry_id
+
+    def _edge_key(self, head):
+        ids = self._live_ids() if head else (i for i in reversed(self._order) if i in self._entries)
+        edge = next(ids, None)
+        if edge is None:
+            return 0.0
+        return self._keys[edge] - 1 if head else self._keys[edge] + 1
+
+    def append(self, track):
+        entry_id = self._new_id()
+        key = self._edge_key(head=False)
+        self._order.append(entry_id)
+        self._entries[entry_id] = track
+        self._keys[entry_id] = key
+        self._emit('add', entry_id, key, track)
+        return entry_id
+
+    def appendleft(self, track):
+        entry_id = self._new_id()
+        key = self._edge_key(head=True)
+        self._order.appendleft(entry_id)
+        self._entries[entry_id] = track
+        self._keys[entry_id] = key
+        self._emit('add', entry_id, key, track)
+        return entry_id
+
+    def popleft(self):
+        """Première piste (retirée de la file), ou None."""
+        while self._order:
+            entry_id = self._order.popleft()
+            track = self._entries.pop(entry_id, None)
+            if track is not None:
+                del self._keys[entry_id]
+                self._emit('remove', entry_id)
+                return track
+        return None
+
+    def remove(self, entry_id):
+        track = self._entries.pop(entry_id, None)
+        if track is not None:
+            del self._keys[entry_id]
+            self._emit('remove', entry_id)
+            self._compact()
+        return track
+
+    def entry_id_at(self, index):
+        """Identifiant de la piste en position `index` (0 = prochaine), ou None."""
+        if not 0 <= index < len(self._entries):
+            return None
+        return next(islice(self._live_ids(), index, None))
+
+    def remove_at(self, index):
+        entry_id = self.entry_id_at(index)
+        return None if entry_id is None else self.remove(entry_id)
+
+    def move(self, src, dst):
+        """Déplace la piste de la position `src` à `dst` (0 = prochaine)."""
+        if not (0 <= src < len(self._entries) and 0 <= dst < len(self._entries)):
+            return None
+        if len(self._order) != len(self._entries):
+            # identifiants retirés encore présents: positions de la deque = positions de la file
+            self._order = deque(self._live_ids())
+        # sur place: del/insert décalent au plus min(i, n - i) éléments de la deque
+        entry_id = self._order[src]
+        del self._order[src]
+        self._order.insert(dst, entry_id)
+        before = self._keys[self._order[dst - 1]] if dst > 0 else None
+        after = self._keys[self._order[dst + 1]] if dst + 1 < len(self._order) else None
+        if before is None and after is None:
+            key = 0.0
+        elif before is None:
+            key = after - 1
+        elif after is None:
+            key = before + 1
+        else:
+            key = (before + after) / 2
+            if not before < key < after:
+                # précision épuisée après de nombreux déplacements au même endroit
+                self._renumber()
+                return self._entries[entry_id]
+        self._keys[entry_id] = key
+        self._emit('key', entry_id, key)
+        return self._entries[entry_id]
+
+    def _renumber(self):
+        for position, entry_id in enumerate(self._live_ids()):
+            self._keys[entry_id] = float(position)
+            self._emit('key', entry_id, float(position))
+
+    def skip_to(self, index):
+        """Retire les `index` premières pistes; retourne le nombre retiré."""
+        skipped = 0
+        while skipped < index and self.popleft() is not None:
+            skipped += 1
+        return skipped
+
+    def shuffle(self):
+        ids = list(self._live_ids())
+        random.shuffle(ids)
+        self._order = deque(ids)
+        self._renumber()
+
+    def clear(self):
+        self._order.clear()
+        self._entries.clear()
+        self._keys.clear()
+        self._emit('clear')
+
+    def restore(self, rows):
+        """Recharge des entrées persistées [(entry_id, clé, Track), ...] sans émettre d'opérations."""
+        for entry_id, key, track in sorted(rows, key=lambda row: row[1]):
+            self._order.append(entry_id)
+            self._entries[entry_id] = track
+            self._keys[entry_id] = key
+            self._next_id = max(self._next_id, entry_id + 1)
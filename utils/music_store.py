@@ -0,0 +1,138 @@
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+SCHEMA_VERSION = 1
+# File d'attente: une ligne par entrée, triée par `ord` (clé réelle: un
+# déplacement ne réécrit que la ligne déplacée). `track` = Track.to_dict()
+# en JSON. Sessions: salon vocal et piste en cours de chaque serveur qui
+# jouait au dernier arrêt, `position` en secondes dans cette piste.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS queue_entries (
+    guild_id INTEGER NOT NULL,
+    entry_id INTEGER NOT NULL,
+    ord REAL NOT NULL,
+    track TEXT NOT NULL,
+    PRIMARY KEY (guild_id, entry_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_queue_entries_ord ON queue_entries(guild_id, ord);
+CREATE TABLE IF NOT EXISTS sessions (
+    guild_id INTEGER PRIMARY KEY,
+    channel_id INTEGER NOT NULL,
+    repeat INTEGER NOT NULL DEFAULT 0,
+    volume REAL,
+    current TEXT,
+    position REAL NOT NULL DEFAULT 0,
+    updated INTEGER NOT NULL
+);
+"""
+
+
+class MusicStore:
+    """Stockage SQLite des files d'attente musicales.
+
+    Même modèle que ModerationStore (connexion sur un thread dédié), mais
+    les écritures arrivent en lot: le cog accumule les mutations de ses
+    files et `apply` les rejoue dans une seule transaction à chaque flush
+    du PersistenceScheduler.
+
+    Opérations: ('add', guild_id, entry_id, ord, track_json),
+    ('remove', guild_id, entry_id), ('key', guild_id, entry_id, ord),
+    ('clear', guild_id), ('session', guild_id, channel_id, repeat, volume,
+    current_json, position), ('end', guild_id).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="music-db")
+        self._conn = None
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    # --- cycle de vie ---
+
+    async def open(self):
+        await self._run(self._open)
+
+    async def close(self):
+        await self._run(self._close)
+        self._executor.shutdown(wait=True)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _close(self):
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+
+    # --- thread DB ---
+
+    def _apply(self, ops):
+        now = int(time.time())
+        with self._conn:
+            for op in ops:
+                kind, guild_id = op[0], op[1]
+                if kind == 'add':
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO queue_entries (guild_id, entry_id, ord, track) VALUES (?, ?, ?, ?)",
+                        (guild_id, *op[2:])
+                    )
+                elif kind == 'remove':
+                    self._conn.execute(
+                        "DELETE FROM queue_entries WHERE guild_id = ? AND entry_id = ?", (guild_id, op[2])
+                    )
+                elif kind == 'key':
+                    self._conn.execute(
+                        "UPDATE queue_entries SET ord = ? WHERE guild_id = ? AND entry_id = ?", (op[3], guild_id, op[2])
+                    )
+                elif kind == 'clear':
+                    self._conn.execute("DELETE FROM queue_entries WHERE guild_id = ?", (guild_id,))
+                elif kind == 'session':
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO sessions (guild_id, channel_id, repeat, volume, current, position, updated) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (guild_id, *op[2:], now)
+                    )
+                elif kind == 'end':
+                    self._conn.execute("DELETE FROM sessions WHERE guild_id = ?", (guild_id,))
+
+    def _load(self):
+        sessions = {}
+        for guild_id, channel_id, repeat, volume, current, position in self._conn.execute(
+            "SELECT guild_id, channel_id, repeat, volume, current, position FROM sessions"
+        ):
+            sessions[guild_id] = {
+                'channel_id': channel_id,
+                'repeat': bool(repeat),
+                'volume': volume,
+                'current': json.loads(current) if current else None,
+                'position': position,
+            }
+        entries = {}
+        for guild_id, entry_id, ord_, track in self._conn.execute(
+            "SELECT guild_id, entry_id, ord, track FROM queue_entries ORDER BY guild_id, ord"
+        ):
+            entries.setdefault(guild_id, []).append((entry_id, ord_, json.loads(track)))
+        return sessions, entries
+
+    # --- API async ---
+
+    async def apply(self, ops):
+        """Rejoue `ops` dans une transaction."""
+        if ops:
+            await self._run(self._apply, ops)
+
+    async def load(self):
+        """({guild_id: session}, {guild_id: [(entry_id, ord, track_dict), ...]})."""
+        return await self._run(self._load)
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+import os
+
+log = logging.getLogger(__name__)
+
+
+def atomic_write(path, payload):
+    """Écrit `payload` (str) via fichier temporaire + rename: jamais de fichier à moitié écrit."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class PersistenceScheduler:
+    """Regroupe les écritures disque des cogs.
+
+    Les cogs enregistrent une coroutine de flush puis marquent leur état sale
+    à chaque mutation. Une tâche de fond unique flush au plus toutes les
+    `interval` secondes, ou dès que `max_pending` mutations sont en attente.
+    Le flush lui-même est responsable de faire son I/O hors de la boucle.
+    """
+
+    def __init__(self, interval=0.5, max_pending=200):
+        self.interval = interval
+        self.max_pending = max_pending
+        self.flush_count = 0
+        self._targets = {}  # name -> coroutine function
+        self._locks = {}
+        self._dirty = {}  # name -> mutations en attente
+        self._wake = asyncio.Event()
+        self._full = asyncio.Event()
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Arrête la tâche de fond et flush une dernière fois tout ce qui est sale."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def register(self, name, flush):
+        self._targets[name] = flush
+        self._locks[name] = asyncio.Lock()
+        self._dirty.setdefault(name, 0)
+
+    async def unregister(self, name):
+        """Flush final puis retrait (déchargement d'un cog)."""
+        await self.flush(name)
+        self._targets.pop(name, None)
+        self._locks.pop(name, None)
+        self._dirty.pop(name, None)
+
+    def mark_dirty(self, name, count=1):
+        self._dirty[name] = self._dirty.get(name, 0) + count
+        self._wake.set()
+        if self._dirty[name] >= self.max_pending:
+            self._full.set()
+
+    async def flush(self, name=None):
+        names = [name] if name else list(self._targets)
+        for n in names:
+            if n not in self._targets:
+                continue
+            async with self._locks[n]:
+                pending = self._dirty.get(n, 0)
+                if not pending:
+                    continue
+                self._dirty[n] = 0
+                try:
+                    await self._targets[n]()
+                    self.flush_count += 1
+                except Exception:
+                    # on retentera au prochain cycle
+                    self._dirty[n] = self._dirty.get(n, 0) + pending
+                    log.exception("Flush de %s échoué", n)
+
+    async def _run(self):
+        while True:
+            await self._wake.wait()
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            self._full.clear()
+            await self.flush()
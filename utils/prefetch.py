@@ -0,0 +1,84 @@
+import asyncio
+import time
+from itertools import islice
+
+from utils.extraction import STREAM_EXPIRY_MARGIN
+
+
+class Prefetcher:
+    """Prépare les prochaines pistes de chaque file pendant la lecture.
+
+    `resolve(track, guild_id, play_at)` doit rendre `track` jouable à
+    l'instant `play_at` (epoch estimé de son démarrage): URL directe encore
+    valide à ce moment, format connu. Une seule tâche par serveur; une
+    nouvelle demande remplace la précédente (file modifiée entre-temps).
+
+    Une fois les pistes prêtes, la tâche reste en veille et réextrait en
+    arrière-plan chaque URL (pistes suivantes et piste en cours) avant
+    qu'elle n'approche de son expiration: pause prolongée, repeat ou reprise
+    après coupure trouvent toujours une URL valide.
+    """
+
+    def __init__(self, resolve, depth=2):
+        self.resolve = resolve
+        self.depth = depth
+        self._tasks = {}  # guild_id -> Task
+        self.resolved = 0
+        self.failed = 0
+        self.refreshed = 0
+
+    def schedule(self, guild_id, upcoming, lead=0, current=None):
+        """`upcoming`: prochaines pistes dans l'ordre; `lead`: secondes avant
+        la fin de la piste en cours (`current`, gardée valide elle aussi)."""
+        self.cancel(guild_id)
+        tracks = list(islice(upcoming, self.depth))
+        if not tracks and current is None:
+            return
+        task = self._tasks[guild_id] = asyncio.create_task(self._run(guild_id, tracks, lead, current))
+        task.add_done_callback(lambda t: self._tasks.pop(guild_id, None) if self._tasks.get(guild_id) is t else None)
+
+    def cancel(self, guild_id):
+        task = self._tasks.pop(guild_id, None)
+        if task is not None:
+            task.cancel()
+
+    def close(self):
+        for guild_id in list(self._tasks):
+            self.cancel(guild_id)
+
+    async def _run(self, guild_id, tracks, lead, current=None):
+        play_at = time.time() + lead
+        watched = [current] if current is not None else []
+        for track in tracks:
+            try:
+                await self.resolve(track, guild_id, play_at)
+                self.resolved += 1
+                watched.append(track)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # la piste sera de nouveau résolue au moment de la jouer
+                self.failed += 1
+            play_at += track.duration or 0
+        await self._keep_fresh(guild_id, watched)
+
+    async def _keep_fresh(self, guild_id, watched):
+        """Réextrait chaque URL une marge avant qu'elle ne cesse d'être fraîche."""
+        watched = [track for track in watched if track.expires is not None]
+        while watched:
+            track = min(watched, key=lambda t: t.expires)
+            refresh_at = track.expires - 2 * STREAM_EXPIRY_MARGIN
+            await asyncio.sleep(max(0, refresh_at - time.time()))
+            try:
+                # exigée fraîche au-delà de son expiration actuelle: nouvelle extraction
+                await self.resolve(track, guild_id, track.expires)
+                self.refreshed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.failed += 1
+                watched.remove(track)
+                continue
+            if track.expires is None or track.expires - 2 * STREAM_EXPIRY_MARGIN <= time.time():
+                # URL à durée de vie trop courte pour être rafraîchie d'avance
+                watched.remove(track)
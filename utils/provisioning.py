@@ -0,0 +1,66 @@
+import asyncio
+
+import discord
+
+# permissions retirées au rôle Muted dans chaque salon (texte + voix)
+MUTED_PERMISSIONS = dict(send_messages=False, add_reactions=False, speak=False, connect=False)
+
+
+def muted_overwrite():
+    return discord.PermissionOverwrite(**MUTED_PERMISSIONS)
+
+
+def plan_overwrites(guild, role, overwrite):
+    """(catégories, salons) dont l'overwrite de `role` diffère de `overwrite`.
+
+    Les catégories passent en premier: un salon créé ensuite dans une
+    catégorie synchronisée hérite de l'overwrite sans appel supplémentaire.
+    L'API ne propage pas une modification de catégorie aux salons existants,
+    chacun reste donc une requête, sauf s'il est déjà à jour.
+    """
+    categories = [c for c in guild.categories if c.overwrites_for(role) != overwrite]
+    channels = [
+        c for c in guild.channels
+        if not isinstance(c, discord.CategoryChannel) and c.overwrites_for(role) != overwrite
+    ]
+    return categories, channels
+
+
+class OverwriteProvisioner:
+    """Applique un overwrite à de nombreux salons avec une concurrence bornée.
+
+    discord.py suit les buckets de rate limit par route (un par salon pour
+    PUT /channels/{id}/permissions) et rejoue les 429; borner le nombre de
+    requêtes en vol évite de saturer la limite globale. `progress(done,
+    total, failed)` est appelé après chaque salon.
+    """
+
+    def __init__(self, concurrency=8):
+        self.concurrency = concurrency
+
+    async def apply(self, phases, role, overwrite, reason=None, progress=None):
+        """Traite les listes de `phases` l'une après l'autre; retourne le nombre d'échecs."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        total = sum(len(targets) for targets in phases)
+        state = {'done': 0, 'failed': 0}
+
+        async def one(channel):
+            async with semaphore:
+                try:
+                    await channel.set_permissions(role, overwrite=overwrite, reason=reason)
+                except discord.HTTPException:
+                    # salon sans permission pour le bot, supprimé entre-temps...
+                    state['failed'] += 1
+            state['done'] += 1
+            if progress:
+                await progress(state['done'], total, state['failed'])
+
+        for targets in phases:
+            await asyncio.gather(*(one(c) for c in targets))
+        return state['failed']
+
+    async def provision(self, guild, role, overwrite, reason=None, progress=None):
+        """Catégories puis salons; retourne (salons traités, échecs)."""
+        categories, channels = plan_overwrites(guild, role, overwrite)
+        failed = await self.apply([categories, channels], role, overwrite, reason, progress)
+        return len(categories) + len(channels), failed
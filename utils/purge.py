@@ -0,0 +1,124 @@
+import asyncio
+from datetime import timedelta
+
+import discord
+
+# taille maximale d'un appel bulk-delete (API Discord)
+BULK_SIZE = 100
+# l'API refuse le bulk-delete au-delà de 14 jours; marge pour les horloges
+BULK_MAX_AGE = timedelta(days=14) - timedelta(minutes=5)
+
+
+class PurgeFilter:
+    """Critères d'un message à supprimer (tous optionnels, combinés en ET)."""
+
+    def __init__(self, author_id=None, pattern=None, attachments=None, bots=None):
+        self.author_id = author_id
+        self.pattern = pattern  # re.Pattern compilé
+        self.attachments = attachments
+        self.bots = bots
+
+    def __call__(self, message):
+        if self.author_id is not None and message.author.id != self.author_id:
+            return False
+        if self.bots is not None and message.author.bot != self.bots:
+            return False
+        if self.attachments is not None and bool(message.attachments) != self.attachments:
+            return False
+        if self.pattern is not None and not self.pattern.search(message.content):
+            return False
+        return True
+
+
+class PurgeJob:
+    """Supprime jusqu'à `limit` messages d'un salon correspondant à `check`.
+
+    L'historique est parcouru page par page (du plus récent au plus ancien,
+    au plus `scan_limit` messages). Les messages de moins de 14 jours sont
+    supprimés par lots de 100 (bulk-delete); les plus anciens passent par une
+    file bornée consommée par une tâche qui les supprime un à un, espacés de
+    `single_delay` secondes. `cancel()` arrête le parcours et les deux voies
+    après la requête en cours.
+    """
+
+    def __init__(self, channel, limit, check, after=None, scan_limit=50_000, single_delay=1.0):
+        self.channel = channel
+        self.limit = limit
+        self.check = check
+        self.after = after
+        self.scan_limit = scan_limit
+        self.single_delay = single_delay
+        self.scanned = 0
+        self.matched = 0
+        self.deleted = 0
+        self.failed = 0
+        self.cancelled = False
+        self.finished = False
+        self._cancel = asyncio.Event()
+        # file bornée: le parcours attend la voie lente au lieu d'accumuler
+        self._queue = asyncio.Queue(maxsize=BULK_SIZE)
+
+    def cancel(self):
+        self.cancelled = True
+        self._cancel.set()
+        # libère un parcours bloqué sur la file pleine
+        while not self._queue.empty():
+            self._queue.get_nowait()
+
+    async def _bulk_delete(self, messages):
+        try:
+            await self.channel.delete_messages(messages)
+            self.deleted += len(messages)
+        except discord.HTTPException:
+            self.failed += len(messages)
+
+    async def _single_lane(self, queue):
+        while True:
+            message = await queue.get()
+            if message is None or self._cancel.is_set():
+                return
+            try:
+                await message.delete()
+                self.deleted += 1
+            except discord.NotFound:
+                pass
+            except discord.HTTPException:
+                self.failed += 1
+            try:
+                # espacement volontaire, en plus des rate limits suivis par discord.py
+                await asyncio.wait_for(self._cancel.wait(), timeout=self.single_delay)
+                return
+            except asyncio.TimeoutError:
+                pass
+
+    async def run(self):
+        cutoff = discord.utils.time_snowflake(discord.utils.utcnow() - BULK_MAX_AGE)
+        queue = self._queue
+        single = asyncio.create_task(self._single_lane(queue))
+        batch = []
+        try:
+            async for message in self.channel.history(limit=self.scan_limit, after=self.after, oldest_first=False):
+                if self._cancel.is_set():
+                    break
+                self.scanned += 1
+                if not self.check(message):
+                    continue
+                self.matched += 1
+                if message.id > cutoff:
+                    batch.append(message)
+                    if len(batch) == BULK_SIZE:
+                        await self._bulk_delete(batch)
+                        batch = []
+                else:
+                    await queue.put(message)
+                if self.matched >= self.limit:
+                    break
+            if batch and not self._cancel.is_set():
+                await self._bulk_delete(batch)
+            if not self._cancel.is_set():
+                await queue.put(None)
+                await single
+        finally:
+            if not single.done():
+                single.cancel()
+            self.finished = True
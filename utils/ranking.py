@@ -0,0 +1,178 @@
+import heapq
+from bisect import bisect_left, insort
+from itertools import islice
+
+
+class RankIndex:
+    """Classement par solde décroissant maintenu incrémentalement.
+
+    Liste triée découpée en seaux (comme sortedcontainers) + arbre de Fenwick
+    sur la taille des seaux: mise à jour et rang en O(log n), page en
+    O(log n + taille de page). Les clés sont (-balance, user_id).
+
+    Mémoire: un solde par compte (~140 octets par compte, ~140 Mo par
+    million), indépendamment du cache de shards. Les vues par serveur ne
+    parcourent que les membres du serveur.
+    """
+
+    LOAD = 512
+
+    def __init__(self):
+        self._balances = {}  # user_id -> balance
+        self._lists = []
+        self._maxes = []
+        self._tree = []
+
+    def __len__(self):
+        return len(self._balances)
+
+    def __contains__(self, user_id):
+        return user_id in self._balances
+
+    def balance(self, user_id):
+        return self._balances.get(user_id)
+
+    # --- arbre de Fenwick sur len(seau) ---
+
+    def _rebuild_tree(self):
+        tree = [len(b) for b in self._lists]
+        for i in range(len(tree)):
+            j = i | (i + 1)
+            if j < len(tree):
+                tree[j] += tree[i]
+        self._tree = tree
+
+    def _tree_add(self, i, delta):
+        tree = self._tree
+        while i < len(tree):
+            tree[i] += delta
+            i |= i + 1
+
+    def _tree_prefix(self, i):
+        """Nombre d'éléments dans les seaux [0, i)."""
+        total = 0
+        while i > 0:
+            total += self._tree[i - 1]
+            i &= i - 1
+        return total
+
+    def _tree_find(self, pos):
+        """(seau, offset) de la position globale `pos` (0-based)."""
+        i = 0
+        step = 1 << (len(self._tree).bit_length())
+        while step:
+            j = i + step
+            if j <= len(self._tree) and self._tree[j - 1] <= pos:
+                pos -= self._tree[j - 1]
+                i = j
+            step >>= 1
+        return i, pos
+
+    # --- mutations ---
+
+    def build(self, items):
+        """Construit l'index à partir de [(user_id, balance), ...]."""
+        self._balances = dict(items)
+        keys = sorted((-b, u) for u, b in self._balances.items())
+        self._lists = [keys[i:i + self.LOAD] for i in range(0, len(keys), self.LOAD)]
+        self._maxes = [b[-1] for b in self._lists]
+        self._rebuild_tree()
+
+    def update(self, user_id, balance):
+        old = self._balances.get(user_id)
+        if old == balance:
+            return
+        if old is not None:
+            self._remove_key((-old, user_id))
+        self._balances[user_id] = balance
+        self._insert_key((-balance, user_id))
+
+    def discard(self, user_id):
+        old = self._balances.pop(user_id, None)
+        if old is not None:
+            self._remove_key((-old, user_id))
+
+    def _insert_key(self, key):
+        if not self._lists:
+            self._lists.append([key])
+            self._maxes.append(key)
+            self._rebuild_tree()
+            return
+        i = bisect_left(self._maxes, key)
+        if i == len(self._lists):
+            i -= 1
+        bucket = self._lists[i]
+        insort(bucket, key)
+        self._maxes[i] = bucket[-1]
+        if len(bucket) > 2 * self.LOAD:
+            self._lists[i:i + 1] = [bucket[:self.LOAD], bucket[self.LOAD:]]
+            self._maxes[i:i + 1] = [bucket[self.LOAD - 1], bucket[-1]]
+            self._rebuild_tree()
+        else:
+            self._tree_add(i, 1)
+
+    def _remove_key(self, key):
+        i = bisect_left(self._maxes, key)
+        bucket = self._lists[i]
+        del bucket[bisect_left(bucket, key)]
+        if bucket:
+            self._maxes[i] = bucket[-1]
+            self._tree_add(i, -1)
+        else:
+            del self._lists[i]
+            del self._maxes[i]
+            self._rebuild_tree()
+
+    # --- requêtes ---
+
+    def _position(self, key):
+        i = bisect_left(self._maxes, key)
+        if i == len(self._lists):
+            return self._tree_prefix(i)
+        return self._tree_prefix(i) + bisect_left(self._lists[i], key)
+
+    def rank(self, user_id):
+        """Rang global 1-based, ou None si l'utilisateur n'a pas de compte."""
+        balance = self._balances.get(user_id)
+        if balance is None:
+            return None
+        return self._position((-balance, user_id)) + 1
+
+    def iter_from(self, offset=0):
+        """Itère (user_id, balance) dans l'ordre du classement à partir de `offset`."""
+        if offset >= len(self):
+            return
+        i, j = self._tree_find(offset)
+        for bucket in islice(self._lists, i, None):
+            for neg_balance, user_id in islice(bucket, j, None):
+                yield user_id, -neg_balance
+            j = 0
+
+    def page(self, offset, limit):
+        return list(islice(self.iter_from(offset), limit))
+
+    def subset_page(self, member_ids, offset, limit):
+        """Page du classement restreinte à `member_ids` (ex: membres d'une guild).
+
+        Coût proportionnel à la taille du sous-ensemble, jamais au nombre
+        total de comptes: le classement global n'est pas parcouru.
+        """
+        balances = self._balances
+        keys = [(-balances[u], u) for u in member_ids if u in balances]
+        if offset + limit < len(keys):
+            keys = heapq.nsmallest(offset + limit, keys)
+        else:
+            keys.sort()
+        return [(u, -b) for b, u in keys[offset:offset + limit]]
+
+    def subset_count(self, member_ids):
+        return sum(1 for u in member_ids if u in self._balances)
+
+    def subset_rank(self, user_id, member_ids):
+        """Rang 1-based de `user_id` parmi `member_ids` (un passage sur le sous-ensemble)."""
+        balance = self._balances.get(user_id)
+        if balance is None:
+            return None
+        key = (-balance, user_id)
+        balances = self._balances
+        return 1 + sum(1 for u in member_ids if u in balances and (-balances[u], u) < key)
@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+
+class TimingWheel:
+    """Roue temporelle hiérarchique pilotée par une seule tâche.
+
+    `levels` roues de `slots` cases; la case d'une échéance dépend de son
+    éloignement (64 s, ~68 min, ~3 j, ~194 j avec les valeurs par défaut).
+    Quand une roue fait un tour, la case suivante de la roue supérieure
+    redescend d'un niveau. Ajout et annulation en O(1), aucune tâche ni
+    timer par échéance: 100k rappels en attente = 100k entrées de dict.
+    Les clés sont des hashables (idéalement des int), une échéance par clé.
+    """
+
+    def __init__(self, tick=1.0, slots=64, levels=4, clock=time.time):
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self.clock = clock
+        self.current = int(clock() // tick)
+        self._wheels = [[{} for _ in range(slots)] for _ in range(levels)]
+        self._where = {}  # key -> (level, slot)
+        self._task = None
+
+    def __len__(self):
+        return len(self._where)
+
+    def __contains__(self, key):
+        return key in self._where
+
+    def _place(self, key, due):
+        delta = due - self.current
+        span = self.slots
+        for level in range(self.levels):
+            if delta < span or level == self.levels - 1:
+                slot = (due // (span // self.slots)) % self.slots
+                self._wheels[level][slot][key] = due
+                self._where[key] = (level, slot)
+                return
+            span *= self.slots
+
+    def schedule(self, key, when):
+        """Programme `key` pour l'instant `when` (epoch); remplace l'échéance existante."""
+        self.cancel(key)
+        self._place(key, max(int(when // self.tick), self.current + 1))
+
+    def cancel(self, key):
+        where = self._where.pop(key, None)
+        if where is None:
+            return False
+        level, slot = where
+        del self._wheels[level][slot][key]
+        return True
+
+    def advance(self, now=None):
+        """Avance jusqu'à `now` et retourne les clés échues, dans l'ordre."""
+        target = int((self.clock() if now is None else now) // self.tick)
+        due = []
+        while self.current < target:
+            self.current += 1
+            # redescendre d'abord les roues les plus hautes qui font un tour
+            for level in range(self.levels - 1, 0, -1):
+                unit = self.slots ** level
+                if self.current % unit:
+                    continue
+                slot = (self.current // unit) % self.slots
+                bucket, self._wheels[level][slot] = self._wheels[level][slot], {}
+                for key, when in bucket.items():
+                    self._place(key, when)
+            slot = self.current % self.slots
+            bucket, self._wheels[0][slot] = self._wheels[0][slot], {}
+            for key, when in bucket.items():
+                if when <= self.current:
+                    del self._where[key]
+                    due.append(key)
+                else:
+                    self._place(key, when)
+        return due
+
+    # --- tâche pilote ---
+
+    def start(self, callback):
+        """Lance la tâche unique qui appelle callback(key) pour chaque échéance."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(callback))
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self, callback):
+        while True:
+            await asyncio.sleep(self.tick)
+            for key in self.advance():
+                try:
+                    callback(key)
+                except Exception as e:
+                    print(f"TimingWheel callback error: {e}")
@@ -0,0 +1,80 @@
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+
+
+class AccountLocks:
+    """Verrous asyncio par compte, pris dans un ordre déterministe (ids triés).
+
+    Deux opérations qui touchent les mêmes comptes les verrouillent toujours
+    dans le même ordre: pas d'interblocage, pas de double dépense entre les
+    `await` d'une lecture et de l'écriture qui en dépend.
+    """
+
+    def __init__(self):
+        self._locks = weakref.WeakValueDictionary()
+
+    def _get(self, user_id):
+        lock = self._locks.get(user_id)
+        if lock is None:
+            lock = self._locks[user_id] = asyncio.Lock()
+        return lock
+
+    @asynccontextmanager
+    async def hold(self, *user_ids):
+        locks = [self._get(uid) for uid in sorted({int(u) for u in user_ids})]
+        acquired = []
+        try:
+            for lock in locks:
+                await lock.acquire()
+                acquired.append(lock)
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
+
+
+class TransferEngine:
+    """Débits/crédits atomiques au-dessus d'EconomyStore.
+
+    Chaque appel = une seule opération SQL (savepoint) et une seule marque
+    "sale" pour le scheduler de persistance, quel que soit le nombre de
+    comptes touchés. `on_balance(user_id, balance)` est appelé sous verrou
+    pour chaque nouveau solde (mise à jour du classement).
+    """
+
+    def __init__(self, store, on_balance=None):
+        self.store = store
+        self.locks = AccountLocks()
+        self.on_balance = on_balance or (lambda user_id, balance: None)
+
+    async def transfer(self, sender_id, receiver_id, amount, sent_note=None, received_note=None):
+        """Retourne (solde émetteur, solde destinataire), ou None si solde insuffisant."""
+        async with self.locks.hold(sender_id, receiver_id):
+            balances = await self.store.transfer(sender_id, receiver_id, amount, sent_note, received_note)
+            if balances is not None:
+                self.on_balance(sender_id, balances[0])
+                self.on_balance(receiver_id, balances[1])
+            return balances
+
+    async def transfer_many(self, sender_id, receiver_ids, amount, sent_note=None, received_note=None):
+        """Envoie `amount` à chaque destinataire; tout ou rien.
+
+        Retourne {user_id: solde} (émetteur inclus), ou None si solde insuffisant.
+        """
+        receiver_ids = [uid for uid in dict.fromkeys(receiver_ids) if uid != sender_id]
+        async with self.locks.hold(sender_id, *receiver_ids):
+            balances = await self.store.transfer_many(sender_id, receiver_ids, amount, sent_note, received_note)
+            if balances is not None:
+                for user_id, balance in balances.items():
+                    self.on_balance(user_id, balance)
+            return balances
+
+    async def credit_many(self, user_ids, amount, ttype, note=None):
+        """Crédite `amount` à chaque compte en une transaction. Retourne {user_id: solde}."""
+        user_ids = list(dict.fromkeys(user_ids))
+        async with self.locks.hold(*user_ids):
+            balances = await self.store.credit_many(user_ids, amount, ttype, note)
+            for user_id, balance in balances.items():
+                self.on_balance(user_id, balance)
+            return balances